@@ -0,0 +1,144 @@
+"""
+Benchmark the SQLite connection profiles.
+
+For each profile, imports synthetic comic records into a fresh database,
+first one transaction per comic and then in batches. It then measures browse
+latency (``get_comics`` with a search term), both on an idle database and
+while another connection is importing.
+
+Usage:
+    python benchmarks/sqlite_profiles.py [--comics 2000] [--profiles interactive compatible]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from struttura.database import CONNECTION_PROFILES, ComicDatabase  # noqa: E402
+
+
+def make_records(count, offset=0):
+    """Build comic records shaped like ComicScanner output, without files."""
+    records = []
+    for i in range(offset, offset + count):
+        series = f"Series {i % 150}"
+        records.append({
+            'title': f"{series} #{i}",
+            'series': series,
+            'publisher': f"Publisher {i % 12}",
+            'issue_number': str(i % 100 + 1),
+            'year': 1980 + i % 40,
+            'authors': [f"Writer {i % 300}", f"Artist {i % 500}"],
+            'file_path': f"/library/{series}/{i:06d}.cbz",
+            'file_size': 30_000_000,
+            'file_modified': 1_700_000_000.0,
+            'file_created': 1_700_000_000.0,
+            'page_count': 24,
+            'cover_image': b'\xff' * 40_000,
+            'pages': [
+                {'page_index': p, 'member_name': f"{p:03d}.jpg", 'file_size': 1_200_000}
+                for p in range(24)
+            ],
+        })
+    return records
+
+
+def open_database(path, profile):
+    db = ComicDatabase(path, profile=profile)
+    db.create_tables()
+    return db
+
+
+def time_import(path, profile, records, batch_size):
+    db = open_database(path, profile)
+    try:
+        start = time.perf_counter()
+        db.add_comics_bulk(records, batch_size=batch_size)
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+def browse_latencies(db, rounds):
+    latencies = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        db.get_comics(search=f"Series {i % 150}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def time_browse(path, profile, rounds, concurrent_records=None):
+    """Median and worst browse latency in ms, optionally during an import."""
+    writer = None
+    if concurrent_records:
+        def import_more():
+            writer_db = open_database(path, profile)
+            try:
+                writer_db.add_comics_bulk(concurrent_records, batch_size=50)
+            finally:
+                writer_db.close()
+        writer = threading.Thread(target=import_more)
+        writer.start()
+
+    reader = ComicDatabase(path, profile=profile)
+    try:
+        latencies = browse_latencies(reader, rounds)
+    finally:
+        reader.close()
+        if writer:
+            writer.join()
+    return statistics.median(latencies), max(latencies)
+
+
+def run(profiles, comics, rounds):
+    print(f"{comics} comics, {rounds} browse queries per measurement\n")
+    header = (f"{'profile':<20}{'import 1/txn':>14}{'import batched':>16}"
+              f"{'browse p50':>12}{'browse max':>12}{'busy p50':>10}{'busy max':>10}")
+    print(header)
+    print('-' * len(header))
+
+    for profile in profiles:
+        # A read-only replica cannot import; it browses a database written normally
+        read_only = CONNECTION_PROFILES[profile].get('read_only')
+        import_profile = 'interactive' if read_only else profile
+
+        with tempfile.TemporaryDirectory() as tmp:
+            single_path = os.path.join(tmp, 'single.sqlite')
+            single = time_import(single_path, import_profile, make_records(min(comics, 500)), 1)
+            single_rate = min(comics, 500) / single
+
+            path = os.path.join(tmp, 'bulk.sqlite')
+            bulk = time_import(path, import_profile, make_records(comics), 200)
+            bulk_rate = comics / bulk
+
+            idle_p50, idle_max = time_browse(path, profile, rounds)
+            if read_only:
+                busy = ('n/a', 'n/a')
+            else:
+                busy_p50, busy_max = time_browse(path, profile, rounds,
+                                                 make_records(comics // 2, offset=comics))
+                busy = (f"{busy_p50:.1f}ms", f"{busy_max:.1f}ms")
+
+            print(f"{profile:<20}{single_rate:>10.0f}/s  {bulk_rate:>12.0f}/s  "
+                  f"{idle_p50:>9.1f}ms{idle_max:>10.1f}ms{busy[0]:>10}{busy[1]:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--comics', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--profiles', nargs='+',
+                        default=['compatible', 'interactive', 'bulk-import'],
+                        choices=sorted(CONNECTION_PROFILES))
+    args = parser.parse_args()
+    run(args.profiles, args.comics, args.rounds)
+
+
+if __name__ == '__main__':
+    main()
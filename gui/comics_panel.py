@@ -8,14 +8,21 @@ import threading
 import logging
 
 # Local imports
+from struttura.backup import DEFAULT_KEEP, backup_filename
 from struttura.database import ComicDatabase
 from struttura.comic_scanner import ComicScanner, ComicMetadata
+from struttura.config import get_db_config, get_import_config, get_prefetch_config
+from struttura.prefetch import ArchivePrefetcher
+from struttura.querylog import DEFAULT_SLOW_QUERY_MS
 from struttura.lang import tr
 from struttura.logger import log_info, log_error, log_warning
 
 class ComicsPanel(ttk.Frame):
     """Panel for managing comic book archives."""
     
+    # Comics fetched per page in the browse list; more are loaded on scrolling
+    BROWSE_PAGE_SIZE = 200
+    
     def __init__(self, parent: ttk.Widget, db_config: Dict[str, Any], **kwargs) -> None:
         """Initialize the comics panel.
         
@@ -50,10 +57,19 @@ class ComicsPanel(ttk.Frame):
         self.progress = None
         self.start_btn = None
         self.stop_btn = None
+        self.backup_btn = None
         self.tree = None
         self.publisher_cb = None
         self.series_cb = None
         self.context_menu = None
+        # Filters of the listed comics and the position of the next page
+        self._browse_filters: Dict[str, Any] = {}
+        self._browse_cursor: Optional[str] = None
+        self._loading_more = False
+        self._vsb = None
+        # Filter combobox labels -> publisher and series names
+        self._publisher_choices: Dict[str, str] = {}
+        self._series_choices: Dict[str, str] = {}
         
         # Initialize database connection
         self._init_database()
@@ -70,6 +86,15 @@ class ComicsPanel(ttk.Frame):
             # Add default db_type if not specified
             if 'db_type' not in self.db_config:
                 self.db_config['db_type'] = 'sqlite'
+            
+            # SQLite connection profile and reader pool size from the config file
+            if self.db_config.get('db_type') == 'sqlite':
+                saved_config = get_db_config()
+                self.db_config.setdefault('profile', saved_config.get('profile'))
+                self.db_config.setdefault('reader_connections', saved_config.get('reader_connections', 4))
+            
+            # Statements at least this slow are logged with their query plan
+            self.db_config.setdefault('slow_query_ms', get_db_config().get('slow_query_ms', DEFAULT_SLOW_QUERY_MS))
                 
             # If using SQLite, ensure the database file path is absolute
             if self.db_config.get('db_type') == 'sqlite' and 'database' in self.db_config:
@@ -313,21 +338,60 @@ class ComicsPanel(ttk.Frame):
             imported = 0
             total = len(files)
             
-            for i, file_path in enumerate(files, 1):
-                if self.stop_scan:
-                    break
-                
-                # Update progress
-                progress = (i / total) * 100
-                self.progress['value'] = progress
-                self.progress_var.set(f"Processing {i} of {total}: {os.path.basename(file_path)}")
+            # Read the next archives ahead of extraction to hide I/O latency
+            prefetch_config = get_prefetch_config()
+            prefetcher = None
+            if prefetch_config.pop('enabled', True):
+                prefetcher = ArchivePrefetcher(files, **prefetch_config)
+                scanner.prefetcher = prefetcher
+            
+            # Extracted records are written in batches, one transaction each,
+            # while extraction carries on with the next batch
+            import_config = get_import_config()
+            batch_size = import_config['batch_size']
+            batch = []
+            pending = []
+            
+            # Tune the connection for the import, restoring the profile afterwards
+            previous_profile = None
+            if self.db and self.db.db_type == 'sqlite' and import_config.get('profile'):
+                previous_profile = self.db.profile
+                self.db.set_profile(import_config['profile'])
+            
+            try:
+                for i, file_path in enumerate(prefetcher if prefetcher is not None else files, 1):
+                    if self.stop_scan:
+                        break
+                    
+                    # Update progress
+                    progress = (i / total) * 100
+                    self.progress['value'] = progress
+                    self.progress_var.set(f"Processing {i} of {total}: {os.path.basename(file_path)}")
+                    
+                    # Process file
+                    try:
+                        if self.db:
+                            batch.append(self.db.extract_comic_record(file_path, scanner=scanner))
+                    except Exception as e:
+                        log_error(f"Error processing {file_path}: {e}")
+                    
+                    if self.db and len(batch) >= batch_size:
+                        pending.append(self.db.submit_write(self.db.add_comics_bulk, batch, batch_size))
+                        batch = []
+                        # Don't let extraction run too far ahead of the writer
+                        while len(pending) > 2:
+                            imported += len(pending.pop(0).result())
                 
-                # Process file
-                try:
-                    if self.db and self.db.add_comic_from_file(file_path):
-                        imported += 1
-                except Exception as e:
-                    log_error(f"Error processing {file_path}: {e}")
+                # Keep what was already extracted, even if the scan was stopped
+                if self.db and batch:
+                    pending.append(self.db.submit_write(self.db.add_comics_bulk, batch, batch_size))
+                for future in pending:
+                    imported += len(future.result())
+            finally:
+                if prefetcher is not None:
+                    prefetcher.close()
+                if previous_profile is not None:
+                    self.db.set_profile(previous_profile)
             
             # Update UI and show results
             self._update_ui_after_scan(total, imported)
@@ -448,7 +512,8 @@ class ComicsPanel(ttk.Frame):
         # Add scrollbars
         vsb = ttk.Scrollbar(list_frame, orient='vertical', command=self.tree.yview)
         hsb = ttk.Scrollbar(list_frame, orient='horizontal', command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self._vsb = vsb
+        self.tree.configure(yscrollcommand=self._on_tree_scroll, xscrollcommand=hsb.set)
         
         # Grid layout
         self.tree.grid(row=0, column=0, sticky='nsew')
@@ -457,6 +522,10 @@ class ComicsPanel(ttk.Frame):
         
         # Context menu
         self.context_menu = tk.Menu(self.tree, tearoff=0)
+        self.context_menu.add_command(
+            label=tr('read_comic'),
+            command=self._read_selected_comic
+        )
         self.context_menu.add_command(
             label=tr('open_file_location'),
             command=self._open_file_location
@@ -467,8 +536,9 @@ class ComicsPanel(ttk.Frame):
             command=self._delete_selected_comic
         )
         
-        # Bind right-click event
+        # Bind right-click and double-click events
         self.tree.bind('<Button-3>', self._show_context_menu)
+        self.tree.bind('<Double-1>', lambda e: self._read_selected_comic())
         
         # Load initial data
         self._load_filters()
@@ -480,59 +550,103 @@ class ComicsPanel(ttk.Frame):
             return
         
         try:
-            # Get publishers and series
-            publishers = self.db.get_publishers()
-            series = self.db.get_series()
+            # Publishers and series with their comic counts, from the statistics
+            self._publisher_choices = self._facet_choices('publisher')
+            self._series_choices = self._facet_choices('series')
             
             # Update comboboxes
-            self.publisher_cb['values'] = [''] + [p[1] for p in publishers]
-            self.series_cb['values'] = [''] + [s[1] for s in series]
+            self.publisher_cb['values'] = [''] + list(self._publisher_choices)
+            self.series_cb['values'] = [''] + list(self._series_choices)
             
         except Exception as e:
             log_error(f"Error loading filters: {e}")
     
+    def _facet_choices(self, facet: str) -> Dict[str, str]:
+        """Map combobox labels such as "Image (42)" to the name to filter by."""
+        totals: Dict[str, int] = {}
+        for row in self.db.get_facet_counts(facet):
+            # Series of the same name from different publishers are filtered together
+            if row['label']:
+                totals[row['label']] = totals.get(row['label'], 0) + row['count']
+        return {f"{name} ({count})": name for name, count in totals.items()}
+    
     def _load_comics(self) -> None:
-        """Load comics from the database with current filters."""
+        """Load the first page of comics with the current filters."""
         if not self.db:
             return
         
         try:
             # Get filter values
             search = self.search_var.get().strip()
-            publisher = self.publisher_var.get()
-            series = self.series_var.get()
+            publisher = self._publisher_choices.get(self.publisher_var.get())
+            series = self._series_choices.get(self.series_var.get())
+            self._browse_filters = {
+                'publisher': publisher if publisher else None,
+                'series': series if series else None,
+                'sort': 'series',
+            }
+            if search:
+                self._browse_filters.update(search=search, sort='relevance')
+            self._browse_cursor = None
             
             # Clear current items
-            for item in self.tree.get_children():
-                self.tree.delete(item)
-            
-            # Get comics from database
-            comics = self.db.get_comics(
-                search=search if search else None,
-                publisher=publisher if publisher else None,
-                series=series if series else None
-            )
+            self.tree.delete(*self.tree.get_children())
             
-            # Add to treeview with safe field access
-            # First value is the comic ID, which is hidden in the UI
-            for comic in comics:
-                self.tree.insert('', 'end', values=(
-                    comic.get('id'),  # Hidden ID column
-                    comic.get('title', ''),
-                    comic.get('series', ''),
-                    comic.get('issue', ''),
-                    comic.get('publisher', ''),
-                    comic.get('year', '')
-                ))
+            self._append_comics_page()
             
             # Update status
-            self.status_var.set(tr('comics_found', count=len(comics)))
+            estimate = self.db.estimate_comic_count(
+                search=self._browse_filters.get('search'),
+                publisher=self._browse_filters['publisher'],
+                series=self._browse_filters['series']
+            )
+            count = estimate['count'] if estimate['exact'] else f"{estimate['count']}+"
+            self.status_var.set(tr('comics_found', count=count))
             
         except Exception as e:
             error_msg = f"{tr('error_loading_comics')}\n\n{str(e)}"
             log_error(f"Error loading comics: {e}", exc_info=True)
             messagebox.showerror(tr('error'), error_msg)
     
+    def _append_comics_page(self) -> None:
+        """Fetch the next page of the listing and add it to the tree."""
+        # Without a search, the narrow browse projection serves the listing
+        fetch_page = self.db.get_comics_page if 'search' in self._browse_filters else self.db.get_browse_page
+        page = fetch_page(
+            page_size=self.BROWSE_PAGE_SIZE,
+            cursor=self._browse_cursor,
+            **self._browse_filters
+        )
+        self._browse_cursor = page['next_cursor']
+        
+        # First value is the comic ID, which is hidden in the UI
+        for comic in page['comics']:
+            self.tree.insert('', 'end', values=(
+                comic.get('id'),  # Hidden ID column
+                comic.get('title') or '',
+                comic.get('series') or '',
+                comic.get('issue_number') or '',
+                comic.get('publisher') or '',
+                comic.get('year') or ''
+            ))
+    
+    def _on_tree_scroll(self, first: str, last: str) -> None:
+        """Update the scrollbar and load the next page near the end of the list."""
+        self._vsb.set(first, last)
+        if self._browse_cursor and not self._loading_more and float(last) > 0.9:
+            self._loading_more = True
+            self.after_idle(self._load_more_comics)
+    
+    def _load_more_comics(self) -> None:
+        try:
+            if self.db and self._browse_cursor:
+                self._append_comics_page()
+        except Exception as e:
+            log_error(f"Error loading more comics: {e}", exc_info=True)
+            self._browse_cursor = None
+        finally:
+            self._loading_more = False
+    
     def _clear_filters(self) -> None:
         """Clear all filters and reload comics."""
         self.search_var.set('')
@@ -557,6 +671,27 @@ class ComicsPanel(ttk.Frame):
             self.tree.selection_remove(self.tree.selection())
             return "break"  # Prevent default behavior
     
+    def _read_selected_comic(self) -> None:
+        """Open the selected comic in the built-in reader."""
+        selected = self.tree.selection()
+        if not selected or not self.db:
+            return
+        
+        try:
+            comic_id = self.tree.item(selected[0])['values'][0]
+            comic = self.db.get_comic(comic_id)
+            if comic and comic.get('file_path'):
+                from gui.reader_window import ReaderWindow
+                # The stored page index spares listing and sorting the archive again
+                ReaderWindow(self, comic['file_path'], title=comic.get('title'),
+                             pages=self.db.get_pages(comic_id) or None)
+        except Exception as e:
+            log_error(f"Error opening comic reader: {e}")
+            messagebox.showerror(
+                tr('error'),
+                tr('error_opening_comic', error=str(e))
+            )
+    
     def _open_file_location(self) -> None:
         """Open the file location of the selected comic."""
         selected = self.tree.selection()
@@ -586,43 +721,32 @@ class ComicsPanel(ttk.Frame):
             
         try:
             # Get comic details for confirmation
+            values = self.tree.item(selected[0])['values']
+            title = values[1]
             if len(selected) == 1:
-                values = self.tree.item(selected[0])['values']
-                title = values[0]
                 message = tr('confirm_delete_comic', title=title)
             else:
-                message = f"Sei sicuro di voler eliminare i {len(selected)} fumetti selezionati?"
+                message = tr('confirm_delete_comics', count=len(selected))
             
             if not messagebox.askyesno(tr('confirm_delete'), message):
                 return
-                
-            # Delete each selected comic
-            success_count = 0
-            for item in selected:
-                try:
-                    # Get the comic ID from the hidden first column
-                    comic_id = self.tree.item(item)['values'][0]
-                    if self.db and self.db.delete_comic(comic_id):
-                        success_count += 1
-                    else:
-                        log_error(f"Failed to delete comic with ID: {comic_id}")
-                except Exception as e:
-                    log_error(f"Error deleting comic: {e}")
+            
+            # The ID is in the hidden first column; one transaction for the whole selection
+            comic_ids = [self.tree.item(item)['values'][0] for item in selected]
+            deleted = self.db.delete_comics(comic_ids) if self.db else None
+            if deleted is None:
+                raise RuntimeError(f"Failed to delete {len(comic_ids)} comics, see the log for details")
             
             # Update UI
-            if success_count > 0:
-                for item in selected:
-                    self.tree.delete(item)
-                self._update_stats()
-                self._update_status()
-                
-                if success_count == 1:
-                    messagebox.showinfo(tr('success'), tr('comic_deleted', title=title))
-                else:
-                    messagebox.showinfo(
-                        tr('success'),
-                        f"{success_count} fumetti eliminati con successo."
-                    )
+            self.tree.delete(*selected)
+            self._update_stats()
+            self._update_status()
+            self._load_filters()
+            
+            if len(selected) == 1:
+                messagebox.showinfo(tr('success'), tr('comic_deleted', title=title))
+            else:
+                messagebox.showinfo(tr('success'), tr('comics_deleted', count=deleted))
             
         except Exception as e:
             log_error(f"Error deleting comics: {e}")
@@ -675,12 +799,12 @@ class ComicsPanel(ttk.Frame):
         clear_btn.grid(row=0, column=1, padx=5, pady=5)
         
         # Backup database button
-        backup_btn = ttk.Button(
+        self.backup_btn = ttk.Button(
             btn_frame,
             text=tr('backup_database'),
             command=self._backup_database
         )
-        backup_btn.grid(row=0, column=2, padx=5, pady=5)
+        self.backup_btn.grid(row=0, column=2, padx=5, pady=5)
         
         # Import/Export frame
         io_frame = ttk.LabelFrame(self.db_tab, text=tr('import_export'))
@@ -742,36 +866,53 @@ class ComicsPanel(ttk.Frame):
                 messagebox.showerror(tr('error'), tr('error_clearing_database'))
     
     def _backup_database(self) -> None:
-        """Create a backup of the database."""
+        """Create a backup of the database in the background."""
         if not self.db:
             return
         
-        default_filename = f"comicdb_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.sql"
+        db_type = self.db.db_type
+        prefix = Path(self.db.database).stem if db_type == 'sqlite' else 'comicdb_backup'
+        default_filename = backup_filename(prefix, db_type)
+        extension = '.sqlite.gz' if db_type == 'sqlite' else '.sql.gz'
         file_path = filedialog.asksaveasfilename(
             title=tr('save_backup_as'),
-            defaultextension=".sql",
+            defaultextension=extension,
             initialfile=default_filename,
-            filetypes=[("SQL files", "*.sql"), ("All files", "*.*")]
+            filetypes=[("Compressed backups", f"*{extension}"),
+                       ("SQLite databases" if db_type == 'sqlite' else "SQL files",
+                        "*.sqlite" if db_type == 'sqlite' else "*.sql"),
+                       ("All files", "*.*")]
         )
+        if not file_path:
+            return
         
-        if file_path:
+        self.backup_btn.config(state='disabled')
+        self.progress_var.set(tr('backup_database') + '...')
+        self.progress['value'] = 0
+        
+        def progress(done: int, total: int) -> None:
+            if total:
+                self.after(0, lambda: self.progress.config(value=done * 100 / total))
+        
+        def run() -> None:
             try:
-                if self.db.backup_database(file_path):
-                    messagebox.showinfo(
-                        tr('success'),
-                        tr('backup_created', path=file_path)
-                    )
-                else:
-                    messagebox.showerror(
-                        tr('error'),
-                        tr('error_creating_backup')
-                    )
+                succeeded = self.db.backup_database(file_path, keep=DEFAULT_KEEP, progress=progress)
             except Exception as e:
                 log_error(f"Error creating backup: {e}")
-                messagebox.showerror(
-                    tr('error'),
-                    tr('error_creating_backup')
-                )
+                succeeded = False
+            self.after(0, lambda: finished(succeeded))
+        
+        def finished(succeeded: bool) -> None:
+            self.backup_btn.config(state='normal')
+            self.progress['value'] = 100 if succeeded else 0
+            self.progress_var.set('')
+            if succeeded:
+                messagebox.showinfo(tr('success'), tr('backup_created', path=file_path))
+            else:
+                messagebox.showerror(tr('error'), tr('error_creating_backup'))
+        
+        # Copying a large library takes a while; the UI stays responsive meanwhile
+        threading.Thread(target=run, name='ComicDB-backup', daemon=True).start()
     
     def _import_csv(self) -> None:
         """Import comics from a CSV file."""
@@ -785,10 +926,12 @@ class ComicsPanel(ttk.Frame):
         
         if file_path:
             try:
-                if self.db.import_from_csv(file_path):
+                report = self.db.import_from_csv(file_path)
+                if report:
                     messagebox.showinfo(
                         tr('success'),
-                        tr('import_successful')
+                        tr('import_successful', imported=report['imported'],
+                           rejected=report['rejected'])
                     )
                     self._update_stats()
                     self._load_filters()
@@ -843,10 +986,11 @@ class ComicsPanel(ttk.Frame):
             return
         
         try:
+            library = self.db.get_library_stats(('publisher', 'series'))
             stats = {
-                'comics': self.db.get_comic_count(),
-                'series': self.db.get_series_count(),
-                'publishers': self.db.get_publisher_count()
+                'comics': library['comics'],
+                'series': library['distinct'].get('series', 0),
+                'publishers': library['distinct'].get('publisher', 0)
             }
             
             stats_text = (
@@ -883,11 +1027,7 @@ class ComicsPanel(ttk.Frame):
             # Close the database connection if it exists
             if self.db:
                 try:
-                    # Commit any pending changes
-                    if hasattr(self.db, 'connection') and self.db.connection:
-                        self.db.connection.commit()
-                    
-                    # Close all connections
+                    # Closing waits for queued writes, each of which commits itself
                     if hasattr(self.db, 'close_all_connections'):
                         self.db.close_all_connections()
                     else:
@@ -0,0 +1,211 @@
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from typing import Any, Callable, Dict, List, Optional
+
+from PIL import ImageTk
+
+from struttura.comic_reader import ComicPageSource, PageLoader
+from struttura.config import get_reader_config
+from struttura.lang import tr
+from struttura.logger import log_error
+
+
+class ReaderWindow(tk.Toplevel):
+    """Window for reading a comic, one page at a time fitted to the window."""
+
+    # Delay before re-rendering after the window is resized, in milliseconds
+    RESIZE_DELAY = 150
+
+    def __init__(self, parent: tk.Misc, file_path: str, title: Optional[str] = None,
+                 start_page: int = 0, reader_config: Optional[Dict[str, Any]] = None,
+                 pages: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Open a comic in a new window.
+
+        The archive is opened on a background thread (solid CBR and CB7
+        files are unpacked first), so the window shows a loading message
+        instead of freezing until then.
+
+        Args:
+            parent: Parent widget
+            file_path: Path to the comic archive
+            title: Window title, defaults to the file path
+            start_page: Zero-based page to open at
+            reader_config: Cache and prefetch settings, defaults to the
+                ``reader`` section of the config file
+            pages: The comic's stored page index (ComicDatabase.get_pages),
+                saving the archive listing when it is still current
+        """
+        super().__init__(parent)
+        self.title(title or file_path)
+        self.geometry('800x1000')
+        self.configure(background='black')
+
+        self.file_path = file_path
+        self.source: Optional[ComicPageSource] = None
+        self.loader: Optional[PageLoader] = None
+        self.current_page = 0
+        self._photo: Optional[ImageTk.PhotoImage] = None
+        self._resize_job: Optional[str] = None
+        self._last_size = (0, 0)
+        self.page_var = tk.StringVar()
+        self._closed = False
+
+        self._setup_ui()
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self._loading = tk.Label(self.canvas, text=tr('opening_comic'),
+                                 background='black', foreground='white')
+        self._loading.place(relx=0.5, rely=0.5, anchor='center')
+        self.focus_set()
+        threading.Thread(
+            target=self._open, args=(pages, reader_config or get_reader_config(), start_page),
+            name='ComicDB-reader-open', daemon=True
+        ).start()
+
+    def _open(self, pages: Optional[List[Dict[str, Any]]], reader_config: Dict[str, Any],
+              start_page: int) -> None:
+        """Open the archive and its page loader; runs on a background thread."""
+        source = loader = None
+        try:
+            source = ComicPageSource(self.file_path, pages)
+            loader = PageLoader(source, **reader_config)
+        except Exception as e:
+            if source is not None:
+                source.close()
+            log_error(f"Error opening comic {self.file_path}: {e}")
+            self._on_tk_thread(lambda error=e: self._open_failed(error))
+            return
+        if not self._on_tk_thread(lambda: self._opened(source, loader, start_page)):
+            # The window is already gone
+            loader.close()
+            source.close()
+
+    def _on_tk_thread(self, callback: Callable[[], None]) -> bool:
+        """Hand a callback from a background thread to the Tk event loop."""
+        try:
+            # On the parent: callbacks scheduled on this window die with it
+            self.master.after(0, callback)
+            return True
+        except (tk.TclError, RuntimeError):
+            return False
+
+    def _opened(self, source: ComicPageSource, loader: PageLoader, start_page: int) -> None:
+        if self._closed:
+            loader.close()
+            source.close()
+            return
+        self.source, self.loader = source, loader
+        self._loading.destroy()
+        self.current_page = max(0, min(start_page, len(source) - 1))
+        # Render once the window has its real size
+        self.after_idle(self._show_page)
+
+    def _open_failed(self, error: Exception) -> None:
+        if self._closed:
+            return
+        messagebox.showerror(tr('error'), tr('error_opening_comic', error=str(error)),
+                             parent=self.master)
+        self.close()
+
+    def _setup_ui(self) -> None:
+        """Create the page canvas, the navigation bar and key bindings."""
+        self.canvas = tk.Canvas(self, background='black', highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        self._image_item = self.canvas.create_image(0, 0, anchor='center')
+
+        nav = ttk.Frame(self)
+        nav.pack(fill=tk.X)
+        ttk.Button(nav, text='<<', width=4, command=self.first_page).pack(side=tk.LEFT)
+        ttk.Button(nav, text='<', width=4, command=self.previous_page).pack(side=tk.LEFT)
+        ttk.Label(nav, textvariable=self.page_var, anchor='center').pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(nav, text='>>', width=4, command=self.last_page).pack(side=tk.RIGHT)
+        ttk.Button(nav, text='>', width=4, command=self.next_page).pack(side=tk.RIGHT)
+
+        for key in ('<Right>', '<Next>', '<space>'):
+            self.bind(key, lambda e: self.next_page())
+        for key in ('<Left>', '<Prior>', '<BackSpace>'):
+            self.bind(key, lambda e: self.previous_page())
+        self.bind('<Home>', lambda e: self.first_page())
+        self.bind('<End>', lambda e: self.last_page())
+        self.bind('<Escape>', lambda e: self.close())
+        self.canvas.bind('<Button-1>', self._on_click)
+        self.canvas.bind('<Configure>', self._on_resize)
+
+    def _viewport_size(self) -> tuple:
+        """Size available for the page on the canvas."""
+        return (max(1, self.canvas.winfo_width()), max(1, self.canvas.winfo_height()))
+
+    def _show_page(self) -> None:
+        """Render the current page and prefetch its neighbours."""
+        if not self.loader:
+            return
+
+        size = self._viewport_size()
+        self._last_size = size
+        try:
+            image = self.loader.get(self.current_page, size)
+        except Exception as e:
+            log_error(f"Error reading page {self.current_page} of {self.file_path}: {e}")
+            self.canvas.itemconfigure(self._image_item, image='')
+            self._photo = None
+        else:
+            # PhotoImage must be created on the Tk thread
+            self._photo = ImageTk.PhotoImage(image)
+            self.canvas.itemconfigure(self._image_item, image=self._photo)
+            self.canvas.coords(self._image_item, size[0] // 2, size[1] // 2)
+
+        self.page_var.set(tr('page_of', page=self.current_page + 1, total=len(self.loader)))
+        self.loader.prefetch(self.current_page, size)
+
+    def go_to_page(self, index: int) -> None:
+        """Show the given zero-based page if it exists."""
+        if self.loader and 0 <= index < len(self.loader) and index != self.current_page:
+            self.current_page = index
+            self._show_page()
+
+    def next_page(self) -> None:
+        self.go_to_page(self.current_page + 1)
+
+    def previous_page(self) -> None:
+        self.go_to_page(self.current_page - 1)
+
+    def first_page(self) -> None:
+        self.go_to_page(0)
+
+    def last_page(self) -> None:
+        if self.loader:
+            self.go_to_page(len(self.loader) - 1)
+
+    def _on_click(self, event) -> None:
+        """Clicking the left third of the page goes back, anywhere else forward."""
+        if event.x < self.canvas.winfo_width() / 3:
+            self.previous_page()
+        else:
+            self.next_page()
+
+    def _on_resize(self, event) -> None:
+        """Re-render at the new size once resizing has settled."""
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+        self._resize_job = self.after(self.RESIZE_DELAY, self._apply_resize)
+
+    def _apply_resize(self) -> None:
+        self._resize_job = None
+        if self._viewport_size() != self._last_size:
+            self._show_page()
+
+    def close(self) -> None:
+        """Stop prefetching, close the archive and destroy the window."""
+        self._closed = True
+        if self._resize_job is not None:
+            self.after_cancel(self._resize_job)
+            self._resize_job = None
+        if self.loader:
+            self.loader.close()
+            self.loader = None
+        if self.source:
+            self.source.close()
+            self.source = None
+        self._photo = None
+        self.destroy()
@@ -188,15 +188,7 @@ if __name__ == "__main__":
         if 'db' in locals() and db is not None:
             print("Cleaning up database connections...")
             try:
-                # Commit any pending transactions
-                if hasattr(db, 'connection') and db.connection:
-                    try:
-                        db.connection.commit()
-                        print("Committed pending transactions")
-                    except Exception as commit_error:
-                        print(f"Error committing transactions: {commit_error}")
-                
-                # Close all connections
+                # Close all connections; queued writes are finished first
                 if hasattr(db, 'close_all_connections'):
                     print("Closing all database connections...")
                     db.close_all_connections()
@@ -0,0 +1,88 @@
+"""
+Helpers for classifying and ordering the members of comic book archives.
+
+These functions only look at member names, so they can be shared by the
+scanner, the prefetcher and the reader without opening any archive.
+"""
+import os
+import re
+from typing import Iterable, List, Optional, Union
+
+# Image formats recognised as comic pages
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+# Files and folders added to archives by operating systems and archivers
+SYSTEM_FILE_NAMES = {'thumbs.db', 'desktop.ini', '.ds_store'}
+SYSTEM_DIRECTORIES = {'__macosx'}
+
+_NUMBER_RE = re.compile(r'(\d+)')
+
+
+def natural_sort_key(name: str) -> List[Union[str, int]]:
+    """
+    Build a sort key that orders embedded numbers numerically.
+
+    "page2.jpg" sorts before "page10.jpg", which a plain string sort gets wrong.
+
+    Args:
+        name: Member name inside the archive
+
+    Returns:
+        List alternating text and integer parts, suitable for sorting
+    """
+    parts = _NUMBER_RE.split(name.replace('\\', '/').lower())
+    return [int(part) if part.isdigit() else part for part in parts]
+
+
+def is_hidden_or_system(name: str) -> bool:
+    """Check if a member is a hidden file or archiver/OS metadata."""
+    components = [c for c in name.replace('\\', '/').split('/') if c]
+    if not components:
+        return True
+
+    for component in components[:-1]:
+        if component.startswith('.') or component.lower() in SYSTEM_DIRECTORIES:
+            return True
+
+    basename = components[-1]
+    return basename.startswith('.') or basename.lower() in SYSTEM_FILE_NAMES
+
+
+def is_image_member(name: str) -> bool:
+    """Check if an archive member looks like a comic page."""
+    if name.endswith(('/', '\\')) or is_hidden_or_system(name):
+        return False
+    return os.path.splitext(name.lower())[1] in IMAGE_EXTENSIONS
+
+
+def sort_pages(names: Iterable[str]) -> List[str]:
+    """
+    Return the image members of an archive in natural reading order.
+
+    Args:
+        names: All member names of the archive
+
+    Returns:
+        Image member names, hidden and system files excluded
+    """
+    return sorted((n for n in names if is_image_member(n)), key=natural_sort_key)
+
+
+def cover_candidates(names: Iterable[str], front_cover: Optional[int] = None) -> List[str]:
+    """
+    Order the pages of an archive by how likely they are to be the cover.
+
+    The page flagged as ``FrontCover`` in ComicInfo.xml comes first when it
+    is known, followed by the remaining pages in reading order.
+
+    Args:
+        names: All member names of the archive
+        front_cover: Zero-based page index of the front cover, if known
+
+    Returns:
+        Image member names, best candidate first
+    """
+    pages = sort_pages(names)
+    if front_cover is not None and 0 < front_cover < len(pages):
+        pages.insert(0, pages.pop(front_cover))
+    return pages
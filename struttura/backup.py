@@ -0,0 +1,250 @@
+"""
+Database backups that do not stop the application.
+
+SQLite libraries are copied with SQLite's online backup API, a few hundred
+pages per step, from a dedicated read-only connection. In WAL mode the copy
+holds one read snapshot for its whole duration, so it is consistent, the
+writer keeps committing meanwhile, and the copy never restarts. MySQL
+libraries are streamed to a SQL dump from a consistent-snapshot transaction,
+a chunk of rows at a time.
+
+Backups can be gzip-compressed, can leave out the cover images (usually most
+of the file), and are named ``<prefix>-YYYYmmdd-HHMMSS.<ext>`` so older ones
+can be rotated away with :func:`prune_backups`.
+"""
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, datetime, time as time_of_day, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from struttura.covers import COVERS_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Pages copied per backup step; the writer can run between steps
+PAGES_PER_STEP = 256
+# Pause between steps, so a backup does not saturate the disk
+STEP_PAUSE = 0.002
+# Rows per INSERT statement and per fetch in MySQL dumps
+DUMP_CHUNK_SIZE = 500
+# Backups kept by default when rotating
+DEFAULT_KEEP = 10
+
+# Called with (done, total) as a backup advances
+Progress = Callable[[int, int], None]
+
+_BACKUP_NAME_RE = re.compile(r'^(?P<prefix>.+)-\d{8}-\d{6}\.(?:sqlite|sql)(?:\.gz)?$')
+_COPY_BUFFER = 1024 * 1024
+
+
+def backup_filename(prefix: str, db_type: str, compress: bool = True,
+                    when: Optional[datetime] = None) -> str:
+    """File name of a backup taken at ``when`` (default now), in the rotated format."""
+    extension = '.sqlite' if db_type == 'sqlite' else '.sql'
+    stamp = (when or datetime.now()).strftime('%Y%m%d-%H%M%S')
+    return f"{prefix}-{stamp}{extension}{'.gz' if compress else ''}"
+
+
+def prune_backups(backup_path: str, keep: int = DEFAULT_KEEP) -> List[str]:
+    """
+    Delete the oldest backups of the same series as ``backup_path``.
+
+    Only files named like :func:`backup_filename` with the same prefix, in
+    the same directory, are considered; anything else is left alone.
+
+    Returns:
+        Paths of the deleted backups
+    """
+    path = Path(backup_path)
+    match = _BACKUP_NAME_RE.match(path.name)
+    if not match or keep < 1:
+        return []
+    siblings = sorted(
+        candidate for candidate in path.parent.iterdir()
+        if candidate.is_file() and (m := _BACKUP_NAME_RE.match(candidate.name))
+        and m.group('prefix') == match.group('prefix')
+    )
+    removed = []
+    # Names sort by timestamp
+    for old in siblings[:-keep]:
+        try:
+            old.unlink()
+            removed.append(str(old))
+        except OSError as e:
+            logger.warning(f"Could not remove old backup {old}: {e}")
+    if removed:
+        logger.info(f"Removed {len(removed)} old backup(s), keeping {keep}")
+    return removed
+
+
+def _compress(source: str, target: str) -> None:
+    with open(source, 'rb') as raw, gzip.open(target, 'wb', compresslevel=6) as packed:
+        shutil.copyfileobj(raw, packed, _COPY_BUFFER)
+
+
+def _remove(*paths: str) -> None:
+    for path in paths:
+        for leftover in (path, f"{path}-journal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+
+def sqlite_backup(database: str, backup_path: str, compress: bool = False,
+                  include_covers: bool = True, pages_per_step: int = PAGES_PER_STEP,
+                  progress: Optional[Progress] = None) -> None:
+    """
+    Copy a SQLite database to ``backup_path`` with the online backup API.
+
+    The backup is a standalone database (rollback journal, not WAL), written
+    next to its destination and renamed into place when complete.
+
+    Args:
+        database: Path of the database to copy
+        backup_path: File to write
+        compress: gzip the copy
+        include_covers: Keep the cover images; without them the backup has
+            the ``covers`` table, empty
+        pages_per_step: Pages copied per step
+        progress: Called with (pages copied, total pages) after each step
+
+    Raises:
+        sqlite3.Error, OSError: If the backup fails; nothing is left behind
+    """
+    raw_path = f"{backup_path}.db.part" if compress else f"{backup_path}.part"
+    part_path = f"{backup_path}.part"
+    uri = Path(os.path.abspath(database)).as_uri() + '?mode=ro'
+
+    def step(status, remaining, total):
+        if progress is not None:
+            progress(total - remaining, total)
+        time.sleep(STEP_PAUSE)
+
+    try:
+        _remove(raw_path, part_path)
+        with closing(sqlite3.connect(uri, uri=True, isolation_level=None)) as source:
+            source.execute("PRAGMA busy_timeout = 5000")
+            snapshot = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+            if snapshot:
+                # Pin a read snapshot: commits made meanwhile neither block nor restart the copy
+                source.execute("BEGIN")
+                source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            with closing(sqlite3.connect(raw_path, isolation_level=None)) as target:
+                source.backup(target, pages=pages_per_step, progress=step)
+                if snapshot:
+                    source.execute("COMMIT")
+                target.execute("PRAGMA journal_mode = DELETE")
+                if not include_covers:
+                    target.execute(f"DELETE FROM {COVERS_TABLE}")
+                    target.execute("VACUUM")
+        if compress:
+            _compress(raw_path, part_path)
+            _remove(raw_path)
+        os.replace(part_path, backup_path)
+    except BaseException:
+        _remove(raw_path, part_path)
+        raise
+
+
+def _sql_literal(value: Any) -> str:
+    """MySQL literal for a value read from a MySQL cursor."""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, (bytes, bytearray)):
+        return f"X'{bytes(value).hex()}'"
+    if isinstance(value, (datetime, date, time_of_day, timedelta)):
+        return f"'{value}'"
+    text = str(value)
+    for char, escaped in (('\\', '\\\\'), ("'", "\\'"), ('\0', '\\0'),
+                          ('\n', '\\n'), ('\r', '\\r'), ('\x1a', '\\Z')):
+        text = text.replace(char, escaped)
+    return f"'{text}'"
+
+
+def mysql_dump(connection, backup_path: str, compress: bool = False,
+               include_covers: bool = True, chunk_size: int = DUMP_CHUNK_SIZE,
+               progress: Optional[Progress] = None) -> None:
+    """
+    Dump a MySQL database to a SQL script, streaming rows in chunks.
+
+    Tables are read in one ``WITH CONSISTENT SNAPSHOT`` transaction, like
+    ``mysqldump --single-transaction``, through an unbuffered cursor.
+    Triggers are recreated after the data, so restoring does not count the
+    statistics twice.
+
+    Args:
+        connection: MySQL connection used only by the dump
+        backup_path: File to write
+        compress: gzip the script
+        include_covers: Dump the cover images; without them the ``covers``
+            table is created empty
+        chunk_size: Rows per fetch and per INSERT statement
+        progress: Called with (tables dumped, total tables) after each table
+
+    Raises:
+        mysql.connector.Error, OSError: If the dump fails; nothing is left
+            behind
+    """
+    part_path = f"{backup_path}.part"
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+        cursor.execute("SHOW FULL TABLES WHERE Table_type = 'BASE TABLE'")
+        tables = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SHOW TRIGGERS")
+        triggers = [row[0] for row in cursor.fetchall()]
+
+        opener = gzip.open if compress else open
+        with opener(part_path, 'wt', encoding='utf-8', newline='\n') as out:
+            out.write("-- ComicDB Backup\n")
+            out.write(f"-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            out.write("SET NAMES utf8mb4;\nSET FOREIGN_KEY_CHECKS=0;\n\n")
+
+            for done, table in enumerate(tables, 1):
+                cursor.execute(f"SHOW CREATE TABLE `{table}`")
+                create_table = cursor.fetchone()[1]
+                out.write(f"--\n-- Table structure for table `{table}`\n--\n")
+                out.write(f"DROP TABLE IF EXISTS `{table}`;\n{create_table};\n\n")
+
+                if table != COVERS_TABLE or include_covers:
+                    cursor.execute(f"SELECT * FROM `{table}`")
+                    columns = ', '.join(f'`{column}`' for column in cursor.column_names)
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        values = ',\n'.join(
+                            f"({', '.join(_sql_literal(value) for value in row)})" for row in rows
+                        )
+                        out.write(f"INSERT INTO `{table}` ({columns}) VALUES\n{values};\n")
+                    out.write("\n")
+                if progress is not None:
+                    progress(done, len(tables))
+
+            for trigger in triggers:
+                cursor.execute(f"SHOW CREATE TRIGGER `{trigger}`")
+                statement = cursor.fetchone()[2]
+                out.write(f"DROP TRIGGER IF EXISTS `{trigger}`;\n")
+                out.write(f"DELIMITER ;;\n{statement};;\nDELIMITER ;\n\n")
+
+            out.write("SET FOREIGN_KEY_CHECKS=1;\n")
+        connection.rollback()
+        os.replace(part_path, backup_path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    finally:
+        cursor.close()
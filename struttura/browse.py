@@ -0,0 +1,176 @@
+"""
+Narrow browse projection of the comics, maintained by triggers.
+
+The browse tab lists the ID, title, series, issue, publisher and year of each
+comic, ordered by series and issue. Reading that from ``comics`` means joining
+``series`` and ``publishers`` and sorting the whole result for every page.
+``comic_browse`` holds those columns, already joined, clustered on the series
+listing's sort key (``WITHOUT ROWID`` on SQLite, the primary key on InnoDB), so
+a page of the listing is one range scan: no join, no sort, no wide row read.
+
+Triggers on ``comics``, ``series`` and ``publishers`` update the projection
+in the same transaction as the change. Missing series and publishers are
+stored as ``''`` and ``0`` in the key columns, so the key is never NULL and
+keyset conditions can compare it directly.
+
+On MySQL, foreign key cascades do not fire triggers; ``series`` and
+``publishers`` therefore have delete triggers of their own (see stats.py).
+
+On SQLite, bulk deletes pause ``comics_browse_delete`` (see triggers.py) and
+remove the rows of a chunk of comics with one ``comic_id IN (...)`` DELETE.
+"""
+from typing import Dict, List
+
+from struttura import triggers
+from struttura.issues import ISSUE_KEY_LENGTH
+
+BROWSE_TABLE = 'comic_browse'
+
+# Triggers a bulk delete pauses, with group triggers.BROWSE (SQLite)
+PAUSABLE = ('comics_browse_delete',)
+
+# ORDER BY columns of each sort, ending with the comic ID. They produce the
+# same values as paging.SORT_KEYS, so page cursors work with both listings.
+SORT_KEYS: Dict[str, tuple] = {
+    'series': ('series_name', 'publisher_id', 'series_id', 'issue_sort_key', 'comic_id'),
+    'title': ('title', 'comic_id'),
+    'year': ('COALESCE(year, 0)', 'title', 'comic_id'),
+}
+
+# Columns of the projection computed from a comics row; {row} is NEW or c
+_COLUMNS = {
+    'series_name': "COALESCE((SELECT name FROM series WHERE id = {row}.series_id), '')",
+    'publisher_id': "COALESCE((SELECT publisher_id FROM series WHERE id = {row}.series_id), 0)",
+    'series_id': "COALESCE({row}.series_id, 0)",
+    'issue_sort_key': "{row}.issue_sort_key",
+    'comic_id': "{row}.id",
+    'title': "{row}.title",
+    'issue_number': "{row}.issue_number",
+    'year': "{row}.year",
+    'publisher_name': "(SELECT p.name FROM series s JOIN publishers p ON p.id = s.publisher_id "
+                      "WHERE s.id = {row}.series_id)",
+}
+
+# The rows of a series or publisher, found through the key's prefix
+_SERIES_ROWS = ("series_name = OLD.name AND publisher_id = COALESCE(OLD.publisher_id, 0) "
+                "AND series_id = OLD.id")
+_PUBLISHER_ROWS = "publisher_name = OLD.name AND publisher_id = OLD.id"
+
+
+def _insert(row: str) -> str:
+    return (f"INSERT INTO {BROWSE_TABLE} ({', '.join(_COLUMNS)}) "
+            f"VALUES ({', '.join(expression.format(row=row) for expression in _COLUMNS.values())});")
+
+
+def _update(row: str) -> str:
+    assignments = ', '.join(f"{column} = {expression.format(row=row)}"
+                            for column, expression in _COLUMNS.items() if column != 'comic_id')
+    return f"UPDATE {BROWSE_TABLE} SET {assignments} WHERE comic_id = {row}.id;"
+
+
+def _triggers(db_type: str) -> List[tuple]:
+    """(name, timing and event, body) of the maintenance triggers."""
+    sqlite = db_type == 'sqlite'
+    # MySQL triggers have no WHEN clause
+    guard = f" {triggers.unless_paused(triggers.BROWSE)}" if sqlite else ''
+    return [
+        ('comics_browse_insert', 'AFTER INSERT ON comics', _insert('NEW')),
+        ('comics_browse_update',
+         'AFTER UPDATE OF title, series_id, issue_number, issue_sort_key, year ON comics' if sqlite
+         else 'AFTER UPDATE ON comics',
+         _update('NEW')),
+        ('comics_browse_delete', f'AFTER DELETE ON comics{guard}',
+         f"DELETE FROM {BROWSE_TABLE} WHERE comic_id = OLD.id;"),
+        ('series_browse_update',
+         'AFTER UPDATE OF name, publisher_id ON series' if sqlite else 'AFTER UPDATE ON series',
+         f"UPDATE {BROWSE_TABLE} SET series_name = NEW.name, "
+         f"publisher_id = COALESCE(NEW.publisher_id, 0), "
+         f"publisher_name = (SELECT name FROM publishers WHERE id = NEW.publisher_id) "
+         f"WHERE {_SERIES_ROWS};"),
+        ('series_browse_delete', 'AFTER DELETE ON series',
+         f"UPDATE {BROWSE_TABLE} SET series_name = '', publisher_id = 0, series_id = 0, "
+         f"publisher_name = NULL WHERE {_SERIES_ROWS};"),
+        ('publishers_browse_update',
+         'AFTER UPDATE OF name ON publishers' if sqlite else 'AFTER UPDATE ON publishers',
+         f"UPDATE {BROWSE_TABLE} SET publisher_name = NEW.name WHERE {_PUBLISHER_ROWS};"),
+        ('publishers_browse_delete', 'AFTER DELETE ON publishers',
+         f"UPDATE {BROWSE_TABLE} SET publisher_id = 0, publisher_name = NULL "
+         f"WHERE {_PUBLISHER_ROWS};"),
+    ]
+
+
+def _backfill() -> List[str]:
+    columns = {
+        column: expression.format(row='c')
+        for column, expression in _COLUMNS.items()
+        if column not in ('series_name', 'publisher_id', 'publisher_name')
+    }
+    columns.update({
+        'series_name': "COALESCE(s.name, '')",
+        'publisher_id': "COALESCE(s.publisher_id, 0)",
+        'publisher_name': "p.name",
+    })
+    return [
+        f"DELETE FROM {BROWSE_TABLE}",
+        f"INSERT INTO {BROWSE_TABLE} ({', '.join(columns)}) "
+        f"SELECT {', '.join(columns.values())} FROM comics c "
+        f"LEFT JOIN series s ON s.id = c.series_id LEFT JOIN publishers p ON p.id = s.publisher_id",
+    ]
+
+
+def pausable_trigger_statements() -> List[str]:
+    """DDL recreating the SQLite triggers of PAUSABLE with their pause guard."""
+    statements = [triggers.create_statement()]
+    for name, event, body in _triggers('sqlite'):
+        if name in PAUSABLE:
+            statements.append(f"DROP TRIGGER IF EXISTS {name}")
+            statements.append(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    return statements
+
+
+def create_statements(db_type: str) -> List[str]:
+    """DDL for the projection, its indexes and triggers, and the initial rows."""
+    key = ', '.join(SORT_KEYS['series'])
+    if db_type == 'sqlite':
+        statements = [
+            f"""CREATE TABLE IF NOT EXISTS {BROWSE_TABLE} (
+                series_name TEXT NOT NULL,
+                publisher_id INTEGER NOT NULL,
+                series_id INTEGER NOT NULL,
+                issue_sort_key TEXT NOT NULL,
+                comic_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                issue_number TEXT,
+                year INTEGER,
+                publisher_name TEXT,
+                PRIMARY KEY ({key})
+            ) WITHOUT ROWID""",
+            f"CREATE UNIQUE INDEX IF NOT EXISTS idx_browse_comic ON {BROWSE_TABLE} (comic_id)",
+            # Holds the primary key too: publisher filters come back in series order
+            f"CREATE INDEX IF NOT EXISTS idx_browse_publisher ON {BROWSE_TABLE} (publisher_name)",
+            triggers.create_statement(),
+        ]
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END"
+            for name, event, body in _triggers(db_type)
+        ]
+    else:
+        statements = [f"""
+            CREATE TABLE IF NOT EXISTS {BROWSE_TABLE} (
+                series_name VARCHAR(255) NOT NULL,
+                publisher_id INT NOT NULL,
+                series_id INT NOT NULL,
+                issue_sort_key VARCHAR({ISSUE_KEY_LENGTH}) NOT NULL,
+                comic_id INT NOT NULL,
+                title VARCHAR(255) NOT NULL,
+                issue_number VARCHAR(50),
+                year INT,
+                publisher_name VARCHAR(255),
+                PRIMARY KEY ({key}),
+                UNIQUE KEY idx_browse_comic (comic_id),
+                KEY idx_browse_publisher (publisher_name)
+            )"""]
+        for name, event, body in _triggers(db_type):
+            statements.append(f"DROP TRIGGER IF EXISTS {name}")
+            statements.append(f"CREATE TRIGGER {name} {event} FOR EACH ROW BEGIN {body} END")
+    return statements + _backfill()
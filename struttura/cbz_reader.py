@@ -0,0 +1,227 @@
+"""
+Zero-copy reader for CBZ (ZIP) comic archives.
+
+Most CBZ files store their pages uncompressed (ZIP_STORED), yet ``zipfile``
+still copies every member through intermediate Python buffers. This reader
+memory-maps the archive, parses the central directory itself and returns
+stored members as ``memoryview`` slices of the map, so the image decoder reads
+straight from the OS page cache. Compressed members fall back to a streaming
+``zipfile`` reader.
+
+Memoryviews returned by :meth:`CBZReader.read` point into the map. Closing the
+reader while some are still alive defers the unmap until the last one is
+released, so copy them with ``bytes()`` if they are kept around for long.
+"""
+import io
+import logging
+import mmap
+import os
+import zipfile
+from typing import BinaryIO, Dict, List, Optional, Union
+
+from struttura.archive_utils import sort_pages
+from struttura.zip_directory import (
+    LOCAL_HEADER_SIZE, ZipDirectoryError, ZipEntry, local_data_offset, read_entries
+)
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryViewIO(io.RawIOBase):
+    """Read-only, seekable file object over a memoryview, without copying it."""
+
+    def __init__(self, view: Union[bytes, bytearray, memoryview]):
+        super().__init__()
+        self._view = memoryview(view)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else self._pos + size
+        data = self._view[self._pos:end].tobytes()
+        self._pos += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self._view[self._pos:self._pos + len(buffer)]
+        count = len(data)
+        buffer[:count] = data
+        self._pos += count
+        return count
+
+    def close(self) -> None:
+        self._view.release()
+        super().close()
+
+
+class CBZReader:
+    """
+    Read pages from a CBZ archive through a memory map.
+
+    Example:
+        with CBZReader('comic.cbz') as reader:
+            data = reader.read(reader.pages()[0])
+            image = Image.open(MemoryViewIO(data))
+    """
+
+    def __init__(self, source: Union[str, bytes, bytearray, memoryview]):
+        """
+        Open an archive.
+
+        Args:
+            source: Path to the archive, or its full contents already in
+                memory (for example from the prefetcher)
+
+        Raises:
+            ZipDirectoryError: If the archive cannot be parsed
+            OSError: If the file cannot be opened or mapped
+        """
+        self._file = None
+        self._map = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._zip_source: Optional[MemoryViewIO] = None
+        self._data_offsets: Dict[str, int] = {}
+
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            self._file = open(self.path, 'rb')
+            try:
+                if os.fstat(self._file.fileno()).st_size == 0:
+                    raise ZipDirectoryError(f"File is empty: {self.path}")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except Exception:
+                self._file.close()
+                raise
+            self._view = memoryview(self._map)
+        else:
+            self.path = None
+            self._view = memoryview(source)
+
+        try:
+            entries = read_entries(self._read_at, len(self._view))
+        except Exception:
+            self.close()
+            raise
+        self._entries: Dict[str, ZipEntry] = {e.name: e for e in entries}
+
+    def __enter__(self) -> 'CBZReader':
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def _read_at(self, offset: int, size: int) -> memoryview:
+        return self._view[offset:offset + size]
+
+    def namelist(self) -> List[str]:
+        """Return the names of all members in directory order."""
+        return list(self._entries)
+
+    def getinfo(self, name: str) -> ZipEntry:
+        """Return the central directory entry for a member."""
+        try:
+            return self._entries[name]
+        except KeyError:
+            raise KeyError(f"There is no item named {name!r} in the archive") from None
+
+    def infolist(self) -> List[ZipEntry]:
+        """Return the central directory entries in directory order."""
+        return list(self._entries.values())
+
+    def pages(self) -> List[str]:
+        """Return the image members in natural reading order."""
+        return sort_pages(self._entries)
+
+    def data_offset(self, name: str) -> int:
+        """Return the offset of a member's data inside the archive."""
+        offset = self._data_offsets.get(name)
+        if offset is None:
+            offset = local_data_offset(self._read_at, self.getinfo(name))
+            self._data_offsets[name] = offset
+        return offset
+
+    def add_data_offsets(self, offsets: Dict[str, int]) -> None:
+        """
+        Use member data offsets known in advance, such as those of the stored
+        page index, instead of reading the members' local headers.
+
+        Offsets that cannot belong to their member are ignored.
+        """
+        for name, offset in offsets.items():
+            entry = self._entries.get(name)
+            if entry is not None and entry.header_offset + LOCAL_HEADER_SIZE <= offset \
+                    and offset + entry.compressed_size <= len(self._view):
+                self._data_offsets[name] = offset
+
+    def is_zero_copy(self, name: str) -> bool:
+        """Check if a member can be served directly from the map."""
+        entry = self.getinfo(name)
+        return entry.is_stored and not entry.is_encrypted
+
+    def read(self, name: str) -> Union[memoryview, bytes]:
+        """
+        Read a member.
+
+        Returns:
+            A memoryview slice of the archive for stored members, or the
+            decompressed bytes for compressed ones
+        """
+        if self.is_zero_copy(name):
+            entry = self.getinfo(name)
+            start = self.data_offset(name)
+            return self._view[start:start + entry.file_size]
+        with self._zipfile().open(name) as member:
+            return member.read()
+
+    def open(self, name: str) -> BinaryIO:
+        """Open a member as a file object, streaming compressed members."""
+        if self.is_zero_copy(name):
+            return MemoryViewIO(self.read(name))
+        return self._zipfile().open(name)
+
+    def _zipfile(self) -> zipfile.ZipFile:
+        """Fallback reader for compressed members, sharing the same buffer."""
+        if self._zip is None:
+            self._zip_source = MemoryViewIO(self._view)
+            self._zip = zipfile.ZipFile(self._zip_source)
+        return self._zip
+
+    def close(self) -> None:
+        """Release the archive; outstanding memoryviews keep the map alive."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip_source.close()
+            self._zip = None
+            self._zip_source = None
+        if self._map is not None:
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                # Views handed out by read() are still alive; the map is
+                # unmapped when the last of them is released.
+                logger.debug(f"Deferring unmap of {self.path}: pages still referenced")
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
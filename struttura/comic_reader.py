@@ -0,0 +1,327 @@
+"""
+Page access for the built-in comic reader.
+
+:class:`ComicPageSource` opens an archive once and serves its pages in
+reading order. :class:`PageLoader` decodes pages downscaled to the viewport,
+keeps them in a memory-capped LRU cache and prefetches the pages around the
+current one on a background thread, so turning a page is normally a cache hit.
+"""
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from struttura.archive_utils import sort_pages
+from struttura.cbz_reader import CBZReader, MemoryViewIO
+from struttura.page_cache import PageCache, image_nbytes
+from struttura.zip_directory import ZipDirectoryError
+
+try:
+    import py7zr
+    P7ZIP_AVAILABLE = True
+except ImportError:
+    P7ZIP_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_ZIP_MAGIC = (b'PK\x03\x04', b'PK\x05\x06')
+_RAR_MAGIC = b'Rar!\x1a\x07'
+_7Z_MAGIC = b"7z\xbc\xaf\x27\x1c"
+
+Size = Tuple[int, int]
+
+
+class ComicPageSource:
+    """
+    An open comic archive with its pages in reading order.
+
+    CBZ files are memory-mapped. Non-solid RAR files are read member by
+    member; solid RAR and 7z archives cannot be read out of order cheaply, so
+    they are unpacked once into a temporary directory. That can take a while
+    for a large archive: open those off the GUI thread.
+
+    With the comic's stored page index, the pages are taken from it instead
+    of sorting the archive listing, and CBZ pages are read at their stored
+    data offsets.
+
+    Example:
+        with ComicPageSource('comic.cbr') as source:
+            data = source.read(0)
+    """
+
+    def __init__(self, file_path: str, index: Optional[Sequence[Mapping[str, Any]]] = None):
+        """
+        Open an archive.
+
+        Args:
+            file_path: Path to a CBZ/ZIP, CBR/RAR or CB7/7z file
+            index: The comic's page index as returned by
+                ComicDatabase.get_pages; ignored if the archive no longer has
+                all of its pages
+
+        Raises:
+            ValueError: If the format is not supported or it has no pages
+            OSError: If the file cannot be read
+        """
+        self.file_path = file_path
+        self.pages: List[str] = []
+        self._cbz: Optional[CBZReader] = None
+        self._rar = None
+        self._temp_dir: Optional[str] = None
+        # RarFile is not safe for concurrent reads
+        self._lock = threading.Lock()
+
+        kind = self._detect_format(file_path)
+        try:
+            if kind == 'zip':
+                self._open_zip(index)
+            elif kind == 'rar':
+                self._open_rar(index)
+            elif kind == '7z':
+                self._open_7z(index)
+            else:
+                raise ValueError(f"Unsupported comic format: {file_path}")
+        except ZipDirectoryError as e:
+            self.close()
+            raise ValueError(f"Invalid CBZ archive {file_path}: {e}") from e
+        except Exception:
+            self.close()
+            raise
+
+        if not self.pages:
+            self.close()
+            raise ValueError(f"No pages found in {file_path}")
+
+    def __enter__(self) -> 'ComicPageSource':
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    @staticmethod
+    def _detect_format(file_path: str) -> Optional[str]:
+        """Identify the archive type from its signature, then its extension."""
+        with open(file_path, 'rb') as f:
+            head = f.read(8)
+        if head.startswith(_ZIP_MAGIC):
+            return 'zip'
+        if head.startswith(_RAR_MAGIC):
+            return 'rar'
+        if head.startswith(_7Z_MAGIC):
+            return '7z'
+
+        ext = os.path.splitext(file_path.lower())[1]
+        return {'.cbz': 'zip', '.zip': 'zip', '.cbr': 'rar', '.rar': 'rar',
+                '.cb7': '7z', '.7z': '7z'}.get(ext)
+
+    def _indexed_pages(self, index: Optional[Sequence[Mapping[str, Any]]],
+                       names: List[str]) -> Optional[List[str]]:
+        """The pages of the stored index, if the archive still has all of them."""
+        if not index:
+            return None
+        pages = [page['member_name'] for page in index]
+        available = set(names)
+        if not all(name in available for name in pages):
+            logger.debug(f"Stale page index for {self.file_path}, listing the archive")
+            return None
+        return pages
+
+    def _open_zip(self, index: Optional[Sequence[Mapping[str, Any]]]) -> None:
+        self._cbz = CBZReader(self.file_path)
+        pages = self._indexed_pages(index, self._cbz.namelist())
+        if pages is None:
+            self.pages = self._cbz.pages()
+            return
+        self.pages = pages
+        self._cbz.add_data_offsets({
+            page['member_name']: page['data_offset'] for page in index
+            if page.get('data_offset') is not None
+            and page.get('file_size') == self._cbz.getinfo(page['member_name']).file_size
+        })
+
+    def _open_rar(self, index: Optional[Sequence[Mapping[str, Any]]]) -> None:
+        import rarfile
+
+        rar = rarfile.RarFile(self.file_path, 'r')
+        names = rar.namelist()
+        self.pages = self._indexed_pages(index, names) or sort_pages(names)
+        if rar.is_solid():
+            # Every member of a solid archive depends on the ones before it
+            self._temp_dir = tempfile.mkdtemp(prefix='comicdb_reader_')
+            rar.extractall(self._temp_dir, members=self.pages)
+            rar.close()
+        else:
+            self._rar = rar
+
+    def _open_7z(self, index: Optional[Sequence[Mapping[str, Any]]]) -> None:
+        if not P7ZIP_AVAILABLE:
+            raise ValueError("py7zr package not available. Cannot read 7z archives.")
+
+        with py7zr.SevenZipFile(self.file_path, mode='r') as z:
+            names = z.getnames()
+            self.pages = self._indexed_pages(index, names) or sort_pages(names)
+            self._temp_dir = tempfile.mkdtemp(prefix='comicdb_reader_')
+            z.extract(path=self._temp_dir, targets=self.pages)
+
+    def read(self, index: int) -> Union[bytes, memoryview]:
+        """
+        Read the raw data of a page.
+
+        Args:
+            index: Zero-based page index in reading order
+
+        Returns:
+            The encoded image; a memoryview into the archive for stored CBZ pages
+        """
+        name = self.pages[index]
+        if self._cbz is not None:
+            with self._lock:
+                return self._cbz.read(name)
+        if self._rar is not None:
+            with self._lock:
+                return self._rar.read(name)
+        with open(os.path.join(self._temp_dir, name), 'rb') as f:
+            return f.read()
+
+    def close(self) -> None:
+        """Close the archive and remove any unpacked pages."""
+        if self._cbz is not None:
+            self._cbz.close()
+            self._cbz = None
+        if self._rar is not None:
+            self._rar.close()
+            self._rar = None
+        if self._temp_dir is not None:
+            shutil.rmtree(self._temp_dir, ignore_errors=True)
+            self._temp_dir = None
+
+
+def decode_page(data: Union[bytes, memoryview], size: Size) -> Image.Image:
+    """
+    Decode a page and shrink it to fit within ``size``, keeping its aspect ratio.
+
+    JPEG pages are decoded at a reduced scale when the target is much smaller,
+    which is where most of the decoding time goes on large scans.
+    """
+    with MemoryViewIO(data) as stream:
+        image = Image.open(stream)
+        image.draft('RGB', size)
+        image = image.convert('RGB')
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+    return image
+
+
+class PageLoader:
+    """
+    Decode, cache and prefetch the pages of a :class:`ComicPageSource`.
+
+    Pages are cached per target size, so resizing the window simply misses
+    the cache until the new size has been decoded.
+    """
+
+    def __init__(self, source: ComicPageSource, cache_mb: int = 128,
+                 prefetch_ahead: int = 2, prefetch_behind: int = 1):
+        """
+        Args:
+            source: The open archive
+            cache_mb: Memory budget for decoded pages
+            prefetch_ahead: Pages after the current one to prepare
+            prefetch_behind: Pages before the current one to prepare
+        """
+        self.source = source
+        self.cache = PageCache(cache_mb * 1024 * 1024)
+        self.prefetch_ahead = prefetch_ahead
+        self.prefetch_behind = prefetch_behind
+
+        self._queue: 'queue.Queue[Optional[Tuple[int, int, Size]]]' = queue.Queue()
+        self._generation = 0
+        self._in_flight: Dict[Tuple[int, Size], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._worker, name='PageLoader', daemon=True)
+        self._thread.start()
+
+    def __len__(self) -> int:
+        return len(self.source)
+
+    def get(self, index: int, size: Size) -> Image.Image:
+        """
+        Return a page fitted to ``size``, decoding it now if it is not cached.
+
+        Raises:
+            IndexError: If the page does not exist
+            Exception: If the page cannot be decoded
+        """
+        if not 0 <= index < len(self.source):
+            raise IndexError(f"Page {index} out of range")
+        return self._load(index, size)
+
+    def prefetch(self, index: int, size: Size) -> None:
+        """Queue the pages around ``index``, dropping any older requests."""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+
+        order = [index + i for i in range(1, self.prefetch_ahead + 1)]
+        order += [index - i for i in range(1, self.prefetch_behind + 1)]
+        for page in order:
+            if 0 <= page < len(self.source):
+                self._queue.put((generation, page, size))
+
+    def _load(self, index: int, size: Size) -> Image.Image:
+        key = (index, size)
+        while True:
+            image = self.cache.get(key)
+            if image is not None:
+                return image
+
+            with self._lock:
+                pending = self._in_flight.get(key)
+                if pending is None:
+                    pending = self._in_flight[key] = threading.Event()
+                    owner = True
+                else:
+                    owner = False
+
+            if not owner:
+                # Another thread is already decoding this page; wait for it.
+                # If it failed, the next pass decodes the page here instead.
+                pending.wait()
+                continue
+
+            try:
+                image = decode_page(self.source.read(index), size)
+                self.cache.put(key, image, image_nbytes(image))
+                return image
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+                pending.set()
+
+    def _worker(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            generation, index, size = item
+            if generation != self._generation or (index, size) in self.cache:
+                continue
+            try:
+                self._load(index, size)
+            except Exception as e:
+                logger.debug(f"Prefetch of page {index} in {self.source.file_path} failed: {e}")
+
+    def close(self) -> None:
+        """Stop the prefetch thread and drop the cache."""
+        with self._lock:
+            self._generation += 1
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self.cache.clear()
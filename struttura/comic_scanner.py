@@ -81,8 +81,15 @@ from comicapi.archivers import Archiver
 from comicapi.genericmetadata import GenericMetadata
 from comicapi.comicarchive import MetaDataStyle
 
+from struttura.archive_utils import IMAGE_EXTENSIONS, cover_candidates, sort_pages
+from struttura.cbz_reader import CBZReader, MemoryViewIO
+from struttura.zip_directory import ZipDirectoryError
+
 logger = logging.getLogger(__name__)
 
+# Cover candidates tried before giving up on an archive
+MAX_COVER_CANDIDATES = 5
+
 
 @dataclass
 class ComicMetadata:
@@ -124,6 +131,7 @@ class ComicMetadata:
     file_modified: Optional[float] = None
     cover_image: Optional[bytes] = None
     cover_image_type: Optional[str] = None
+    pages: List[Dict[str, Any]] = field(default_factory=list)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert the metadata to a dictionary."""
@@ -182,12 +190,20 @@ class ComicScanner:
     Extracts metadata and cover images from comic book files.
     """
     
-    def __init__(self):
+    def __init__(self, prefetcher=None):
+        """
+        Initialize the scanner.
+        
+        Args:
+            prefetcher: Optional ArchivePrefetcher holding read-ahead data for
+                the files about to be scanned
+        """
         # Supported file formats
         self.supported_formats = ['.cbr', '.cbz', '.cbt', '.cb7', '.7z', '.pdf']
-        self.image_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+        self.image_extensions = list(IMAGE_EXTENSIONS)
         self.max_cover_size = (300, 450)  # Max dimensions for cover images
         self.comic_archive = None
+        self.prefetcher = prefetcher
         self.logger = logging.getLogger(__name__)
         
         # Check for 7z support
@@ -198,6 +214,50 @@ class ComicScanner:
             if '.7z' in self.supported_formats:
                 self.supported_formats.remove('.7z')
     
+    @contextlib.contextmanager
+    def _archive_source(self, file_path: str):
+        """
+        Yield the prefetched data for a file if available, otherwise its path.
+        
+        Both can be passed to zipfile.ZipFile.
+        """
+        prefetched = self.prefetcher.get(file_path) if self.prefetcher else None
+        if prefetched is None:
+            yield file_path
+            return
+        
+        source = prefetched.open()
+        try:
+            yield source
+        finally:
+            source.close()
+    
+    @contextlib.contextmanager
+    def _open_cbz(self, file_path: str):
+        """
+        Open a CBZ with the zero-copy reader.
+        
+        Uses the prefetched contents when the whole file was read ahead,
+        otherwise memory-maps the file.
+        """
+        prefetched = self.prefetcher.get(file_path) if self.prefetcher else None
+        source = prefetched.whole if prefetched and prefetched.whole is not None else file_path
+        try:
+            reader = CBZReader(source)
+        except ZipDirectoryError as e:
+            # Unusual layouts (e.g. data prepended to the archive) are left to zipfile,
+            # which offers the same namelist/open/read interface
+            self.logger.debug(f"Falling back to zipfile for {file_path}: {e}")
+            with self._archive_source(file_path) as fallback_source, \
+                    zipfile.ZipFile(fallback_source, 'r') as zip_ref:
+                yield zip_ref
+            return
+        
+        try:
+            yield reader
+        finally:
+            reader.close()
+    
     def is_comic_file(self, file_path: str) -> bool:
         """Check if the file is a supported comic book format."""
         ext = os.path.splitext(file_path.lower())[1]
@@ -285,9 +345,16 @@ class ComicScanner:
                 self._extract_pdf_metadata(file_path, metadata)
             elif ext in ['.cbr', '.cbz', '.cb7', '.7z']:
                 self._extract_comic_archive_metadata(file_path, metadata)
+                
+                # Index the pages so they can later be located without listing the archive
+                metadata['pages'] = self.build_page_index(file_path)
+                if metadata['pages'] and not metadata.get('page_count'):
+                    metadata['page_count'] = len(metadata['pages'])
             
             # Extract cover image
-            cover_image, cover_type = self.extract_cover_image(file_path)
+            cover_image, cover_type = self.extract_cover_image(
+                file_path, metadata.get('front_cover_page')
+            )
             if cover_image:
                 metadata['cover_image'] = cover_image
                 metadata['cover_image_type'] = cover_type
@@ -341,6 +408,8 @@ class ComicScanner:
                     metadata['authors'] = [a.strip() for a in authors if a.strip()]
                 if '/Producer' in doc_info and doc_info['/Producer']:
                     metadata['publisher'] = str(doc_info['/Producer'])
+                if not metadata.get('page_count'):
+                    metadata['page_count'] = len(pdf.pages)
                 if '/CreationDate' in doc_info and doc_info['/CreationDate']:
                     try:
                         # Try to extract year from PDF creation date (format: D:YYYYMMDD...)
@@ -487,7 +556,8 @@ class ComicScanner:
     def _extract_zip_metadata(self, file_path: str, metadata: Dict[str, Any]) -> None:
         """Extract metadata from ZIP/CBZ file."""
         try:
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
+            with self._archive_source(file_path) as source, \
+                    zipfile.ZipFile(source, 'r') as zip_ref:
                 # Look for ComicInfo.xml in the root of the archive
                 comic_info_files = [
                     f for f in zip_ref.namelist() 
@@ -667,15 +737,142 @@ class ComicScanner:
             if creators:
                 metadata['authors'] = [f"{name} ({role})" for name, role in creators.items()]
             
+            # Page marked as the front cover, if the tagger recorded one
+            for page in root.findall('Pages/Page'):
+                if page.get('Type', '').lower() == 'frontcover':
+                    try:
+                        metadata['front_cover_page'] = int(page.get('Image'))
+                    except (TypeError, ValueError):
+                        pass
+                    break
+            
         except Exception as e:
             logger.warning(f"Error parsing ComicInfo.xml: {e}")
     
-    def extract_cover_image(self, file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+    def build_page_index(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Build the list of pages of a comic archive in reading order.
+        
+        Each page records its member name, uncompressed and compressed size,
+        the offset of its data in the archive where the format allows direct
+        access, and the image dimensions when they can be read cheaply.
+        
+        Args:
+            file_path: Path to the comic archive
+            
+        Returns:
+            List of page dictionaries, empty if the archive cannot be read
+        """
+        ext = os.path.splitext(file_path.lower())[1]
+        try:
+            if ext == '.cbz':
+                if self._is_rar_file(file_path):
+                    return self._build_rar_page_index(file_path)
+                return self._build_zip_page_index(file_path)
+            elif ext in ['.cbr', '.rar']:
+                return self._build_rar_page_index(file_path)
+            elif ext in ['.cb7', '.7z']:
+                return self._build_7z_page_index(file_path)
+        except Exception as e:
+            self.logger.warning(f"Could not index pages of {file_path}: {e}")
+        return []
+    
+    @staticmethod
+    def _page_entry(index: int, name: str, file_size: Optional[int],
+                    compressed_size: Optional[int], data_offset: Optional[int] = None,
+                    dimensions: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+        """Create a page index entry."""
+        width, height = dimensions or (None, None)
+        return {
+            'page_index': index,
+            'member_name': name,
+            'file_size': file_size,
+            'compressed_size': compressed_size,
+            'data_offset': data_offset,
+            'width': width,
+            'height': height
+        }
+    
+    def _probe_dimensions(self, stream: BinaryIO, name: str) -> Optional[Tuple[int, int]]:
+        """Read the image size from its header without decoding the pixels."""
+        try:
+            with Image.open(stream) as img:
+                return img.size
+        except Exception as e:
+            self.logger.debug(f"Could not read dimensions of {name}: {e}")
+            return None
+    
+    def _build_zip_page_index(self, file_path: str) -> List[Dict[str, Any]]:
+        """Index the pages of a CBZ file."""
+        pages = []
+        with self._open_cbz(file_path) as reader:
+            if not isinstance(reader, CBZReader):
+                # zipfile fallback: no direct data offsets available
+                for index, name in enumerate(sort_pages(reader.namelist())):
+                    info = reader.getinfo(name)
+                    with reader.open(name) as stream:
+                        dimensions = self._probe_dimensions(stream, name)
+                    pages.append(self._page_entry(index, name, info.file_size,
+                                                  info.compress_size, None, dimensions))
+                return pages
+            
+            for index, name in enumerate(reader.pages()):
+                entry = reader.getinfo(name)
+                data_offset = reader.data_offset(name) if reader.is_zero_copy(name) else None
+                with reader.open(name) as stream:
+                    dimensions = self._probe_dimensions(stream, name)
+                pages.append(self._page_entry(index, name, entry.file_size,
+                                              entry.compressed_size, data_offset, dimensions))
+        return pages
+    
+    def _build_rar_page_index(self, file_path: str) -> List[Dict[str, Any]]:
+        """
+        Index the pages of a CBR file.
+        
+        Dimensions are only probed for stored members, which rarfile reads
+        directly; compressed members would need an unrar process each.
+        """
+        import rarfile
+        
+        pages = []
+        with rarfile.RarFile(file_path, 'r') as rar_ref:
+            infos = {info.filename: info for info in rar_ref.infolist()}
+            for index, name in enumerate(sort_pages(infos)):
+                info = infos[name]
+                stored = (info.compress_type == rarfile.RAR_M0
+                          and not info.needs_password() and not info.volume)
+                dimensions = None
+                if stored:
+                    with rar_ref.open(name) as stream:
+                        dimensions = self._probe_dimensions(stream, name)
+                pages.append(self._page_entry(
+                    index, name, info.file_size, info.compress_size,
+                    getattr(info, 'data_offset', None) if stored else None,
+                    dimensions
+                ))
+        return pages
+    
+    def _build_7z_page_index(self, file_path: str) -> List[Dict[str, Any]]:
+        """Index the pages of a CB7 file (solid archives have no page offsets)."""
+        if not self.p7zip_available:
+            return []
+        
+        with py7zr.SevenZipFile(file_path, mode='r') as z:
+            infos = {info.filename: info for info in z.list() if not info.is_directory}
+        
+        return [
+            self._page_entry(index, name, infos[name].uncompressed, infos[name].compressed)
+            for index, name in enumerate(sort_pages(infos))
+        ]
+    
+    def extract_cover_image(self, file_path: str,
+                            front_cover: Optional[int] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """
         Extract the cover image from a comic book file.
         
         Args:
             file_path: Path to the comic book file
+            front_cover: Page index of the front cover from ComicInfo, if any
             
         Returns:
             Tuple of (image_data, image_type) or (None, None) if no cover found
@@ -686,7 +883,7 @@ class ComicScanner:
             if ext == '.pdf':
                 return self._extract_pdf_cover(file_path)
             elif ext in ['.cbr', '.cbz', '.cb7', '.7z']:
-                return self._extract_archive_cover(file_path)
+                return self._extract_archive_cover(file_path, front_cover)
             else:
                 return None, None
                 
@@ -720,11 +917,13 @@ class ComicScanner:
             
         return None, None
     
-    def _extract_archive_cover(self, file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+    def _extract_archive_cover(self, file_path: str,
+                               front_cover: Optional[int] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """Extract the cover image from a comic archive file.
         
         Args:
             file_path: Path to the comic book archive file
+            front_cover: Page index of the front cover from ComicInfo, if any
             
         Returns:
             Tuple of (image_data, image_type) or (None, None) if extraction fails
@@ -734,13 +933,13 @@ class ComicScanner:
             
             if ext in ['.cbr', '.rar']:
                 # Use rarfile for RAR/CBR files
-                return self._extract_rar_cover(file_path)
+                return self._extract_rar_cover(file_path, front_cover)
             elif ext == '.cbz':
-                # Use zipfile for CBZ files
-                return self._extract_zip_cover(file_path)
+                # Use the zero-copy reader for CBZ files
+                return self._extract_zip_cover(file_path, front_cover)
             elif ext in ['.cb7', '.7z']:
                 # Use py7zr for 7z/CB7 files
-                return self._extract_7z_cover(file_path)
+                return self._extract_7z_cover(file_path, front_cover)
             else:
                 self.logger.warning(f"Unsupported archive format: {file_path}")
                 return None, None
@@ -749,12 +948,43 @@ class ComicScanner:
             self.logger.error(f"Error extracting cover from {file_path}: {str(e)}", exc_info=True)
             return None, None
             
-    def _extract_rar_cover(self, file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+    def _select_cover(self, candidates: List[str], read_member,
+                      file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """
+        Decode the first usable cover among the candidates.
+        
+        Only the chosen member is read and validated; the next candidate is
+        tried only if it turns out to be empty or not a decodable image.
+        
+        Args:
+            candidates: Member names in order of preference
+            read_member: Callable returning the data of a member
+            file_path: Archive path, for logging
+            
+        Returns:
+            Tuple of (image_data, image_type) or (None, None) if none is usable
+        """
+        for name in candidates[:MAX_COVER_CANDIDATES]:
+            try:
+                img_data = read_member(name)
+                if not img_data:
+                    self.logger.debug(f"Empty cover candidate {name} in {file_path}")
+                    continue
+                return self._encode_cover(img_data, name)
+            except Exception as e:
+                self.logger.debug(f"Skipping cover candidate {name} in {file_path}: {e}")
+        
+        self.logger.debug(f"No usable cover image found in {file_path}")
+        return None, None
+    
+    def _extract_rar_cover(self, file_path: str,
+                           front_cover: Optional[int] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """
         Extract cover from RAR/CBR file using rarfile.
         
         Args:
             file_path: Path to the RAR/CBR file
+            front_cover: Page index of the front cover from ComicInfo, if any
             
         Returns:
             Tuple of (image_data, image_type) or (None, None) if extraction fails
@@ -776,34 +1006,13 @@ class ComicScanner:
                 
             # Open the RAR file
             with RarFile(file_path, 'r') as rar_ref:
-                # Get list of files in the archive
-                file_list = rar_ref.namelist()
-                
-                if not file_list:
-                    self.logger.warning(f"No files found in RAR archive: {file_path}")
-                    return None, None
-                    
-                # Find the first image file in the archive
-                image_files = [f for f in file_list 
-                             if os.path.splitext(f.lower())[1] in self.image_extensions]
-                
-                if not image_files:
+                # Choose the cover from the directory listing alone
+                candidates = cover_candidates(rar_ref.namelist(), front_cover)
+                if not candidates:
                     self.logger.debug(f"No image files found in RAR: {file_path}")
                     return None, None
-                    
-                # Sort to ensure consistent ordering
-                image_files.sort()
-                first_image = image_files[0]
                 
-                # Read the image data
-                with rar_ref.open(first_image) as img_file:
-                    img_data = img_file.read()
-                    if not img_data:
-                        self.logger.warning(f"Empty image file in RAR: {first_image}")
-                        return None, None
-                        
-                # Process the image
-                return self._process_image_data(img_data, first_image)
+                return self._select_cover(candidates, rar_ref.read, file_path)
                 
         except (NotRarFile, BadRarFile) as e:
             self.logger.warning(f"Invalid or corrupted RAR file: {file_path} - {e}")
@@ -812,12 +1021,14 @@ class ComicScanner:
             self.logger.error(f"Error extracting from RAR file {file_path}: {e}", exc_info=True)
             return None, None
                 
-    def _extract_7z_cover(self, file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+    def _extract_7z_cover(self, file_path: str,
+                          front_cover: Optional[int] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """
         Extract cover from 7z/CB7 file using py7zr.
         
         Args:
             file_path: Path to the 7z/CB7 file
+            front_cover: Page index of the front cover from ComicInfo, if any
             
         Returns:
             Tuple of (image_data, image_type) or (None, None) if extraction fails
@@ -828,43 +1039,24 @@ class ComicScanner:
             
         try:
             with py7zr.SevenZipFile(file_path, mode='r') as z:
-                # Get list of files in the archive
-                file_list = z.getnames()
-                
-                if not file_list:
-                    self.logger.warning(f"No files found in 7z archive: {file_path}")
-                    return None, None
-                    
-                # Find the first image file in the archive
-                image_files = [f for f in file_list 
-                             if os.path.splitext(f.lower())[1] in self.image_extensions]
-                
-                if not image_files:
+                # Choose the cover from the directory listing alone
+                candidates = cover_candidates(z.getnames(), front_cover)
+                if not candidates:
                     self.logger.debug(f"No image files found in 7z: {file_path}")
                     return None, None
-                    
-                # Sort to ensure consistent ordering
-                image_files.sort()
-                first_image = image_files[0]
-                
-                # Extract the file to memory
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    z.extract(targets=[first_image], path=temp_dir)
-                    temp_file = os.path.join(temp_dir, first_image)
-                    
+            
+            with tempfile.TemporaryDirectory() as temp_dir:
+                def read_member(name: str) -> bytes:
+                    # py7zr can only extract, and needs a fresh handle per extraction
+                    with py7zr.SevenZipFile(file_path, mode='r') as z:
+                        z.extract(targets=[name], path=temp_dir)
+                    temp_file = os.path.join(temp_dir, name)
                     if not os.path.exists(temp_file):
-                        self.logger.warning(f"Failed to extract {first_image} from 7z archive")
-                        return None, None
-                        
-                    # Read the image data
+                        raise FileNotFoundError(f"Failed to extract {name} from 7z archive")
                     with open(temp_file, 'rb') as img_file:
-                        img_data = img_file.read()
-                        if not img_data:
-                            self.logger.warning(f"Empty image file in 7z: {first_image}")
-                            return None, None
-                            
-                    # Process the image
-                    return self._process_image_data(img_data, first_image)
+                        return img_file.read()
+                
+                return self._select_cover(candidates, read_member, file_path)
                     
         except py7zr.Bad7zFile as e:
             self.logger.warning(f"Bad 7z file: {file_path} - {e}")
@@ -873,12 +1065,17 @@ class ComicScanner:
             self.logger.error(f"Error extracting from 7z file {file_path}: {e}", exc_info=True)
             return None, None
             
-    def _extract_zip_cover(self, file_path: str) -> Tuple[Optional[bytes], Optional[str]]:
+    def _extract_zip_cover(self, file_path: str,
+                           front_cover: Optional[int] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """
         Extract cover from ZIP/CBZ file.
         
+        The cover is chosen from the central directory alone; only the chosen
+        member is decompressed and validated.
+        
         Args:
             file_path: Path to the ZIP/CBZ file
+            front_cover: Page index of the front cover from ComicInfo, if any
             
         Returns:
             Tuple of (image_data, image_type) or (None, None) if extraction fails
@@ -892,8 +1089,6 @@ class ComicScanner:
             if not os.path.isfile(file_path):
                 self.logger.warning(f"Path is not a file: {file_path}")
                 return None, None
-                logger.warning(f"Path is not a file: {file_path}")
-                return None, None
                 
             if os.path.getsize(file_path) == 0:
                 logger.warning(f"File is empty: {file_path}")
@@ -902,62 +1097,16 @@ class ComicScanner:
             # Check if it's actually a RAR file mislabeled as ZIP
             if self._is_rar_file(file_path):
                 logger.warning(f"File {file_path} is actually a RAR file, not a ZIP")
-                return self._extract_rar_cover(file_path)
-                
-            # Verify it's a valid ZIP file
-            if not zipfile.is_zipfile(file_path):
-                logger.warning(f"Not a valid ZIP file: {file_path}")
-                return None, None
-                
-            # Check if the ZIP file is corrupted
-            try:
-                with zipfile.ZipFile(file_path, 'r') as test_zip:
-                    test_zip.testzip()
-            except (zipfile.BadZipFile, zipfile.LargeZipFile) as e:
-                logger.warning(f"Corrupted or invalid ZIP file {file_path}: {e}")
-                return None, None
+                return self._extract_rar_cover(file_path, front_cover)
                 
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                # Get all image files
-                try:
-                    image_files = []
-                    for f in zip_ref.namelist():
-                        try:
-                            # Skip directories and hidden files
-                            if f.endswith('/') or os.path.basename(f).startswith('.'):
-                                continue
-                                
-                            # Check if file is an image by extension
-                            if os.path.splitext(f.lower())[1] in self.image_extensions:
-                                # Verify the file can be opened
-                                with zip_ref.open(f) as test_file:
-                                    test_file.read(4)  # Try reading a small part
-                                image_files.append(f)
-                        except Exception as e:
-                            logger.debug(f"Skipping invalid file {f} in {file_path}: {e}")
-                            continue
-                    
-                    if not image_files:
-                        logger.debug(f"No valid image files found in ZIP: {file_path}")
-                        return None, None
-                        
-                    # Sort to ensure consistent ordering
-                    image_files.sort()
-                    first_image = image_files[0]
-                    
-                    # Read the image data
-                    with zip_ref.open(first_image) as img_file:
-                        img_data = img_file.read()
-                        if not img_data:
-                            logger.warning(f"Empty image file in ZIP: {first_image}")
-                            return None, None
-                            
-                    # Process the image
-                    return self._process_image_data(img_data, first_image)
-                    
-                except Exception as e:
-                    logger.warning(f"Error processing files in ZIP {file_path}: {e}")
+            with self._open_cbz(file_path) as reader:
+                candidates = cover_candidates(reader.namelist(), front_cover)
+                if not candidates:
+                    logger.debug(f"No image files found in ZIP: {file_path}")
                     return None, None
+                
+                # Stored members come back as a view of the mapped archive
+                return self._select_cover(candidates, reader.read, file_path)
                     
         except zipfile.BadZipFile as e:
             logger.warning(f"Bad ZIP file: {file_path} - {e}")
@@ -1005,36 +1154,51 @@ class ComicScanner:
             logger.warning(f"Error checking if file is RAR: {file_path} - {e}")
             return False
     
-    def _process_image_data(self, img_data: bytes, filename: str) -> Tuple[Optional[bytes], Optional[str]]:
-        """Process image data and return as JPEG with MIME type."""
+    @staticmethod
+    def _image_mime_type(filename: str) -> str:
+        """Guess an image MIME type from its extension."""
+        ext = os.path.splitext(filename.lower())[1]
+        if ext in ['.jpg', '.jpeg']:
+            return 'image/jpeg'
+        elif ext == '.png':
+            return 'image/png'
+        elif ext == '.gif':
+            return 'image/gif'
+        elif ext == '.webp':
+            return 'image/webp'
+        return 'application/octet-stream'
+    
+    def _encode_cover(self, img_data: Union[bytes, memoryview],
+                      filename: str) -> Tuple[bytes, str]:
+        """Decode an image, shrink it to cover size and re-encode it as JPEG.
+        
+        ``img_data`` may be a memoryview into a mapped archive; it is decoded
+        in place without copying.
+        
+        Raises:
+            Exception: If the data is not a decodable image
+        """
+        img = Image.open(MemoryViewIO(img_data))
+        img.thumbnail(self.max_cover_size, Image.Resampling.LANCZOS)
+        
+        # Convert to JPEG for consistency
+        img_byte_arr = BytesIO()
+        img = img.convert('RGB')  # Convert to RGB for JPEG
+        img.save(img_byte_arr, format='JPEG', quality=85)
+        return img_byte_arr.getvalue(), 'image/jpeg'
+    
+    def _process_image_data(self, img_data: Union[bytes, memoryview],
+                            filename: str) -> Tuple[Optional[bytes], Optional[str]]:
+        """Process image data and return as JPEG with MIME type.
+        
+        Falls back to the original data if the image cannot be processed.
+        """
         try:
-            # Determine image type from extension
-            ext = os.path.splitext(filename.lower())[1]
-            if ext in ['.jpg', '.jpeg']:
-                mime_type = 'image/jpeg'
-            elif ext == '.png':
-                mime_type = 'image/png'
-            elif ext == '.gif':
-                mime_type = 'image/gif'
-            elif ext == '.webp':
-                mime_type = 'image/webp'
-            else:
-                mime_type = 'application/octet-stream'
-            
-            # Process the image
-            img = Image.open(BytesIO(img_data))
-            img.thumbnail(self.max_cover_size, Image.Resampling.LANCZOS)
-            
-            # Convert to JPEG for consistency
-            img_byte_arr = BytesIO()
-            img = img.convert('RGB')  # Convert to RGB for JPEG
-            img.save(img_byte_arr, format='JPEG', quality=85)
-            return img_byte_arr.getvalue(), 'image/jpeg'
-            
+            return self._encode_cover(img_data, filename)
         except Exception as img_error:
             logger.warning(f"Error processing image {filename}: {img_error}")
             # Return original if processing fails
-            return img_data, mime_type
+            return bytes(img_data), self._image_mime_type(filename)
     
     @staticmethod
     def get_file_mime_type(file_path: str) -> str:
@@ -13,7 +13,26 @@ DEFAULT_CONFIG = {
         'database': 'comicdb.sqlite',
         'host': 'localhost',
         'user': '',
-        'password': ''
+        'password': '',
+        'profile': 'interactive',
+        'reader_connections': 4,
+        'slow_query_ms': 250
+    },
+    'prefetch': {
+        'enabled': True,
+        'depth': 4,
+        'workers': 4,
+        'memory_budget_mb': 256,
+        'whole_file_threshold_mb': 16
+    },
+    'import': {
+        'batch_size': 200,
+        'profile': 'bulk-import'
+    },
+    'reader': {
+        'cache_mb': 128,
+        'prefetch_ahead': 2,
+        'prefetch_behind': 1
     },
     'language': 'en',
     'check_updates': True,
@@ -84,3 +103,33 @@ def get_db_config() -> Dict[str, str]:
     """Get the database configuration."""
     config = load_config()
     return config.get('database', {}).copy()
+
+def get_prefetch_config() -> Dict[str, Any]:
+    """
+    Get the archive prefetch configuration, filled in with defaults.
+
+    Only the known keys are returned, so the section can be passed to
+    ArchivePrefetcher as keyword arguments; unknown keys are logged and ignored.
+    """
+    config = load_config()
+    prefetch = DEFAULT_CONFIG['prefetch'].copy()
+    for key, value in (config.get('prefetch') or {}).items():
+        if key in prefetch:
+            prefetch[key] = value
+        else:
+            logging.warning(f"Ignoring unknown prefetch setting '{key}'")
+    return prefetch
+
+def get_import_config() -> Dict[str, Any]:
+    """Get the bulk import configuration, filled in with defaults."""
+    config = load_config()
+    import_config = DEFAULT_CONFIG['import'].copy()
+    import_config.update(config.get('import', {}))
+    return import_config
+
+def get_reader_config() -> Dict[str, Any]:
+    """Get the comic reader configuration, filled in with defaults."""
+    config = load_config()
+    reader = DEFAULT_CONFIG['reader'].copy()
+    reader.update(config.get('reader', {}))
+    return reader
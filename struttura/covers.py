@@ -0,0 +1,45 @@
+"""
+Content-addressed cover store.
+
+Cover thumbnails live in the ``covers`` table, keyed by the SHA-256 of the
+image bytes, and comics point at them through ``comics.cover_hash``. Keeping
+the BLOBs out of ``comics`` keeps its rows small, so browsing and searching
+never read image data, and comics sharing a cover (variants, re-scans of the
+same file) store it once.
+"""
+import hashlib
+
+COVERS_TABLE = 'covers'
+
+
+def cover_hash(data: bytes) -> str:
+    """Return the key a cover image is stored under."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def create_statement(db_type: str) -> str:
+    """DDL for the cover table; the BLOB comes last so lookups skip it."""
+    if db_type == 'sqlite':
+        return f"""
+            CREATE TABLE IF NOT EXISTS {COVERS_TABLE} (
+                hash TEXT PRIMARY KEY,
+                mime_type TEXT,
+                size INTEGER NOT NULL,
+                data BLOB NOT NULL
+            )"""
+    return f"""
+        CREATE TABLE IF NOT EXISTS {COVERS_TABLE} (
+            hash CHAR(64) PRIMARY KEY,
+            mime_type VARCHAR(20),
+            size INT NOT NULL,
+            data LONGBLOB NOT NULL
+        )"""
+
+
+def insert_statement(db_type: str) -> str:
+    """INSERT adding a cover unless one with the same hash is stored."""
+    if db_type == 'sqlite':
+        return (f"INSERT OR IGNORE INTO {COVERS_TABLE} (hash, mime_type, size, data) "
+                f"VALUES (?, ?, ?, ?)")
+    return (f"INSERT IGNORE INTO {COVERS_TABLE} (hash, mime_type, size, data) "
+            f"VALUES (%s, %s, %s, %s)")
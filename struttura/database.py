@@ -1,17 +1,38 @@
 import os
+import re
 import sqlite3
 import logging
+import time
 import json
 from datetime import datetime
-from typing import Optional, List, Dict, Any, Tuple, Union, Callable, Any, TypeVar, cast
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple, Union, Callable, Any, TypeVar, cast
 from pathlib import Path
-import pandas as pd
 import json
 import csv
 import io
 import threading
+from collections import Counter
+from concurrent.futures import Future
 from functools import wraps
 
+from struttura.backup import mysql_dump, prune_backups, sqlite_backup
+from struttura.browse import BROWSE_TABLE, SORT_KEYS as BROWSE_SORT_KEYS
+from struttura.covers import COVERS_TABLE, cover_hash, insert_statement as cover_insert_statement
+from struttura.db_access import ReaderPool, WriterThread
+from struttura.issues import issue_sort_key
+from struttura.lookups import LOOKUP_TABLES, LookupCache, invalidates_lookups
+from struttura.migrations import current_version, migrate
+from struttura.paging import (BROWSE_SORTS, DEFAULT_SORT, decode_cursor, keyset_condition, row_cursor,
+                              sort_expressions)
+from struttura.querylog import DEFAULT_SLOW_QUERY_MS, QueryLog
+from struttura.rows import ROW_TYPES, dict_factory, row_converter
+from struttura.search import FTS_TABLE, fts_query, rank_expression, refresh_statements
+from struttura.statements import Statement, placeholders, sqlite_placeholders
+from struttura.stats import FACETS_TABLE, label_join, remove_statements as facet_remove_statements
+from struttura.tags import TAG_FIELDS, TAG_KINDS, metadata_tags, split_names
+from struttura.triggers import (BROWSE as BROWSE_TRIGGERS, FACETS as FACETS_TRIGGERS,
+                                SEARCH as SEARCH_TRIGGERS, paused)
+
 # Import MySQL connector only if needed
 try:
     from mysql.connector import Error as MySQLError
@@ -20,19 +41,27 @@ except ImportError:
     class MySQLError(Exception):
         pass
 
-# Thread-local storage for database connections
-_thread_local = threading.local()
-
 def with_connection(method: Callable) -> Callable:
-    """Decorator to ensure a database connection is available for the method."""
+    """Decorator to ensure a database connection is available for the method.
+    
+    For SQLite, the method runs on a read-only connection borrowed from the
+    reader pool (or on the writer's connection when called from the writer
+    thread), so reads never queue behind a running import.
+    """
     @wraps(method)
     def wrapper(self, *args, **kwargs):
-        # For SQLite, get or create a thread-local connection
-        if self.db_type == 'sqlite':
-            if not hasattr(_thread_local, 'connection') or _thread_local.connection is None:
-                _thread_local.connection = sqlite3.connect(self.database, check_same_thread=False)
-                _thread_local.connection.row_factory = sqlite3.Row
-            self.connection = _thread_local.connection
+        if self.db_type == 'sqlite' and self._readers is not None:
+            # Nested calls and the writer thread reuse the connection they already have
+            if getattr(self._local, 'connection', None) is not None or \
+                    (self._writer is not None and self._writer.is_current()):
+                return method(self, *args, **kwargs)
+            
+            with self._readers.acquire() as connection:
+                self._local.connection = connection
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    self._local.connection = None
             
         # For MySQL, use the existing connection logic
         elif self.db_type == 'mysql' and (self.connection is None or not self.connection.is_connected()):
@@ -41,11 +70,117 @@ def with_connection(method: Callable) -> Callable:
         return method(self, *args, **kwargs)
     return wrapper
 
+def on_writer(method: Callable) -> Callable:
+    """Decorator running a method that modifies the database on the writer thread.
+    
+    The caller blocks until the method has run and gets its return value or
+    exception. Without a writer (MySQL, read-only profiles) the method runs
+    directly on the caller's thread.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self._writer is None:
+            return method(self, *args, **kwargs)
+        return self._writer.call(method, self, *args, **kwargs)
+    return wrapper
+
 logger = logging.getLogger(__name__)
 
+# PRAGMA settings applied to every SQLite connection, by profile name.
+# A value of None leaves SQLite's setting untouched.
+CONNECTION_PROFILES: Dict[str, Dict[str, Any]] = {
+    # Day-to-day use: readers never block on a running scan
+    'interactive': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,        # 64 MiB
+        'mmap_size': 268435456,      # 256 MiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # Large imports: big cache and mmap. In WAL mode NORMAL already skips the
+    # fsync on each commit, and unlike OFF a crash cannot corrupt the library
+    'bulk-import': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -262144,       # 256 MiB
+        'mmap_size': 1073741824,     # 1 GiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 30000,
+    },
+    # Browsing a copy of the library, e.g. on a second machine
+    'read-only-replica': {
+        'read_only': True,
+        'journal_mode': None,
+        'synchronous': 'OFF',
+        'cache_size': -131072,       # 128 MiB
+        'mmap_size': 1073741824,     # 1 GiB
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+    },
+    # SQLite defaults; WAL needs shared memory, which network shares don't provide
+    'compatible': {
+        'journal_mode': 'DELETE',
+        'synchronous': 'FULL',
+        'cache_size': -2000,
+        'mmap_size': 0,
+        'temp_store': 'DEFAULT',
+        'busy_timeout': 5000,
+    },
+}
+
+DEFAULT_PROFILE = 'interactive'
+
+# Order in which the profile PRAGMAs are applied
+_PROFILE_PRAGMAS = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size',
+                    'mmap_size', 'temp_store')
+
+# PRAGMAs that only report, whatever their argument
+_INFO_PRAGMAS = frozenset({
+    'table_info', 'table_xinfo', 'table_list', 'index_list', 'index_info', 'index_xinfo',
+    'foreign_key_list', 'foreign_key_check', 'integrity_check', 'quick_check',
+    'database_list', 'compile_options', 'function_list', 'module_list', 'pragma_list',
+    'collation_list', 'data_version', 'freelist_count', 'page_count', 'schema_version',
+})
+# PRAGMAs that report a setting when given no value (and change it when given one)
+_SETTING_PRAGMAS = frozenset(_PROFILE_PRAGMAS) | {
+    'application_id', 'auto_vacuum', 'encoding', 'foreign_keys', 'locking_mode',
+    'page_size', 'query_only', 'user_version', 'wal_autocheckpoint',
+}
+_PRAGMA_RE = re.compile(r'PRAGMA\s+(?:\w+\.)?(\w+)\s*(\S?)', re.IGNORECASE)
+# String literals, quoted identifiers and comments, blanked before looking for writes
+_QUOTED_RE = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|--[^\n]*|/\*.*?\*/", re.DOTALL)
+# replace() the function is not a write; REPLACE INTO is
+_WRITE_RE = re.compile(r'\b(?:INSERT|UPDATE|DELETE)\b|\bREPLACE\s+INTO\b', re.IGNORECASE)
+
 class ComicDatabase:
+    # Comics committed per transaction by add_comics_bulk
+    BULK_BATCH_SIZE = 200
+    # Values per IN (...) lookup, well below SQLite's bound-parameter limit
+    LOOKUP_CHUNK_SIZE = 500
+    # Rows fetched per round trip by export_to_csv
+    EXPORT_CHUNK_SIZE = 1000
+    # Rows fetched per round trip by iter_query
+    ITER_CHUNK_SIZE = 500
+    
+    # Statements rendered once per backend
+    _ADD_COMIC_AUTHOR = Statement("""
+        {insert_ignore} INTO comic_authors (comic_id, author_id, role)
+        VALUES (:comic_id, :author_id, :role)""")
+    _SERIES = Statement("""
+        SELECT s.id, s.name, p.name AS publisher
+        FROM series s LEFT JOIN publishers p ON s.publisher_id = p.id
+        ORDER BY s.name""")
+    _SERIES_OF_PUBLISHER = Statement("""
+        SELECT s.id, s.name, p.name AS publisher
+        FROM series s JOIN publishers p ON s.publisher_id = p.id
+        WHERE p.name = :publisher
+        ORDER BY s.name""")
+    
     def __init__(self, database: str = "comicdb.sqlite", db_type: str = "sqlite",
-                 host: str = None, user: str = None, password: str = None):
+                 host: str = None, user: str = None, password: str = None,
+                 profile: str = None, reader_connections: int = 4,
+                 slow_query_ms: Optional[float] = DEFAULT_SLOW_QUERY_MS):
         """Initialize the database connection.
         
         Args:
@@ -54,10 +189,27 @@ class ComicDatabase:
             host: Database host (for MySQL)
             user: Database user (for MySQL)
             password: Database password (for MySQL)
+            profile: Name of the SQLite connection profile, one of
+                CONNECTION_PROFILES (default: 'interactive')
+            reader_connections: Size of the SQLite read-only connection pool
+            slow_query_ms: Log statements taking at least this long, with
+                their query plan; None only collects the timings
         """
         self.db_type = db_type.lower()
         self.database = database
-        self.connection = None
+        self.profile = self._check_profile(profile or DEFAULT_PROFILE)
+        self.reader_connections = reader_connections
+        self._connection = None
+        self._writer: Optional[WriterThread] = None
+        self._readers: Optional[ReaderPool] = None
+        # Connection borrowed from the reader pool by the current thread
+        self._local = threading.local()
+        # Whether the full-text index exists; looked up on first search
+        self._search_index: Optional[bool] = None
+        # IDs of publishers, series, subseries and authors, used by imports
+        self._lookups = LookupCache()
+        # Timings of every statement run through self._cursor()
+        self._query_log = QueryLog(self.db_type, slow_query_ms)
         
         if self.db_type == 'mysql':
             self.config = {
@@ -70,33 +222,87 @@ class ComicDatabase:
         
         self.connect()
 
+    @property
+    def connection(self):
+        """The connection to use on the calling thread.
+        
+        For SQLite this is the writer's connection on the writer thread, the
+        pooled reader connection inside read methods, and the writer's
+        connection otherwise.
+        """
+        if self._writer is not None and self._writer.is_current():
+            return self._writer.connection
+        borrowed = getattr(self._local, 'connection', None)
+        return borrowed if borrowed is not None else self._connection
+    
+    @connection.setter
+    def connection(self, value) -> None:
+        self._connection = value
+    
+    def _cursor(self, **kwargs):
+        """A cursor on the calling thread's connection, timed by the query log."""
+        connection = self.connection
+        return self._query_log.cursor(connection.cursor(**kwargs), connection)
+    
+    @property
+    def slow_query_ms(self) -> Optional[float]:
+        """Statements taking at least this long are logged with their query plan."""
+        return self._query_log.slow_query_ms
+    
+    @slow_query_ms.setter
+    def slow_query_ms(self, value: Optional[float]) -> None:
+        self._query_log.slow_query_ms = value
+    
+    def get_query_stats(self, limit: Optional[int] = 20) -> List[Dict[str, Any]]:
+        """Timings aggregated per statement, the most time-consuming first.
+        
+        Args:
+            limit: Maximum number of statements, None for all
+            
+        Returns:
+            List of dictionaries with the normalized ``sql``, ``calls``,
+            ``total_ms``, ``mean_ms``, ``max_ms``, ``rows`` and ``slow``
+            (calls over the slow query threshold)
+        """
+        return self._query_log.stats(limit)
+    
+    def reset_query_stats(self) -> None:
+        """Forget the aggregated statement timings."""
+        self._query_log.reset()
+
     def connect(self) -> bool:
         """Establish a connection to the database."""
+        self._lookups.invalidate()
         try:
             if self.db_type == 'sqlite':
+                # Reconnecting replaces the writer and the reader pool
+                self._close_sqlite()
+                
                 # Ensure the database file and directory exist
                 db_dir = os.path.dirname(self.database)
                 if db_dir and not os.path.exists(db_dir):
                     os.makedirs(db_dir, exist_ok=True)
                 
+                read_only = self._profile_settings().get('read_only')
+                
                 # Create the database file if it doesn't exist
-                if not os.path.exists(self.database):
+                if not os.path.exists(self.database) and not read_only:
                     open(self.database, 'a').close()
                 
-                # Create a new connection
-                self.connection = sqlite3.connect(
-                    self.database,
+                # Create a new connection, owned by the writer thread unless read-only
+                self.connection = self._open_sqlite(
+                    read_only=read_only,
+                    check_same_thread=False,
                     detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES
                 )
-                self.connection.row_factory = sqlite3.Row
-                
-                # Enable foreign key support
-                cursor = self.connection.cursor()
-                cursor.execute("PRAGMA foreign_keys = ON")
-                self.connection.commit()
-                cursor.close()
+                if not read_only:
+                    self._writer = WriterThread(self.connection)
+                self._readers = ReaderPool(
+                    lambda: self._open_sqlite(read_only=True, check_same_thread=False),
+                    self.reader_connections
+                )
                 
-                logger.info(f"Connected to SQLite database: {self.database}")
+                logger.info(f"Connected to SQLite database: {self.database} (profile: {self.profile})")
                 return True
                 
             else:  # MySQL
@@ -111,45 +317,128 @@ class ComicDatabase:
             self.connection = None
             return False
 
+    @staticmethod
+    def _check_profile(profile: str) -> str:
+        """Validate a profile name, falling back to the default one."""
+        if profile not in CONNECTION_PROFILES:
+            logger.warning(f"Unknown database profile '{profile}', using '{DEFAULT_PROFILE}'")
+            return DEFAULT_PROFILE
+        return profile
+    
+    def _profile_settings(self) -> Dict[str, Any]:
+        return CONNECTION_PROFILES[self.profile]
+    
+    def _open_sqlite(self, read_only: bool = False, **kwargs) -> sqlite3.Connection:
+        """Open a SQLite connection configured for the current profile."""
+        if read_only:
+            uri = Path(os.path.abspath(self.database)).as_uri() + '?mode=ro'
+            connection = sqlite3.connect(uri, uri=True, **kwargs)
+        else:
+            connection = sqlite3.connect(self.database, **kwargs)
+        connection.row_factory = sqlite3.Row
+        
+        # Enable foreign key support
+        connection.execute("PRAGMA foreign_keys = ON")
+        self._apply_profile(connection, read_only)
+        return connection
+    
+    def _apply_profile(self, connection: sqlite3.Connection, read_only: bool = False) -> None:
+        """Apply the PRAGMAs of the current profile to a SQLite connection."""
+        settings = self._profile_settings()
+        for pragma in _PROFILE_PRAGMAS:
+            value = settings.get(pragma)
+            # The journal mode is a property of the file, set by the writer
+            if value is None or (read_only and pragma == 'journal_mode'):
+                continue
+            try:
+                connection.execute(f"PRAGMA {pragma} = {value}")
+            except sqlite3.Error as e:
+                logger.warning(f"Could not set PRAGMA {pragma} = {value}: {e}")
+        connection.execute(f"PRAGMA query_only = {1 if read_only else 0}")
+    
+    def set_profile(self, profile: str) -> None:
+        """Switch the SQLite connection profile.
+        
+        The writer's connection is reconfigured at once; pooled reader
+        connections are replaced as they are returned.
+        
+        Args:
+            profile: Name of one of CONNECTION_PROFILES
+        """
+        profile = self._check_profile(profile)
+        if profile == self.profile:
+            return
+        if self._profile_settings().get('read_only') != CONNECTION_PROFILES[profile].get('read_only'):
+            raise ValueError("Cannot switch between read-only and writable profiles on an open database")
+        
+        self.profile = profile
+        if self.db_type == 'sqlite':
+            if self._writer is not None:
+                self._writer.call(self._apply_profile, self._writer.connection)
+            if self._readers is not None:
+                self._readers.reset()
+        logger.info(f"Switched database profile to {profile}")
+    
+    def submit_write(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue a call on the writer thread without waiting for it.
+        
+        Useful for pipelining, e.g. extracting the next batch of comics while
+        the previous one is being written.
+        
+        Args:
+            fn: Callable to run, typically a bound method of this database
+            
+        Returns:
+            Future resolved with the call's result or exception
+        """
+        if self._writer is not None:
+            return self._writer.submit(fn, *args, **kwargs)
+        
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def _close_sqlite(self) -> None:
+        """Stop the writer thread and close the reader pool."""
+        if self._readers is not None:
+            self._readers.close()
+            self._readers = None
+        if self._writer is not None:
+            # Closing the writer also closes its connection
+            self._writer.close()
+            self._writer = None
+            self._connection = None
+    
     def close(self) -> None:
         """Close the database connection."""
-        if not self.connection:
+        if not self._connection and not self._writer:
             return
             
+        self._query_log.log_summary()
         try:
             if self.db_type == 'mysql':
                 if self.connection.is_connected():
                     self.connection.close()
                     logger.info("MySQL database connection closed")
             else:  # SQLite
-                # For SQLite, ensure all statements are completed
-                self.connection.commit()
-                self.connection.close()
+                # Let queued writes finish before closing
+                self._close_sqlite()
+                if self._connection is not None:
+                    self._connection.close()
                 logger.info("SQLite database connection closed")
                 
         except Exception as e:
             logger.error(f"Error closing database connection: {e}", exc_info=True)
         finally:
-            self.connection = None
+            self._connection = None
     
     def close_all_connections(self) -> None:
         """Close all SQLite connections (for cleanup)."""
-        if hasattr(_thread_local, 'connection') and _thread_local.connection is not None:
-            try:
-                # Commit any pending changes
-                _thread_local.connection.commit()
-                _thread_local.connection.close()
-                logger.info("SQLite connection closed")
-            except Exception as e:
-                logger.error(f"Error closing SQLite connection: {e}")
-                # If there was an error, try to close without committing
-                try:
-                    if _thread_local.connection:
-                        _thread_local.connection.close()
-                except:
-                    pass
-            finally:
-                _thread_local.connection = None
+        if self.db_type == 'sqlite':
+            self.close()
             
     def is_connected(self) -> bool:
         """Check if the database connection is active."""
@@ -157,86 +446,501 @@ class ComicDatabase:
             return False
         try:
             if self.db_type == 'sqlite':
-                # For SQLite, try a simple query
-                cursor = self.connection.cursor()
-                cursor.execute("SELECT 1")
-                cursor.fetchone()
-                cursor.close()
-                return True
+                return self._ping()
             else:
                 # For MySQL, use the ping method
                 return self.connection.is_connected()
         except Exception:
             return False
+    
+    @with_connection
+    def _ping(self) -> bool:
+        """Run a trivial query on a pooled reader, never on the writer's handle from another thread."""
+        cursor = self._cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            return True
+        finally:
+            cursor.close()
 
+    # Columns returned for each comic by get_comics and get_comics_page
+    _LISTING_COLUMNS = """
+                c.id, c.title, c.year, c.issue_number, c.file_path,
+                c.cover_hash, c.last_updated,
+                s.name as series,
+                p.name as publisher
+    """
+    
+    def _comic_filters(self, search: str = None, publisher: str = None, series: str = None,
+                       tags: Optional[Dict[str, Any]] = None,
+                       browse: bool = False) -> Tuple[str, str, List[Any], bool]:
+        """Build the FROM and WHERE clauses shared by the comic listings.
+        
+        Each tag is matched through the comic_tags index, e.g.
+        ``{'character': 'Batman', 'team': ['Justice League', 'Outsiders']}``
+        keeps the comics tagged with all four.
+        
+        With ``browse``, the comic_browse projection is joined as ``b`` and
+        the publisher and series filters are applied to it, so a listing in
+        its order reads the filtered range of its indexes.
+        
+        Returns:
+            (from_clause, where_clause, params, ranked), where ranked means
+            the full-text index is used and bm25 ranking is available
+        """
+        joins = """
+            LEFT JOIN series s ON c.series_id = s.id
+            LEFT JOIN publishers p ON s.publisher_id = p.id
+        """
+        if browse:
+            joins += f" JOIN {BROWSE_TABLE} b ON b.comic_id = c.id"
+        params: List[Any] = []
+        
+        match = fts_query(search) if search and self._has_search_index() else None
+        if match:
+            from_clause = f"{FTS_TABLE} JOIN comics c ON c.id = {FTS_TABLE}.rowid {joins}"
+            where = f"{FTS_TABLE} MATCH %s"
+            params.append(match)
+        else:
+            from_clause = f"comics c {joins}"
+            where = "1=1"
+            if search:
+                where += " AND (c.title LIKE %s OR s.name LIKE %s OR c.file_path LIKE %s)"
+                search_term = f"%{search}%"
+                params.extend([search_term, search_term, search_term])
+            
+        if publisher:
+            where += f" AND {'b.publisher_name' if browse else 'p.name'} = %s"
+            params.append(publisher)
+            
+        if series:
+            where += f" AND {'b.series_name' if browse else 's.name'} = %s"
+            params.append(series)
+        
+        where += self._tag_filter(tags, 'c.id', params)
+        return from_clause, where, params, bool(match)
+    
+    @staticmethod
+    def _tag_filter(tags: Optional[Dict[str, Any]], id_column: str, params: List[Any]) -> str:
+        """AND conditions keeping the comics (``id_column``) with all the tags, appending their params."""
+        conditions = ''
+        for kind, names in (tags or {}).items():
+            if kind not in TAG_KINDS:
+                raise ValueError(f"Unknown tag kind {kind!r}, expected one of {', '.join(TAG_KINDS)}")
+            for name in split_names(names):
+                conditions += f""" AND {id_column} IN (
+                    SELECT ct.comic_id FROM comic_tags ct JOIN tags t ON t.id = ct.tag_id
+                    WHERE t.name = %s AND t.kind = %s)"""
+                params.extend([name, kind])
+        return conditions
+    
     @with_connection
     def get_comics(self, search: str = None, publisher: str = None, 
-                   series: str = None) -> List[Dict[str, Any]]:
+                   series: str = None, limit: Optional[int] = None,
+                   tags: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Get comics from the database with optional filters.
         
+        With the full-text index, every word of the search term must match
+        the start of a word in the title, series, publisher, summary,
+        authors, characters, teams or story arc, and results are ranked by
+        relevance. Otherwise the title, series and file path are matched
+        with LIKE.
+        
+        This returns the whole result; use get_comics_page to list a large
+        library a page at a time.
+        
         Args:
-            search: Search term to match against title, series, or description
+            search: Search term
             publisher: Filter by publisher
             series: Filter by series
+            limit: Maximum number of comics to return, e.g. the best
+                matches while typing
+            tags: Filter by tags, mapping a kind from tags.TAG_KINDS
+                ('character', 'team', 'location', 'story_arc', 'genre') to
+                one name or a list of names that must all match
             
         Returns:
             List of comic dictionaries
+            
+        Raises:
+            ValueError: If a tag kind is unknown
         """
-        query = """
-            SELECT 
-                c.id, c.title, c.year, c.issue_number, c.file_path,
-                c.cover_image, c.cover_image_type, c.last_updated,
-                s.name as series,
-                p.name as publisher
-            FROM comics c
-            LEFT JOIN series s ON c.series_id = s.id
-            LEFT JOIN publishers p ON s.publisher_id = p.id
-            WHERE 1=1
-        """
-        params = []
+        from_clause, where, params, ranked = self._comic_filters(search, publisher, series, tags)
+        query = f"SELECT {self._LISTING_COLUMNS} FROM {from_clause} WHERE {where}"
+        if ranked:
+            query += f" ORDER BY {rank_expression()}"
+        else:
+            # In index order: a series' comics come from idx_comics_issue already sorted
+            query += " ORDER BY s.name, s.publisher_id, s.id, c.issue_sort_key, c.id"
+        if limit:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        
+        try:
+            return self.execute_query(query, params, fetch=True) or []
+        except Exception as e:
+            logger.error(f"Error getting comics: {e}")
+            return []
+    
+    @with_connection
+    def get_comics_page(self, search: str = None, publisher: str = None,
+                        series: str = None, sort: str = DEFAULT_SORT,
+                        page_size: int = 100, cursor: Optional[str] = None,
+                        tags: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get one page of comics, using keyset pagination.
+        
+        Filters work as in get_comics. Pass the returned ``next_cursor``
+        back, with the same filters and sort, to get the following page;
+        every page costs about the same to read, however deep into the
+        listing it is. The series order is read from the comic_browse
+        projection and the year order from idx_comics_year_title, so without
+        a search a page is an index range scan, not a sort of the library.
         
-        if search:
-            query += " AND (c.title LIKE ? OR s.name LIKE ? OR c.file_path LIKE ?)"
-            search_term = f"%{search}%"
-            params.extend([search_term, search_term, search_term])
+        Args:
+            search: Search term
+            publisher: Filter by publisher
+            series: Filter by series
+            sort: One of paging.SORT_KEYS: 'series' (then issue), 'title',
+                'year' or 'relevance'. Relevance needs a full-text search
+                and falls back to 'series' without one.
+            page_size: Maximum number of comics per page
+            cursor: Position returned by the previous page, None for the first
+            tags: Filter by tags, as in get_comics
+            
+        Returns:
+            Dictionary with ``comics`` (list of comic dictionaries) and
+            ``next_cursor`` (None on the last page)
             
+        Raises:
+            ValueError: If the sort or a tag kind is unknown, or the cursor
+                is invalid
+        """
+        from_clause, where, params, ranked = self._comic_filters(search, publisher, series, tags)
+        if sort == 'relevance' and not ranked:
+            sort = DEFAULT_SORT
+        keys = sort_expressions(sort, self.db_type)
+        if sort in BROWSE_SORTS:
+            from_clause, where, params, _ = self._comic_filters(search, publisher, series, tags,
+                                                                browse=True)
+        # rank is the bm25 score, which SQLite also evaluates in WHERE and ORDER BY
+        keys = [rank_expression() if key == 'rank' else key for key in keys]
+        
+        selected = ', '.join(f'{key} AS sk{i}' for i, key in enumerate(keys))
+        query = f"SELECT {self._LISTING_COLUMNS}, {selected} FROM {from_clause} WHERE {where}"
+        if cursor:
+            position = decode_cursor(cursor, sort)
+            if len(position) != len(keys):
+                raise ValueError("Page cursor does not match the sort key")
+            query += f" AND {keyset_condition(keys, position, params)}"
+        # The key expressions themselves, so the planner can read them in index order;
+        # one extra row tells whether another page follows
+        query += f" ORDER BY {', '.join(keys)} LIMIT %s"
+        params.append(int(page_size) + 1)
+        
+        try:
+            rows = self.execute_query(query, params, fetch=True) or []
+        except Exception as e:
+            logger.error(f"Error getting comics page: {e}")
+            return {'comics': [], 'next_cursor': None}
+        
+        comics = rows[:page_size]
+        next_cursor = row_cursor(sort, comics[-1], len(keys)) if len(rows) > page_size else None
+        for comic in comics:
+            for i in range(len(keys)):
+                del comic[f'sk{i}']
+        return {'comics': comics, 'next_cursor': next_cursor}
+    
+    def _browse_filters(self, publisher: str = None, series: str = None,
+                        tags: Optional[Dict[str, Any]] = None) -> Tuple[str, List[Any]]:
+        """WHERE clause and params of the comic_browse listing, as in _comic_filters."""
+        params: List[Any] = []
+        where = "1=1"
         if publisher:
-            query += " AND p.name = ?"
+            where += " AND publisher_name = %s"
             params.append(publisher)
-            
         if series:
-            query += " AND s.name = ?"
+            where += " AND series_name = %s"
             params.append(series)
+        where += self._tag_filter(tags, 'comic_id', params)
+        return where, params
+    
+    @with_connection
+    def get_browse_page(self, publisher: str = None, series: str = None,
+                        sort: str = DEFAULT_SORT, page_size: int = 100,
+                        cursor: Optional[str] = None,
+                        tags: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get one page of the browse listing from the comic_browse projection.
+        
+        Like get_comics_page without a search, but reading only the narrow,
+        pre-joined projection: the default series order is the table's own
+        order, so a page is one index range scan with no join and no sort.
+        Cursors are interchangeable with get_comics_page's for the same sort.
+        
+        Args:
+            publisher: Filter by publisher
+            series: Filter by series
+            sort: One of browse.SORT_KEYS: 'series' (then issue), 'title' or
+                'year'
+            page_size: Maximum number of comics per page
+            cursor: Position returned by the previous page, None for the first
+            tags: Filter by tags, as in get_comics
+            
+        Returns:
+            Dictionary with ``comics`` (dictionaries with id, title, series,
+            issue_number, publisher and year) and ``next_cursor`` (None on
+            the last page)
             
-        query += " ORDER BY s.name, CAST(c.issue_number AS INTEGER)"
+        Raises:
+            ValueError: If the sort or a tag kind is unknown, or the cursor
+                is invalid
+        """
+        if sort not in BROWSE_SORT_KEYS:
+            raise ValueError(f"Unknown sort {sort!r}, expected one of {', '.join(BROWSE_SORT_KEYS)}")
+        keys = BROWSE_SORT_KEYS[sort]
+        where, params = self._browse_filters(publisher, series, tags)
+        if cursor:
+            position = decode_cursor(cursor, sort)
+            if len(position) != len(keys):
+                raise ValueError("Page cursor does not match the sort key")
+            where += f" AND {keyset_condition(keys, position, params)}"
+        
+        selected = ', '.join(f'{key} AS sk{i}' for i, key in enumerate(keys))
+        # One extra row tells whether another page follows
+        query = f"""
+            SELECT comic_id AS id, title, NULLIF(series_name, '') AS series, issue_number,
+                   publisher_name AS publisher, year, {selected}
+            FROM {BROWSE_TABLE} WHERE {where}
+            ORDER BY {', '.join(keys)} LIMIT %s
+        """
+        params.append(int(page_size) + 1)
         
         try:
-            return self.execute_query(query, params, fetch=True) or []
+            rows = self.execute_query(query, params, fetch=True) or []
         except Exception as e:
-            logger.error(f"Error getting comics: {e}")
+            logger.error(f"Error getting browse page: {e}")
+            return {'comics': [], 'next_cursor': None}
+        
+        comics = rows[:page_size]
+        next_cursor = row_cursor(sort, comics[-1], len(keys)) if len(rows) > page_size else None
+        for comic in comics:
+            for i in range(len(keys)):
+                del comic[f'sk{i}']
+        return {'comics': comics, 'next_cursor': next_cursor}
+    
+    @with_connection
+    def estimate_comic_count(self, search: str = None, publisher: str = None,
+                             series: str = None, cap: int = 10000,
+                             tags: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Count the comics matching the filters, cheaply.
+        
+        Counting stops at ``cap`` matches, so the cost stays bounded for
+        broad searches. Without filters, SQLite counts the smallest index
+        exactly, while MySQL reads the table statistics, since InnoDB's
+        COUNT(*) reads the whole table.
+        
+        Args:
+            search: Search term
+            publisher: Filter by publisher
+            series: Filter by series
+            cap: Stop counting after this many matches
+            tags: Filter by tags, as in get_comics
+            
+        Returns:
+            Dictionary with ``count`` and ``exact``; when exact is False the
+            real count is at least (capped) or about (statistics) ``count``
+        """
+        try:
+            if not (search or publisher or series or tags):
+                if self.db_type == 'sqlite':
+                    return {'count': self.get_comic_count(), 'exact': True}
+                rows = self.execute_query("""
+                    SELECT TABLE_ROWS AS n FROM information_schema.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'comics'
+                """, fetch=True)
+                return {'count': int(rows[0]['n'] or 0) if rows else 0, 'exact': False}
+            
+            if search:
+                from_clause, where, params, _ = self._comic_filters(search, publisher, series, tags)
+            else:
+                # The narrow projection, through its indexes
+                from_clause = BROWSE_TABLE
+                where, params = self._browse_filters(publisher, series, tags)
+            rows = self.execute_query(
+                f"SELECT COUNT(*) AS n FROM (SELECT 1 FROM {from_clause} WHERE {where} LIMIT %s) capped",
+                params + [int(cap) + 1], fetch=True
+            )
+            count = rows[0]['n'] if rows else 0
+            return {'count': min(count, cap), 'exact': count <= cap}
+        except Exception as e:
+            logger.error(f"Error counting comics: {e}")
+            return {'count': 0, 'exact': False}
+    
+    def _has_search_index(self) -> bool:
+        """Check if the FTS5 search index exists (SQLite only)."""
+        if self.db_type != 'sqlite':
+            return False
+        if self._search_index is None:
+            rows = self.execute_query(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = %s",
+                (FTS_TABLE,), fetch=True
+            )
+            self._search_index = bool(rows)
+        return self._search_index
+
+    def get_comic(self, comic_id: int) -> Optional[Dict[str, Any]]:
+        """Get a single comic by ID.
+        
+        Args:
+            comic_id: ID of the comic
+            
+        Returns:
+            Comic dictionary with series and publisher names, or None if not found
+        """
+        try:
+            rows = self.execute_query("""
+                SELECT c.*, s.name as series, p.name as publisher_name
+                FROM comics c
+                LEFT JOIN series s ON c.series_id = s.id
+                LEFT JOIN publishers p ON s.publisher_id = p.id
+                WHERE c.id = %s
+            """, (comic_id,), fetch=True)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error getting comic {comic_id}: {e}")
+            return None
+
+    def get_cover(self, comic_id: int) -> Optional[Dict[str, Any]]:
+        """Load the cover of a comic from the cover store.
+        
+        Browse queries only return ``cover_hash``; call this when the image
+        is actually shown.
+        
+        Args:
+            comic_id: ID of the comic
+            
+        Returns:
+            Dictionary with ``hash``, ``mime_type`` and ``data``, or None if
+            the comic has no cover
+        """
+        try:
+            rows = self.execute_query(f"""
+                SELECT cv.hash, cv.mime_type, cv.data
+                FROM comics c
+                JOIN {COVERS_TABLE} cv ON cv.hash = c.cover_hash
+                WHERE c.id = %s
+            """, (comic_id,), fetch=True)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error getting cover of comic {comic_id}: {e}")
+            return None
+
+    def get_tags(self, kind: str) -> List[Dict[str, Any]]:
+        """Get all tags of one kind, by name.
+        
+        Args:
+            kind: One of tags.TAG_KINDS, e.g. 'character'
+            
+        Returns:
+            List of tag dictionaries with 'id' and 'name' keys
+        """
+        try:
+            return self.execute_query(
+                "SELECT id, name FROM tags WHERE kind = %s ORDER BY name",
+                (kind,), fetch=True
+            ) or []
+        except Exception as e:
+            logger.error(f"Error getting {kind} tags: {e}")
             return []
+    
+    def get_comic_tags(self, comic_id: int) -> Dict[str, List[str]]:
+        """Get the tags of a comic.
+        
+        Args:
+            comic_id: ID of the comic
+            
+        Returns:
+            Dictionary from tag kind to the comic's tag names of that kind
+        """
+        try:
+            rows = self.execute_query("""
+                SELECT t.kind, t.name FROM comic_tags ct
+                JOIN tags t ON t.id = ct.tag_id
+                WHERE ct.comic_id = %s
+                ORDER BY t.kind, t.name
+            """, (comic_id,), fetch=True) or []
+        except Exception as e:
+            logger.error(f"Error getting tags of comic {comic_id}: {e}")
+            return {}
+        comic_tags: Dict[str, List[str]] = {}
+        for row in rows:
+            comic_tags.setdefault(row['kind'], []).append(row['name'])
+        return comic_tags
 
-    @with_connection
-    def execute_query(self, query: str, params: tuple = None, 
+    def execute_query(self, query: Union[str, Statement], params: Union[tuple, Dict[str, Any]] = None,
                      fetch: bool = False) -> Optional[Union[List[Dict[str, Any]], int]]:
-        """Execute a SQL query and optionally fetch results."""
+        """Execute a SQL query and optionally fetch results.
+        
+        With SQLite, reads run on a pooled reader connection and anything
+        else is queued on the writer thread.
+        
+        Args:
+            query: SQL text with %s placeholders, or a Statement with named
+                parameters
+            params: Sequence of values for %s placeholders, or mapping of
+                values for a Statement
+            fetch: Return the result rows as dictionaries
+        """
+        if isinstance(query, Statement):
+            query = query.render(self.db_type)
+        if not self._is_read_query(query) and invalidates_lookups(query):
+            self._lookups.invalidate()
+        if self._writer is not None and not self._is_read_query(query):
+            return self._writer.call(self._execute_query, query, params, fetch)
+        return self._execute_query(query, params, fetch)
+    
+    @staticmethod
+    def _is_read_query(query: str) -> bool:
+        """Check if a statement only reads, so it can run on a read-only reader connection.
+        
+        A CTE is a read unless its text has a write keyword outside quotes;
+        PRAGMAs are reads only when they are known to report. Anything in
+        doubt goes to the writer, which can run reads too.
+        """
+        words = query.lstrip(' \t\r\n(').split(None, 1)
+        keyword = words[0].upper() if words else ''
+        if keyword == 'PRAGMA':
+            match = _PRAGMA_RE.match(query.lstrip())
+            if not match:
+                return False
+            name, argument = match.group(1).lower(), match.group(2)
+            return name in _INFO_PRAGMAS or (name in _SETTING_PRAGMAS and argument in ('', ';'))
+        if keyword == 'WITH':
+            return not _WRITE_RE.search(_QUOTED_RE.sub(' ', query))
+        return keyword in ('SELECT', 'EXPLAIN', 'SHOW', 'DESCRIBE')
+    
+    @with_connection
+    def _execute_query(self, query: str, params: tuple = None,
+                       fetch: bool = False) -> Optional[Union[List[Dict[str, Any]], int]]:
         cursor = None
         try:
             if self.db_type == 'sqlite':
-                cursor = self.connection.cursor()
-                # Convert MySQL %s placeholders to SQLite ? placeholders
-                if params:
-                    cursor.execute(query.replace('%s', '?'), params)
+                cursor = self._cursor()
+                if isinstance(params, dict):
+                    cursor.execute(query, params)
+                elif params:
+                    # Convert MySQL %s placeholders to SQLite ? placeholders
+                    cursor.execute(sqlite_placeholders(query), params)
                 else:
                     cursor.execute(query)
                 self.connection.commit()
                 
                 if fetch:
-                    # Convert sqlite3.Row objects to dicts for consistency
-                    rows = cursor.fetchall()
-                    return [dict(row) for row in rows] if rows else []
+                    # Build the dicts in the cursor rather than copying sqlite3.Row objects
+                    cursor.row_factory = dict_factory
+                    return cursor.fetchall()
             else:  # MySQL
-                cursor = self.connection.cursor(dictionary=True)
+                cursor = self._cursor(dictionary=True)
                 cursor.execute(query, params or ())
                 if fetch:
                     return cursor.fetchall()
@@ -252,6 +956,80 @@ class ComicDatabase:
             if cursor:
                 cursor.close()
 
+    def iter_query(self, query: Union[str, Statement], params: Union[tuple, Dict[str, Any]] = None,
+                   row_type: str = 'dict', chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """Run a read query and yield its rows, fetched a chunk at a time.
+        
+        Unlike ``execute_query(fetch=True)``, the result set is never held in
+        memory: rows are fetched with ``fetchmany`` as the iteration advances.
+        With SQLite the query runs on a pooled reader connection, kept until
+        the iteration ends or the generator is closed. With MySQL the rows
+        stay on the server until fetched, so the connection cannot run other
+        statements until the iteration is over.
+        
+        Args:
+            query: SQL text with %s placeholders, or a Statement with named
+                parameters
+            params: Sequence of values for %s placeholders, or mapping of
+                values for a Statement
+            row_type: 'tuple', 'namedtuple' or 'dict'
+            chunk_size: Rows fetched per round trip (default
+                ITER_CHUNK_SIZE)
+            
+        Yields:
+            One row per result row, in the requested shape
+            
+        Raises:
+            ValueError: If the statement is not a read or the row type is
+                unknown
+        """
+        if isinstance(query, Statement):
+            query = query.render(self.db_type)
+        if not self._is_read_query(query):
+            raise ValueError("iter_query only runs read statements")
+        if row_type not in ROW_TYPES:
+            raise ValueError(f"Unknown row type '{row_type}', expected one of {', '.join(ROW_TYPES)}")
+        chunk_size = chunk_size or self.ITER_CHUNK_SIZE
+        
+        if self.db_type == 'sqlite' and self._readers is not None and \
+                getattr(self._local, 'connection', None) is None and \
+                not (self._writer is not None and self._writer.is_current()):
+            with self._readers.acquire() as connection:
+                yield from self._iter_rows(connection, query, params, row_type, chunk_size)
+            return
+        if self.db_type == 'mysql' and (self.connection is None or not self.connection.is_connected()):
+            self.connect()
+        yield from self._iter_rows(self.connection, query, params, row_type, chunk_size)
+    
+    def _iter_rows(self, connection, query: str, params, row_type: str,
+                   chunk_size: int) -> Iterator[Any]:
+        cursor = self._query_log.cursor(connection.cursor(), connection)
+        try:
+            if self.db_type == 'sqlite':
+                # Plain tuples: no sqlite3.Row built only to be converted
+                cursor.row_factory = None
+                if isinstance(params, dict):
+                    cursor.execute(query, params)
+                elif params:
+                    cursor.execute(sqlite_placeholders(query), params)
+                else:
+                    cursor.execute(query)
+            else:
+                cursor.execute(query, params or ())
+            convert = row_converter(cursor.description, row_type)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield convert(row)
+        except (sqlite3.Error, MySQLError) as e:
+            logger.error(f"Error executing query: {e}")
+            raise
+        finally:
+            cursor.close()
+
+    @on_writer
     def create_tables(self, force_recreate: bool = False) -> bool:
         """Create the necessary tables if they don't exist.
         
@@ -266,13 +1044,22 @@ class ComicDatabase:
                     logger.error("Failed to establish database connection")
                     return False
             
-            cursor = self.connection.cursor()
+            cursor = self._cursor()
             
             if force_recreate:
                 # Drop tables in reverse order to respect foreign key constraints
                 tables_to_drop = [
+                    'schema_version',
+                    'comics_fts',
+                    'trigger_pauses',
+                    'comic_pages',
                     'comic_authors',
+                    'comic_facets',
+                    'comic_browse',
+                    'comic_tags',
+                    'tags',
                     'comics',
+                    'covers',
                     'subseries',
                     'series',
                     'authors',
@@ -285,6 +1072,7 @@ class ComicDatabase:
                     except Exception as e:
                         logger.warning(f"Could not drop table {table}: {e}")
                 self.connection.commit()
+                self._lookups.invalidate()
             
             if self.db_type == 'sqlite':
                 tables = ["""
@@ -346,6 +1134,19 @@ class ComicDatabase:
                         PRIMARY KEY (comic_id, author_id, role),
                         FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE,
                         FOREIGN KEY (author_id) REFERENCES authors(id) ON DELETE CASCADE
+                    )""",
+                    """
+                    CREATE TABLE IF NOT EXISTS comic_pages (
+                        comic_id INTEGER NOT NULL,
+                        page_index INTEGER NOT NULL,
+                        member_name TEXT NOT NULL,
+                        file_size INTEGER,
+                        compressed_size INTEGER,
+                        data_offset INTEGER,
+                        width INTEGER,
+                        height INTEGER,
+                        PRIMARY KEY (comic_id, page_index),
+                        FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE
                     )"""]
                 
                 # SQLite specific triggers
@@ -417,6 +1218,19 @@ class ComicDatabase:
                         PRIMARY KEY (comic_id, author_id, role),
                         FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE,
                         FOREIGN KEY (author_id) REFERENCES authors(id) ON DELETE CASCADE
+                    )""",
+                    """
+                    CREATE TABLE IF NOT EXISTS comic_pages (
+                        comic_id INT NOT NULL,
+                        page_index INT NOT NULL,
+                        member_name TEXT NOT NULL,
+                        file_size BIGINT,
+                        compressed_size BIGINT,
+                        data_offset BIGINT,
+                        width INT,
+                        height INT,
+                        PRIMARY KEY (comic_id, page_index),
+                        FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE
                     )"""]
                 triggers = []  # No triggers needed for MySQL as it has ON UPDATE CURRENT_TIMESTAMP
             
@@ -441,6 +1255,11 @@ class ComicDatabase:
                     return False
             
             self.connection.commit()
+            
+            # Bring existing databases up to the current schema
+            migrate(self.connection, self.db_type)
+            self._search_index = None
+            
             logger.info("Database tables created successfully")
             return True
             
@@ -453,17 +1272,43 @@ class ComicDatabase:
             if cursor:
                 cursor.close()
 
-    def clear_database(self) -> bool:
-        """Remove all data from the database but keep the structure."""
-        cursor = None
+    @on_writer
+    def migrate(self, target: Optional[int] = None) -> int:
+        """Apply pending schema migrations.
+        
+        Args:
+            target: Version to migrate to, defaults to the latest
+            
+        Returns:
+            The schema version after migrating
+        """
+        version = migrate(self.connection, self.db_type, target)
+        self._search_index = None
+        return version
+    
+    @on_writer
+    def get_schema_version(self) -> int:
+        """Get the version of the last applied schema migration."""
+        cursor = self._cursor()
         try:
-            cursor = self.connection.cursor()
+            return current_version(cursor, self.db_type)
+        finally:
+            self.connection.commit()
+            cursor.close()
+    
+    @on_writer
+    def clear_database(self) -> bool:
+        """Remove all data from the database but keep the structure."""
+        cursor = None
+        try:
+            cursor = self._cursor()
             if self.db_type == 'sqlite':
                 # For SQLite, we need to delete data with foreign key constraints handled
                 cursor.execute("PRAGMA foreign_keys = OFF")
                 
                 # Delete all data from tables in the correct order to respect foreign key constraints
-                tables = ["comic_authors", "comics", "subseries", "series", "publishers", "authors"]
+                tables = ["comic_pages", "comic_authors", "comic_tags", "comics", "covers", "tags",
+                          "subseries", "series", "publishers", "authors", "comic_facets"]
                 for table in tables:
                     cursor.execute(f"DELETE FROM {table}")
                 
@@ -477,7 +1322,8 @@ class ComicDatabase:
                 cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
                 
                 # Get all tables
-                tables = ["comic_authors", "comics", "subseries", "series", "publishers", "authors"]
+                tables = ["comic_pages", "comic_authors", "comic_tags", "comics", "covers", "tags",
+                          "subseries", "series", "publishers", "authors", "comic_facets"]
                 
                 # Truncate all tables
                 for table in tables:
@@ -487,6 +1333,7 @@ class ComicDatabase:
                 cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
             
             self.connection.commit()
+            self._lookups.invalidate()
             logger.info("Database cleared successfully")
             return True
             
@@ -499,330 +1346,386 @@ class ComicDatabase:
             if cursor:
                 cursor.close()
 
-    def backup_database(self, backup_path: str) -> bool:
-        """Create a backup of the database to a SQL file."""
-        try:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(backup_path), exist_ok=True)
-            
-            # Get all table names
-            tables = ["publishers", "series", "subseries", "authors", "comics", "comic_authors"]
-            
-            with open(backup_path, 'w', encoding='utf-8') as f:
-                # Write header
-                f.write(f"-- ComicDB Backup\n")
-                f.write(f"-- Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                
-                # Disable foreign key checks
-                f.write("SET FOREIGN_KEY_CHECKS=0;\n\n")
-                
-                # For each table, get data and write to file
-                for table in tables:
-                    # Get table structure
-                    self.execute_query(f"SHOW CREATE TABLE {table}")
-                    create_table = self.execute_query(f"SHOW CREATE TABLE {table}", fetch=True)[0]['Create Table']
-                    
-                    # Write table structure
-                    f.write(f"--\n-- Table structure for table `{table}`\n--\n")
-                    f.write(f"DROP TABLE IF EXISTS `{table}`;\n")
-                    f.write(f"{create_table};\n\n")
-                    
-                    # Get table data
-                    rows = self.execute_query(f"SELECT * FROM {table}", fetch=True)
-                    if rows:
-                        f.write(f"--\n-- Dumping data for table `{table}`\n--\n")
-                        
-                        # Get column names
-                        columns = list(rows[0].keys())
-                        columns_str = ', '.join([f'`{col}`' for col in columns])
-                        
-                        # Write INSERT statements
-                        for row in rows:
-                            values = []
-                            for col in columns:
-                                val = row[col]
-                                if val is None:
-                                    values.append("NULL")
-                                elif isinstance(val, (int, float)):
-                                    values.append(str(val))
-                                elif isinstance(val, datetime):
-                                    values.append(f"'{val.strftime('%Y-%m-%d %H:%M:%S')}'")
-                                else:
-                                    # Escape single quotes
-                                    val_str = str(val).replace("'", "''")
-                                    values.append(f"'{val_str}'")
-                            
-                            f.write(f"INSERT INTO `{table}` ({columns_str}) VALUES ({", ".join(values)});\n")
-                        f.write("\n")
-                
-                # Re-enable foreign key checks
-                f.write("SET FOREIGN_KEY_CHECKS=1;\n")
+    def backup_database(self, backup_path: str, compress: Optional[bool] = None,
+                        include_covers: bool = True, keep: Optional[int] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> bool:
+        """Back up the database to a file, without blocking other work.
+        
+        SQLite databases are copied with the online backup API, in page steps
+        from a separate connection, so reads and writes carry on while the
+        backup runs. MySQL databases are dumped to a SQL script, streamed
+        from a consistent snapshot over a separate connection. See
+        struttura.backup. Safe to call from a background thread.
+        
+        Args:
+            backup_path: File to write
+            compress: gzip the backup; by default when the path ends in .gz
+            include_covers: Include the cover images
+            keep: If set, delete all but this many of the older backups
+                named like backup.backup_filename in the same directory
+            progress: Called with (done, total) as the backup advances
             
-            logger.info(f"Database backup created at {backup_path}")
-            return True
+        Returns:
+            bool: True if the backup was written
+        """
+        if compress is None:
+            compress = backup_path.endswith('.gz')
+        start = time.perf_counter()
+        try:
+            directory = os.path.dirname(backup_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
             
-        except Error as e:
+            if self.db_type == 'sqlite':
+                sqlite_backup(self.database, backup_path, compress=compress,
+                              include_covers=include_covers, progress=progress)
+            else:
+                import mysql.connector
+                connection = mysql.connector.connect(**self.config)
+                try:
+                    mysql_dump(connection, backup_path, compress=compress,
+                               include_covers=include_covers, progress=progress)
+                finally:
+                    connection.close()
+        except (sqlite3.Error, MySQLError, OSError) as e:
             logger.error(f"Error creating database backup: {e}")
             return False
         except Exception as e:
             logger.error(f"Unexpected error creating backup: {e}")
             return False
+        
+        logger.info(f"Database backup created at {backup_path} "
+                    f"({os.path.getsize(backup_path) / 1048576:.1f} MiB in {time.perf_counter() - start:.1f}s)")
+        if keep:
+            prune_backups(backup_path, keep)
+        return True
 
-    def import_from_csv(self, csv_path: str) -> bool:
-        """Import comic data from a CSV file."""
-        try:
-            # Read CSV file
-            df = pd.read_csv(csv_path, keep_default_na=False)
-            
-            # Required columns
-            required_columns = ['title', 'file_path']
-            for col in required_columns:
-                if col not in df.columns:
-                    logger.error(f"Missing required column: {col}")
-                    return False
+    # Rows parsed and committed per transaction by import_from_csv
+    IMPORT_CHUNK_SIZE = 1000
+    # CSV columns parsed as integers
+    _CSV_INTEGER_COLUMNS = ('year', 'page_count', 'file_size')
+    # CSV columns stored as-is in comics, when the file has them
+    _CSV_COMIC_COLUMNS = ('title', 'issue_number', 'year', 'summary', 'page_count',
+                          'file_size', 'isbn', 'notes')
+    
+    def import_from_csv(self, csv_path: str,
+                        chunk_size: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Import comic data from a CSV file, e.g. one written by export_to_csv.
+        
+        The file is read a chunk at a time. For each chunk, publishers,
+        series, subseries, authors and tags are resolved in bulk through the
+        lookup cache and the comics are upserted by file path with
+        executemany, in one transaction. Only the columns present in the file
+        are updated on existing comics; a non-empty authors or tag cell
+        replaces the comic's authors or tags of that kind.
+        
+        Rows without a title or file path, or with a malformed number, are
+        rejected and logged with their line number. If a chunk fails in the
+        database it is retried one row at a time, so only the offending rows
+        are rejected.
+        
+        Args:
+            csv_path: Path of the CSV file; 'title' and 'file_path' columns
+                are required
+            chunk_size: Rows per transaction (default IMPORT_CHUNK_SIZE)
             
-            # Process each row
-            for _, row in df.iterrows():
-                # Get or create publisher
-                publisher_id = None
-                if 'publisher' in df.columns and row['publisher']:
-                    publisher_id = self._get_or_create_publisher(row['publisher'])
-                
-                # Get or create series
-                series_id = None
-                if 'series' in df.columns and row['series']:
-                    series_id = self._get_or_create_series(row['series'], publisher_id)
-                
-                # Get or create subseries
-                subseries_id = None
-                if 'subseries' in df.columns and row['subseries'] and series_id:
-                    subseries_id = self._get_or_create_subseries(row['subseries'], series_id)
-                
-                # Prepare comic data
-                comic_data = {
-                    'title': row['title'],
-                    'year': int(row.get('year', 0)) if row.get('year') else None,
-                    'issue_number': str(row.get('issue_number', '')) if row.get('issue_number') else None,
-                    'file_path': row['file_path'],
-                    'series_id': series_id,
-                    'subseries_id': subseries_id
-                }
-                
-                # Check if comic already exists
-                existing = self.execute_query(
-                    "SELECT id FROM comics WHERE file_path = %s", 
-                    (row['file_path'],), 
-                    fetch=True
-                )
-                
-                if existing:
-                    # Update existing comic
-                    comic_id = existing[0]['id']
-                    set_clause = ", ".join([f"{k} = %s" for k in comic_data.keys()])
-                    values = list(comic_data.values()) + [comic_id]
-                    self.execute_query(
-                        f"UPDATE comics SET {set_clause} WHERE id = %s",
-                        tuple(values)
-                    )
-                else:
-                    # Insert new comic
-                    placeholders = ", ".join(["%s"] * len(comic_data))
-                    columns = ", ".join(comic_data.keys())
-                    self.execute_query(
-                        f"INSERT INTO comics ({columns}) VALUES ({placeholders})",
-                        tuple(comic_data.values())
-                    )
-                    comic_id = self.connection.cursor().lastrowid
+        Returns:
+            Dictionary with 'rows' read, 'imported', 'rejected',
+            'seconds' and 'rows_per_second', or None if the file could not
+            be imported
+        """
+        chunk_size = chunk_size or self.IMPORT_CHUNK_SIZE
+        start = time.perf_counter()
+        report = {'rows': 0, 'imported': 0, 'rejected': 0}
+        try:
+            with open(csv_path, newline='', encoding='utf-8-sig') as csv_file:
+                reader = csv.DictReader(csv_file)
+                columns = set(reader.fieldnames or ())
+                missing = [c for c in ('title', 'file_path') if c not in columns]
+                if missing:
+                    logger.error(f"Missing required column(s) in {csv_path}: {', '.join(missing)}")
+                    return None
                 
-                # Handle authors
-                if 'authors' in df.columns and row['authors']:
-                    # Remove existing author relationships
-                    self.execute_query(
-                        "DELETE FROM comic_authors WHERE comic_id = %s",
-                        (comic_id,)
-                    )
-                    
-                    # Add new author relationships
-                    authors = [a.strip() for a in str(row['authors']).split(';') if a.strip()]
-                    for author_name in authors:
-                        author_id = self._get_or_create_author(author_name)
-                        self.execute_query(
-                            """INSERT INTO comic_authors (comic_id, author_id, role) 
-                               VALUES (%s, %s, 'creator')""",
-                            (comic_id, author_id)
-                        )
-            
-            self.connection.commit()
-            logger.info(f"Successfully imported data from {csv_path}")
-            return True
-            
-        except Exception as e:
+                self.preload_lookups()
+                chunk: List[Tuple[int, Dict[str, Any]]] = []
+                for row in reader:
+                    report['rows'] += 1
+                    try:
+                        chunk.append((reader.line_num, self._parse_csv_row(row, columns)))
+                    except ValueError as e:
+                        report['rejected'] += 1
+                        logger.warning(f"{csv_path}:{reader.line_num}: row rejected, {e}")
+                    if len(chunk) >= chunk_size:
+                        self._import_csv_chunk(chunk, columns, report)
+                        chunk = []
+                if chunk:
+                    self._import_csv_chunk(chunk, columns, report)
+        except (OSError, csv.Error, UnicodeDecodeError) as e:
             logger.error(f"Error importing from CSV: {e}")
-            if self.connection:
+            return None
+        
+        report['seconds'] = time.perf_counter() - start
+        report['rows_per_second'] = report['rows'] / report['seconds'] if report['seconds'] else 0.0
+        logger.info(f"Imported {report['imported']} of {report['rows']} rows from {csv_path} "
+                    f"in {report['seconds']:.1f}s ({report['rows_per_second']:.0f} rows/s), "
+                    f"{report['rejected']} rejected")
+        return report
+    
+    def _parse_csv_row(self, row: Dict[str, str], columns: set) -> Dict[str, Any]:
+        """Turn a CSV row into import values; empty cells become None.
+        
+        Raises:
+            ValueError: If the row has no title or file path, or a number
+                is not a finite whole number
+        """
+        values = {column: (row.get(column) or '').strip() or None for column in columns}
+        if not values.get('title') or not values.get('file_path'):
+            raise ValueError("title and file_path are required")
+        for column in self._CSV_INTEGER_COLUMNS:
+            if values.get(column) is not None:
+                values[column] = self._csv_integer(column, values[column])
+        values['authors'] = [a.strip() for a in (values.get('authors') or '').split(';') if a.strip()]
+        values['tags'] = metadata_tags(values)
+        return values
+    
+    @staticmethod
+    def _csv_integer(column: str, text: str) -> int:
+        """Parse a whole number, written as such or as a float like "2012.0".
+        
+        Raises:
+            ValueError: If the text is not a finite whole number
+        """
+        try:
+            return int(text)
+        except ValueError:
+            pass
+        try:
+            number = float(text)
+            if number.is_integer():
+                return int(number)
+        except (ValueError, OverflowError):
+            pass
+        raise ValueError(f"{column} is not a whole number: {text!r}")
+    
+    @on_writer
+    def _import_csv_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]], columns: set,
+                          report: Dict[str, int]) -> None:
+        """Upsert one chunk of parsed CSV rows in a single transaction."""
+        cursor = self._cursor()
+        try:
+            try:
+                self._upsert_csv_rows(cursor, [values for _, values in chunk], columns)
+                self.connection.commit()
+                report['imported'] += len(chunk)
+                return
+            except (sqlite3.Error, MySQLError) as e:
                 self.connection.rollback()
-            return False
+                self._lookups.invalidate()
+                if len(chunk) > 1:
+                    logger.warning(f"CSV chunk of {len(chunk)} rows failed ({e}), retrying one at a time")
+                    
+            for line, values in chunk:
+                try:
+                    self._upsert_csv_rows(cursor, [values], columns)
+                    self.connection.commit()
+                    report['imported'] += 1
+                except (sqlite3.Error, MySQLError) as e:
+                    self.connection.rollback()
+                    self._lookups.invalidate()
+                    report['rejected'] += 1
+                    logger.warning(f"CSV line {line}: row rejected, {e}")
+        finally:
+            cursor.close()
+    
+    def _upsert_csv_rows(self, cursor, rows: List[Dict[str, Any]], columns: set) -> None:
+        """Insert or update comics from parsed CSV rows, without committing."""
+        publisher_ids = self._resolve_ids(cursor, 'publishers', ('name',), {
+            (r['publisher'],) for r in rows if r.get('publisher')
+        })
+        
+        def series_key(row):
+            return (row['series'], publisher_ids.get((row.get('publisher'),)))
+        
+        series_ids = self._resolve_ids(cursor, 'series', ('name', 'publisher_id'), {
+            series_key(r) for r in rows if r.get('series')
+        })
+        
+        def series_id_of(row):
+            return series_ids.get(series_key(row)) if row.get('series') else None
+        
+        subseries_ids = self._resolve_ids(cursor, 'subseries', ('name', 'series_id'), {
+            (r['subseries'], series_id_of(r)) for r in rows
+            if r.get('subseries') and series_id_of(r)
+        })
+        author_ids = self._resolve_ids(cursor, 'authors', ('name',), {
+            (name,) for r in rows for name in r['authors']
+        })
+        tag_ids = self._resolve_ids(cursor, 'tags', ('name', 'kind'), {
+            tag for r in rows for tag in r['tags']
+        })
+        
+        # Only the columns the file has overwrite existing values
+        comic_columns = [c for c in self._CSV_COMIC_COLUMNS if c in columns]
+        if 'issue_number' in columns:
+            comic_columns.append('issue_sort_key')
+        if 'series' in columns:
+            comic_columns.append('series_id')
+        if 'subseries' in columns:
+            comic_columns.append('subseries_id')
+        if 'publisher' in columns:
+            comic_columns.append('publisher')
+        insert_columns = comic_columns + ['file_path', 'file_extension']
+        
+        values = []
+        for row in rows:
+            row_values = dict(row, series_id=series_id_of(row))
+            row_values['subseries_id'] = subseries_ids.get((row.get('subseries'), row_values['series_id']))
+            row_values['issue_sort_key'] = issue_sort_key(row.get('issue_number'))
+            row_values['file_extension'] = os.path.splitext(row['file_path'])[1]
+            values.append(tuple(row_values.get(column) for column in insert_columns))
+        
+        cursor.executemany(f"""
+            INSERT INTO comics ({', '.join(insert_columns)})
+            VALUES ({placeholders(self.db_type, len(insert_columns))})
+            {self._upsert_clause('file_path', comic_columns)}
+        """, values)
+        
+        # lastrowid is meaningless after executemany (and for updated rows); look the IDs up by path
+        paths = {(r['file_path'],) for r in rows}
+        comic_ids = self._resolve_ids(cursor, 'comics', ('file_path',), paths, create=False)
+        
+        # A non-empty cell replaces the comic's authors, or its tags of that kind;
+        # links that stay are not rewritten
+        author_columns = ('comic_id', 'author_id', 'role')
+        replaced_authors = {comic_ids[(r['file_path'],)] for r in rows if r['authors']}
+        wanted_authors = {(comic_ids[(r['file_path'],)], author_ids[(name,)])
+                          for r in rows for name in r['authors']}
+        current = self._current_rows(cursor, 'comic_authors', author_columns, replaced_authors)
+        kept = {row for row in current if row[:2] in wanted_authors}
+        kept_pairs = {row[:2] for row in kept}
+        self._reconcile_author_links(cursor, author_columns, replaced_authors, replaced_authors,
+                                     kept | {pair + ('creator',) for pair in wanted_authors - kept_pairs},
+                                     current=current)
+        
+        tag_columns = ('comic_id', 'tag_id')
+        replaced_kinds = {(comic_ids[(r['file_path'],)], kind) for r in rows for _, kind in r['tags']}
+        tagged = {comic_id for comic_id, _ in replaced_kinds}
+        kinds = {tag_id: kind for (_, kind), tag_id in self._lookup_ids(cursor, 'tags').items()}
+        current = self._current_rows(cursor, 'comic_tags', tag_columns, tagged)
+        wanted_tags = {row for row in current if (row[0], kinds.get(row[1])) not in replaced_kinds}
+        wanted_tags.update((comic_ids[(r['file_path'],)], tag_ids[tag]) for r in rows for tag in r['tags'])
+        self._reconcile_rows(cursor, 'comic_tags', tag_columns, 2, tagged, tagged, wanted_tags,
+                             current=current)
 
-    def export_to_csv(self, csv_path: str) -> bool:
-        """Export comic data to a CSV file."""
-        try:
-            # Get all comics with related data
-            query = """
-                SELECT 
-                    c.id,
-                    c.title,
-                    c.year,
-                    c.issue_number,
-                    c.file_path,
-                    p.name AS publisher,
-                    s.name AS series,
-                    ss.name AS subseries,
-                    GROUP_CONCAT(DISTINCT a.name SEPARATOR '; ') AS authors
-                FROM comics c
-                LEFT JOIN series s ON c.series_id = s.id
-                LEFT JOIN publishers p ON s.publisher_id = p.id
-                LEFT JOIN subseries ss ON c.subseries_id = ss.id
-                LEFT JOIN comic_authors ca ON c.id = ca.comic_id
-                LEFT JOIN authors a ON ca.author_id = a.id
-                GROUP BY c.id, c.title, c.year, c.issue_number, c.file_path, p.name, s.name, ss.name
-                ORDER BY p.name, s.name, c.year, c.issue_number, c.title
-            """
-            
-            comics = self.execute_query(query, fetch=True)
-            
-            if not comics:
-                logger.warning("No comics found to export")
-                return False
-            
-            # Convert to DataFrame
-            df = pd.DataFrame(comics)
-            
-            # Reorder columns
-            columns = ['title', 'year', 'issue_number', 'publisher', 'series', 'subseries', 
-                     'authors', 'file_path']
-            df = df[columns]
-            
-            # Save to CSV
-            df.to_csv(csv_path, index=False, encoding='utf-8')
-            
-            logger.info(f"Successfully exported {len(comics)} comics to {csv_path}")
-            return True
+    # Base and extended CSV columns written by export_to_csv
+    EXPORT_COLUMNS = ('title', 'year', 'issue_number', 'publisher', 'series', 'subseries',
+                      'authors', 'file_path')
+    EXTENDED_EXPORT_COLUMNS = ('summary', 'page_count', 'file_size', 'isbn', 'notes') + tuple(TAG_FIELDS)
+
+    def _name_list(self, names_query: str, separator: str) -> str:
+        """Correlated subquery joining the sorted, distinct names selected by ``names_query``."""
+        if self.db_type == 'sqlite':
+            return f"(SELECT group_concat(name, '{separator}') FROM (SELECT DISTINCT {names_query} ORDER BY name))"
+        return f"(SELECT GROUP_CONCAT(DISTINCT name ORDER BY name SEPARATOR '{separator}') FROM (SELECT {names_query}) n)"
+
+    def _export_query(self, extended: bool) -> str:
+        columns = [
+            "c.title", "c.year", "c.issue_number", "p.name", "s.name", "ss.name",
+            self._name_list("a.name AS name FROM comic_authors ca JOIN authors a ON a.id = ca.author_id "
+                            "WHERE ca.comic_id = c.id", '; '),
+            "c.file_path",
+        ]
+        if extended:
+            columns += ["c.summary", "c.page_count", "c.file_size", "c.isbn", "c.notes"]
+            # Comma-separated like ComicInfo, so the columns import back as tags
+            columns += [
+                self._name_list(f"t.name AS name FROM comic_tags ct JOIN tags t ON t.id = ct.tag_id "
+                                f"WHERE ct.comic_id = c.id AND t.kind = '{kind}'", ', ')
+                for kind in TAG_FIELDS.values()
+            ]
+        return f"""
+            SELECT {', '.join(columns)}
+            FROM comics c
+            LEFT JOIN series s ON c.series_id = s.id
+            LEFT JOIN publishers p ON s.publisher_id = p.id
+            LEFT JOIN subseries ss ON c.subseries_id = ss.id
+            ORDER BY c.id
+        """
+
+    def export_to_csv(self, csv_path: str, extended: bool = False,
+                      chunk_size: Optional[int] = None) -> bool:
+        """Export comic data to a CSV file.
+        
+        Rows are streamed from the cursor and written a chunk at a time, so
+        memory use does not grow with the size of the library. The file is
+        written next to ``csv_path`` and renamed into place when complete.
+        
+        Args:
+            csv_path: Path of the CSV file to write
+            extended: Also export summary, page count, file size, ISBN,
+                notes and the characters, teams, locations, story arcs and
+                genres
+            chunk_size: Rows fetched per round trip (default
+                EXPORT_CHUNK_SIZE)
             
+        Returns:
+            bool: True if the file was written
+        """
+        columns = self.EXPORT_COLUMNS + (self.EXTENDED_EXPORT_COLUMNS if extended else ())
+        chunk_size = chunk_size or self.EXPORT_CHUNK_SIZE
+        part_path = f"{csv_path}.part"
+        start = time.perf_counter()
+        exported = 0
+        try:
+            rows = self.iter_query(self._export_query(extended), row_type='tuple',
+                                   chunk_size=chunk_size)
+            with open(part_path, 'w', newline='', encoding='utf-8') as csv_file:
+                writer = csv.writer(csv_file)
+                writer.writerow(columns)
+                for exported, row in enumerate(rows, 1):
+                    writer.writerow(row)
+            os.replace(part_path, csv_path)
         except Exception as e:
             logger.error(f"Error exporting to CSV: {e}")
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return False
+        
+        if not exported:
+            logger.warning("No comics found to export")
+        elapsed = time.perf_counter() - start
+        logger.info(f"Exported {exported} comics to {csv_path} in {elapsed:.1f}s "
+                    f"({exported / elapsed if elapsed else 0:.0f} rows/s)")
+        return True
 
     def _get_or_create_publisher(self, name: str) -> int:
         """Get or create a publisher and return its ID."""
-        cursor = self.connection.cursor()
-        try:
-            # Use ? placeholder for SQLite, %s for MySQL
-            query = "SELECT id FROM publishers WHERE name = ?" if self.db_type == 'sqlite' else \
-                    "SELECT id FROM publishers WHERE name = %s"
-            cursor.execute(query, (name,))
-            result = cursor.fetchone()
-            
-            if result:
-                return result[0]
-            else:
-                # Use ? placeholder for SQLite, %s for MySQL
-                query = "INSERT INTO publishers (name) VALUES (?)" if self.db_type == 'sqlite' else \
-                        "INSERT INTO publishers (name) VALUES (%s)"
-                cursor.execute(query, (name,))
-                return cursor.lastrowid
-        finally:
-            cursor.close()
+        return self._get_or_create('publishers', ('name',), (name,))
 
     def _get_or_create_series(self, name: str, publisher_id: int = None) -> int:
         """Get or create a series and return its ID."""
-        cursor = self.connection.cursor()
-        try:
-            # Use ? placeholders for SQLite, %s for MySQL
-            if publisher_id:
-                query = """
-                    SELECT id FROM series 
-                    WHERE name = ? AND publisher_id = ?
-                """ if self.db_type == 'sqlite' else """
-                    SELECT id FROM series 
-                    WHERE name = %s AND publisher_id = %s
-                """
-                cursor.execute(query, (name, publisher_id))
-            else:
-                query = """
-                    SELECT id FROM series 
-                    WHERE name = ? AND publisher_id IS NULL
-                """ if self.db_type == 'sqlite' else """
-                    SELECT id FROM series 
-                    WHERE name = %s AND publisher_id IS NULL
-                """
-                cursor.execute(query, (name,))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                return result[0]
-            else:
-                # Use ? placeholders for SQLite, %s for MySQL
-                query = """
-                    INSERT INTO series (name, publisher_id) 
-                    VALUES (?, ?)
-                """ if self.db_type == 'sqlite' else """
-                    INSERT INTO series (name, publisher_id) 
-                    VALUES (%s, %s)
-                """
-                cursor.execute(query, (name, publisher_id))
-                return cursor.lastrowid
-        finally:
-            cursor.close()
+        return self._get_or_create('series', ('name', 'publisher_id'), (name, publisher_id))
 
     def _get_or_create_subseries(self, name: str, series_id: int) -> int:
         """Get or create a subseries and return its ID."""
-        cursor = self.connection.cursor()
-        try:
-            # Use ? placeholders for SQLite, %s for MySQL
-            query = """
-                SELECT id FROM subseries 
-                WHERE name = ? AND series_id = ?
-            """ if self.db_type == 'sqlite' else """
-                SELECT id FROM subseries 
-                WHERE name = %s AND series_id = %s
-            """
-            cursor.execute(query, (name, series_id))
-            result = cursor.fetchone()
-            
-            if result:
-                return result[0]
-            else:
-                # Use ? placeholders for SQLite, %s for MySQL
-                query = """
-                    INSERT INTO subseries (name, series_id) 
-                    VALUES (?, ?)
-                """ if self.db_type == 'sqlite' else """
-                    INSERT INTO subseries (name, series_id) 
-                    VALUES (%s, %s)
-                """
-                cursor.execute(query, (name, series_id))
-                return cursor.lastrowid
-        finally:
-            cursor.close()
+        return self._get_or_create('subseries', ('name', 'series_id'), (name, series_id))
 
     def _get_or_create_author(self, name: str) -> int:
         """Get or create an author and return its ID."""
-        cursor = self.connection.cursor()
+        return self._get_or_create('authors', ('name',), (name,))
+
+    @on_writer
+    def _get_or_create(self, table: str, columns: Tuple[str, ...], key: tuple) -> int:
+        """Resolve one natural key to its ID, inserting and committing the row if it is new."""
+        cursor = self._cursor()
         try:
-            # Use ? placeholder for SQLite, %s for MySQL
-            query = "SELECT id FROM authors WHERE name = ?" if self.db_type == 'sqlite' else \
-                    "SELECT id FROM authors WHERE name = %s"
-            cursor.execute(query, (name,))
-            result = cursor.fetchone()
-            
-            if result:
-                return result[0]
-            else:
-                # Use ? placeholder for SQLite, %s for MySQL
-                query = "INSERT INTO authors (name) VALUES (?)" if self.db_type == 'sqlite' else \
-                        "INSERT INTO authors (name) VALUES (%s)"
-                cursor.execute(query, (name,))
-                return cursor.lastrowid
+            row_id = self._resolve_ids(cursor, table, columns, {key})[key]
+            self.connection.commit()
+            return row_id
+        except Exception:
+            self.connection.rollback()
+            self._lookups.invalidate()
+            raise
         finally:
             cursor.close()
 
@@ -841,18 +1744,20 @@ class ComicDatabase:
             logger.error(f"Error getting publishers: {e}")
             return []
     
-    def add_comic_from_file(self, file_path: str) -> Optional[int]:
-        """Add a comic to the database from a file.
+    def extract_comic_record(self, file_path: str, scanner=None) -> Dict[str, Any]:
+        """Extract the metadata of a comic file, ready to be added to the database.
         
         Args:
             file_path: Path to the comic file (CBR, CBZ, PDF)
+            scanner: Optional ComicScanner to reuse, e.g. one attached to an
+                ArchivePrefetcher during a directory scan
             
         Returns:
-            ID of the added comic, or None if failed.
-            Raises:
-                FileNotFoundError: If the file doesn't exist
-                ValueError: If the file is not a valid comic or is corrupted
-                Exception: For other unexpected errors
+            Metadata dictionary as produced by ComicScanner.scan_file
+            
+        Raises:
+            FileNotFoundError: If the file doesn't exist
+            ValueError: If the file is not a valid comic or is corrupted
         """
         from struttura.comic_scanner import ComicScanner, ComicMetadata
         
@@ -862,111 +1767,51 @@ class ComicDatabase:
             
         if not os.path.isfile(file_path):
             raise ValueError(f"Path is not a file: {file_path}")
-            
-        try:
-            # Initialize scanner and extract metadata
+        
+        # Initialize scanner and extract metadata
+        if scanner is None:
             scanner = ComicScanner()
-            metadata_dict = scanner.scan_file(file_path)
+        metadata_dict = scanner.scan_file(file_path)
+        
+        # Check for errors in metadata extraction
+        if not metadata_dict:
+            error_msg = f"Failed to process file (unknown error): {file_path}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
             
-            # Check for errors in metadata extraction
-            if not metadata_dict:
-                error_msg = f"Failed to process file (unknown error): {file_path}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            if 'error' in metadata_dict:
-                error_msg = f"Failed to process file: {metadata_dict['error']}"
-                logger.error(error_msg)
-                raise ValueError(error_msg)
-                
-            try:
-                metadata = ComicMetadata.from_dict(metadata_dict)
-            except Exception as e:
-                error_msg = f"Invalid metadata format in {file_path}: {str(e)}"
-                logger.error(error_msg)
-                raise ValueError(error_msg) from e
+        if 'error' in metadata_dict:
+            error_msg = f"Failed to process file: {metadata_dict['error']}"
+            logger.error(error_msg)
+            raise ValueError(error_msg)
             
-            # Start transaction
-            cursor = self.connection.cursor()
+        try:
+            ComicMetadata.from_dict(metadata_dict)
+        except Exception as e:
+            error_msg = f"Invalid metadata format in {file_path}: {str(e)}"
+            logger.error(error_msg)
+            raise ValueError(error_msg) from e
+        
+        return metadata_dict
+    
+    def add_comic_from_file(self, file_path: str, scanner=None) -> Optional[int]:
+        """Add a comic to the database from a file.
+        
+        Args:
+            file_path: Path to the comic file (CBR, CBZ, PDF)
+            scanner: Optional ComicScanner to reuse, e.g. one attached to an
+                ArchivePrefetcher during a directory scan
             
-            try:
-                # Get or create publisher
-                publisher_id = None
-                if metadata.publisher:
-                    publisher_id = self._get_or_create_publisher(metadata.publisher)
-                
-                # Get or create series
-                series_id = None
-                if metadata.series:
-                    series_id = self._get_or_create_series(metadata.series, publisher_id)
-                
-                # Get or create subseries if available
-                subseries_id = None
-                if metadata.subseries and series_id:
-                    subseries_id = self._get_or_create_subseries(metadata.subseries, series_id)
-                
-                # Get file attributes with defaults
-                file_extension = os.path.splitext(file_path)[1] if hasattr(metadata, 'file_extension') else os.path.splitext(file_path)[1]
-                file_created = getattr(metadata, 'file_created', None) or os.path.getctime(file_path)
-                file_modified = getattr(metadata, 'file_modified', None) or os.path.getmtime(file_path)
-                file_size = getattr(metadata, 'file_size', None) or os.path.getsize(file_path)
-                
-                # Create a serializable version of metadata_dict
-                serializable_metadata = {}
-                for key, value in metadata_dict.items():
-                    # Skip binary data or other non-serializable values
-                    if isinstance(value, (str, int, float, bool, type(None))):
-                        serializable_metadata[key] = value
-                    elif isinstance(value, (list, tuple, dict)):
-                        # Recursively check nested structures
-                        try:
-                            json.dumps(value)  # Test if value is JSON serializable
-                            serializable_metadata[key] = value
-                        except (TypeError, OverflowError):
-                            serializable_metadata[key] = str(value)  # Convert to string if not serializable
-                    else:
-                        serializable_metadata[key] = str(value)  # Convert to string for other types
-                
-                # Insert comic
-                cursor.execute("""
-                    INSERT INTO comics (
-                        title, series_id, subseries_id, issue_number, year, 
-                        publisher, summary, page_count, file_path, file_size, 
-                        file_modified, file_created, file_extension, 
-                        isbn, notes, cover_image, metadata
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    RETURNING id
-                """, (
-                    metadata.title, series_id, subseries_id, 
-                    getattr(metadata, 'issue_number', None), 
-                    getattr(metadata, 'year', None),
-                    getattr(metadata, 'publisher', None), 
-                    getattr(metadata, 'summary', None), 
-                    getattr(metadata, 'page_count', None), 
-                    file_path, file_size,
-                    file_modified, file_created, file_extension,
-                    getattr(metadata, 'isbn', None), 
-                    getattr(metadata, 'notes', None), 
-                    getattr(metadata, 'cover_image', None), 
-                    json.dumps(serializable_metadata)
-                ))
-                
-                comic_id = cursor.fetchone()[0]
-                
-                # Add authors
-                if metadata.authors:
-                    for author_name in metadata.authors:
-                        author_id = self._get_or_create_author(author_name)
-                        self._add_comic_author(comic_id, author_id, "Writer")
-                
-                self.connection.commit()
-                logger.info(f"Successfully added comic: {metadata.title} (ID: {comic_id})")
-                return comic_id
-                
-            except Exception as e:
-                self.connection.rollback()
-                logger.error(f"Database error while adding comic {file_path}: {str(e)}", exc_info=True)
-                raise  # Re-raise the exception with full traceback
+        Returns:
+            ID of the added comic, or None if failed.
+            Raises:
+                FileNotFoundError: If the file doesn't exist
+                ValueError: If the file is not a valid comic or is corrupted
+                Exception: For other unexpected errors
+        """
+        try:
+            # Extraction runs on the caller's thread, only the insert is queued
+            metadata_dict = self.extract_comic_record(file_path, scanner)
+            return self._add_comic_record(file_path, metadata_dict)
                 
         except Exception as e:
             # Log the error with full traceback
@@ -979,20 +1824,512 @@ class ComicDatabase:
             # For other errors, wrap in a more descriptive exception
             raise Exception(f"Failed to add comic from {file_path}: {str(e)}") from e
     
+    @on_writer
+    def _add_comic_record(self, file_path: str, metadata_dict: Dict[str, Any]) -> int:
+        """Insert one extracted comic in its own transaction."""
+        # Single transaction for the comic, its authors and its page index
+        cursor = self._cursor()
+        try:
+            comic_id, outcome = self._insert_comics(cursor, [(file_path, metadata_dict)])[0]
+            self.connection.commit()
+            logger.info(f"Comic {outcome}: {metadata_dict.get('title')} (ID: {comic_id})")
+            return comic_id
+            
+        except Exception as e:
+            self.connection.rollback()
+            self._lookups.invalidate()
+            logger.error(f"Database error while adding comic {file_path}: {str(e)}", exc_info=True)
+            raise  # Re-raise the exception with full traceback
+        finally:
+            cursor.close()
+    
+    def add_comics_bulk(self, records: Iterable[Dict[str, Any]],
+                        batch_size: Optional[int] = None) -> List[int]:
+        """Add or update many comics, committing once per batch.
+        
+        Publishers, series, subseries and authors are resolved through the
+        lookup cache, loaded once at the start, and comics, author links and page indexes are
+        written with executemany. Comics already in the database (by file
+        path) are updated if anything changed and left alone otherwise, so
+        rescanning a library only writes what changed. If a batch fails, it
+        is retried one comic at a time so only the offending records are
+        skipped.
+        
+        Args:
+            records: Metadata dictionaries from extract_comic_record or
+                ComicScanner.scan_file; each must contain 'file_path'
+            batch_size: Comics per transaction, defaults to BULK_BATCH_SIZE
+            
+        Returns:
+            IDs of the comics that were added or updated, in input order
+        """
+        batch_size = batch_size or self.BULK_BATCH_SIZE
+        self.preload_lookups()
+        added: List[int] = []
+        batch: List[Dict[str, Any]] = []
+        
+        for record in records:
+            if not record or 'error' in record or not record.get('file_path'):
+                logger.warning(f"Skipping invalid comic record: {(record or {}).get('error', record)}")
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                added.extend(self._flush_comic_batch(batch))
+                batch = []
+        
+        if batch:
+            added.extend(self._flush_comic_batch(batch))
+        return added
+    
+    @on_writer
+    def _flush_comic_batch(self, batch: List[Dict[str, Any]]) -> List[int]:
+        """Write one batch of comic records in a single transaction."""
+        cursor = self._cursor()
+        try:
+            try:
+                stored = self._insert_comics(cursor, [(r['file_path'], r) for r in batch])
+                self.connection.commit()
+                outcomes = Counter(outcome for _, outcome in stored)
+                logger.info(f"Stored a batch of {len(stored)} comics: {outcomes['added']} added, "
+                            f"{outcomes['updated']} updated, {outcomes['unchanged']} unchanged")
+                return [comic_id for comic_id, outcome in stored if outcome != 'unchanged']
+            except (sqlite3.Error, MySQLError) as e:
+                self.connection.rollback()
+                # Rows the batch inserted are gone, and so are their IDs
+                self._lookups.invalidate()
+                if len(batch) == 1:
+                    logger.error(f"Error adding comic {batch[0]['file_path']}: {e}")
+                    return []
+                logger.warning(f"Batch of {len(batch)} comics failed ({e}), retrying one at a time")
+            
+            comic_ids = []
+            for record in batch:
+                try:
+                    stored = self._insert_comics(cursor, [(record['file_path'], record)])
+                    self.connection.commit()
+                    comic_ids.extend(comic_id for comic_id, outcome in stored if outcome != 'unchanged')
+                except (sqlite3.Error, MySQLError) as e:
+                    self.connection.rollback()
+                    self._lookups.invalidate()
+                    logger.error(f"Error adding comic {record['file_path']}: {e}")
+            return comic_ids
+        finally:
+            cursor.close()
+    
+    # Columns written by _insert_comics, in the order of its rows
+    _COMIC_COLUMNS = ('title', 'series_id', 'subseries_id', 'issue_number', 'issue_sort_key',
+                      'year', 'publisher', 'summary', 'page_count', 'file_path', 'file_size',
+                      'file_modified', 'file_created', 'file_extension', 'isbn', 'notes',
+                      'cover_hash', 'metadata')
+    
+    def _upsert_clause(self, key: str, columns: Iterable[str]) -> str:
+        """Clause turning an INSERT into an update of ``columns`` when ``key`` already exists.
+        
+        Rows whose columns all equal the new values are left alone: no write,
+        no triggers and no new last_updated.
+        """
+        columns = list(columns)
+        if self.db_type == 'sqlite':
+            assignments = ', '.join(f"{column} = excluded.{column}" for column in columns)
+            unchanged = ' AND '.join(f"{column} IS excluded.{column}" for column in columns)
+            return (f"ON CONFLICT ({key}) DO UPDATE SET {assignments}, last_updated = CURRENT_TIMESTAMP "
+                    f"WHERE NOT ({unchanged})")
+        # MySQL assigns left to right: compare before the columns are overwritten
+        unchanged = ' AND '.join(f"{column} <=> VALUES({column})" for column in columns)
+        assignments = ', '.join(f"{column} = VALUES({column})" for column in columns)
+        return (f"ON DUPLICATE KEY UPDATE last_updated = IF({unchanged}, last_updated, CURRENT_TIMESTAMP), "
+                f"{assignments}")
+    
+    def _insert_comics(self, cursor, items: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[int, str]]:
+        """Insert or update comics with their related rows, without committing.
+        
+        Comics are matched by file path. New ones are inserted; existing
+        ones are updated only if a column changed, and then only their
+        author, tag and page rows that differ are rewritten. Unchanged comics
+        cost one lookup and no writes.
+        
+        Args:
+            cursor: Cursor of the open transaction
+            items: (file_path, metadata_dict) pairs
+            
+        Returns:
+            (comic ID, 'added', 'updated' or 'unchanged') per item, in the
+            order of items
+        """
+        # Resolve the lookup tables for the whole batch at once
+        publisher_ids = self._resolve_ids(cursor, 'publishers', ('name',), {
+            (m['publisher'],) for _, m in items if m.get('publisher')
+        })
+        
+        def series_key(metadata):
+            publisher_id = publisher_ids.get((metadata.get('publisher'),))
+            return (metadata['series'], publisher_id)
+        
+        series_ids = self._resolve_ids(cursor, 'series', ('name', 'publisher_id'), {
+            series_key(m) for _, m in items if m.get('series')
+        })
+        
+        def series_id_of(metadata):
+            return series_ids.get(series_key(metadata)) if metadata.get('series') else None
+        
+        subseries_ids = self._resolve_ids(cursor, 'subseries', ('name', 'series_id'), {
+            (m['subseries'], series_id_of(m)) for _, m in items
+            if m.get('subseries') and series_id_of(m)
+        })
+        author_ids = self._resolve_ids(cursor, 'authors', ('name',), {
+            (name,) for _, m in items for name in (m.get('authors') or []) if name
+        })
+        item_tags = [metadata_tags(m) for _, m in items]
+        tag_ids = self._resolve_ids(cursor, 'tags', ('name', 'kind'), {
+            tag for tags in item_tags for tag in tags
+        })
+        
+        rows = []
+        cover_hashes = []
+        for file_path, metadata in items:
+            data = metadata.get('cover_image')
+            key = cover_hash(data) if data else None
+            cover_hashes.append(key)
+            series_id = series_id_of(metadata)
+            subseries_id = subseries_ids.get((metadata.get('subseries'), series_id))
+            rows.append((
+                metadata.get('title'), series_id, subseries_id,
+                metadata.get('issue_number'),
+                issue_sort_key(metadata.get('issue_number')),
+                metadata.get('year'),
+                metadata.get('publisher'),
+                metadata.get('summary'),
+                metadata.get('page_count'),
+                file_path,
+                metadata.get('file_size') or os.path.getsize(file_path),
+                metadata.get('file_modified') or os.path.getmtime(file_path),
+                metadata.get('file_created') or os.path.getctime(file_path),
+                os.path.splitext(file_path)[1],
+                metadata.get('isbn'),
+                metadata.get('notes'),
+                key,
+                json.dumps(self._serializable_metadata(metadata))
+            ))
+        
+        # Compare with what is stored; the last record of a path wins
+        existing = self._stored_comics(cursor, [file_path for file_path, _ in items])
+        last_of_path = {file_path: index for index, (file_path, _) in enumerate(items)}
+        written = [
+            index for file_path, index in last_of_path.items()
+            if file_path not in existing or existing[file_path][1] != rows[index]
+        ]
+        
+        # Identical covers are stored once
+        covers = {}
+        for index in written:
+            data = items[index][1].get('cover_image')
+            if data:
+                key = cover_hashes[index]
+                covers.setdefault(key, (key, items[index][1].get('cover_image_type'), len(data), data))
+        if covers:
+            cursor.executemany(cover_insert_statement(self.db_type), list(covers.values()))
+        
+        if written:
+            updated_columns = [c for c in self._COMIC_COLUMNS if c != 'file_path']
+            cursor.executemany(f"""
+                INSERT INTO comics ({', '.join(self._COMIC_COLUMNS)})
+                VALUES ({placeholders(self.db_type, len(self._COMIC_COLUMNS))})
+                {self._upsert_clause('file_path', updated_columns)}
+            """, [rows[index] for index in written])
+        
+        # executemany does not report the new IDs; look them up by path
+        new_paths = {(items[index][0],) for index in written if items[index][0] not in existing}
+        comic_ids = {path: comic_id for (path,), comic_id in self._resolve_ids(
+            cursor, 'comics', ('file_path',), new_paths, create=False).items()}
+        comic_ids.update((path, stored[0]) for path, stored in existing.items())
+        
+        page_rows = set()
+        author_rows = set()
+        tag_rows = set()
+        for index in written:
+            file_path, metadata = items[index]
+            comic_id = comic_ids[file_path]
+            for page in metadata.get('pages') or []:
+                page_rows.add((
+                    comic_id, page['page_index'], page['member_name'], page.get('file_size'),
+                    page.get('compressed_size'), page.get('data_offset'),
+                    page.get('width'), page.get('height')
+                ))
+            for name in metadata.get('authors') or []:
+                if name:
+                    author_rows.add((comic_id, author_ids[(name,)], 'Writer'))
+            tag_rows.update((comic_id, tag_ids[tag]) for tag in item_tags[index])
+        
+        # Only updated comics can have rows to compare with
+        updated_ids = {comic_ids[items[index][0]] for index in written if items[index][0] in existing}
+        comic_ids_written = {comic_ids[items[index][0]] for index in written}
+        self._reconcile_rows(cursor, 'comic_pages', ('comic_id', 'page_index', 'member_name', 'file_size',
+                                                     'compressed_size', 'data_offset', 'width', 'height'),
+                             2, comic_ids_written, updated_ids, page_rows)
+        self._reconcile_author_links(cursor, ('comic_id', 'author_id', 'role'),
+                                     comic_ids_written, updated_ids, author_rows)
+        self._reconcile_rows(cursor, 'comic_tags', ('comic_id', 'tag_id'), 2,
+                             comic_ids_written, updated_ids, tag_rows)
+        
+        written_paths = {items[index][0] for index in written}
+        return [
+            (comic_ids[file_path],
+             'unchanged' if file_path not in written_paths or last_of_path[file_path] != index
+             else 'updated' if file_path in existing else 'added')
+            for index, (file_path, _) in enumerate(items)
+        ]
+    
+    def _stored_comics(self, cursor, paths: List[str]) -> Dict[str, Tuple[int, tuple]]:
+        """Map the file paths already in the database to (ID, row in _COMIC_COLUMNS order)."""
+        path_index = 1 + self._COMIC_COLUMNS.index('file_path')
+        stored = {}
+        values = sorted(set(paths))
+        for start in range(0, len(values), self.LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + self.LOOKUP_CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT id, {', '.join(self._COMIC_COLUMNS)} FROM comics "
+                f"WHERE file_path IN ({placeholders(self.db_type, len(chunk))})",
+                chunk
+            )
+            for row in cursor.fetchall():
+                row = tuple(row)
+                stored[row[path_index]] = (row[0], row[1:])
+        return stored
+    
+    def _current_rows(self, cursor, table: str, columns: Tuple[str, ...], comic_ids: Iterable[int]) -> set:
+        """Rows of a table whose first column is comic_id, for the given comics."""
+        rows = set()
+        ids = sorted(comic_ids)
+        for start in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + self.LOOKUP_CHUNK_SIZE]
+            cursor.execute(
+                f"SELECT {', '.join(columns)} FROM {table} "
+                f"WHERE comic_id IN ({placeholders(self.db_type, len(chunk))})",
+                chunk
+            )
+            rows.update(tuple(row) for row in cursor.fetchall())
+        return rows
+    
+    def _reconcile_rows(self, cursor, table: str, columns: Tuple[str, ...], key_length: int,
+                        comic_ids: set, stored_ids: set, wanted: set,
+                        current: Optional[set] = None, pause: Tuple[str, ...] = ()) -> set:
+        """Make a table's rows for ``comic_ids`` equal to ``wanted``, writing only the differences.
+        
+        Args:
+            cursor: Cursor of the open transaction
+            table: Table whose first column is comic_id
+            columns: Columns of the rows in ``wanted``
+            key_length: Number of leading columns forming the primary key
+            comic_ids: Comics whose rows are replaced
+            stored_ids: The subset of comic_ids that may already have rows
+            wanted: Rows the comics must have
+            current: The rows of stored_ids, if already read
+            pause: Trigger groups paused while the rows are written
+            
+        Returns:
+            IDs of the comics whose rows changed
+        """
+        if current is None:
+            current = self._current_rows(cursor, table, columns, stored_ids)
+        
+        wanted = {row for row in wanted if row[0] in comic_ids}
+        stale = sorted(row[:key_length] for row in current - wanted)
+        missing = sorted(wanted - current, key=repr)
+        if not stale and not missing:
+            return set()
+        with paused(cursor, *pause):
+            if stale:
+                marker = placeholders(self.db_type)
+                key = ' AND '.join(f"{column} = {marker}" for column in columns[:key_length])
+                cursor.executemany(f"DELETE FROM {table} WHERE {key}", stale)
+            if missing:
+                cursor.executemany(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({placeholders(self.db_type, len(columns))})",
+                    missing
+                )
+        return {row[0] for row in stale} | {row[0] for row in missing}
+    
+    def _reconcile_author_links(self, cursor, columns: Tuple[str, ...], comic_ids: set,
+                                stored_ids: set, wanted: set, current: Optional[set] = None) -> None:
+        """_reconcile_rows for comic_authors, rebuilding each changed comic's search document once.
+        
+        The comic_authors search triggers would rebuild a comic's document
+        for every link written; they are paused and the documents of the
+        changed comics are rebuilt a chunk at a time afterwards.
+        """
+        if not self._search_index_in(cursor):
+            self._reconcile_rows(cursor, 'comic_authors', columns, 3, comic_ids, stored_ids,
+                                 wanted, current=current)
+            return
+        changed = self._reconcile_rows(cursor, 'comic_authors', columns, 3, comic_ids, stored_ids,
+                                       wanted, current=current, pause=(SEARCH_TRIGGERS,))
+        ids = sorted(changed)
+        for start in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+            chunk = ids[start:start + self.LOOKUP_CHUNK_SIZE]
+            for statement in refresh_statements(f"c.id IN ({placeholders(self.db_type, len(chunk))})"):
+                cursor.execute(statement, chunk)
+    
+    def _search_index_in(self, cursor) -> bool:
+        """_has_search_index for the writer's open transaction, read through its cursor."""
+        if self.db_type != 'sqlite':
+            return False
+        if self._search_index is None:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?",
+                           (FTS_TABLE,))
+            self._search_index = bool(cursor.fetchall())
+        return self._search_index
+    
+    def _resolve_ids(self, cursor, table: str, columns: Tuple[str, ...],
+                     keys: set, create: bool = True) -> Dict[tuple, int]:
+        """Map natural keys to row IDs, inserting the missing rows in one statement.
+        
+        Publishers, series, subseries and authors are answered from the
+        lookup cache; the database is only queried for rows it inserts.
+        
+        Args:
+            cursor: Cursor of the open transaction
+            table: Table to look up
+            columns: Columns forming the natural key; the first one is used
+                to narrow the lookup
+            keys: Set of key tuples, in the order of columns
+            create: Insert keys that do not exist yet
+            
+        Returns:
+            Dictionary from key tuple to ID
+        """
+        ids: Dict[tuple, int] = {}
+        cached = self._lookup_ids(cursor, table) if table in LOOKUP_TABLES else None
+        
+        def lookup(wanted: set) -> None:
+            values = sorted({key[0] for key in wanted})
+            for start in range(0, len(values), self.LOOKUP_CHUNK_SIZE):
+                chunk = values[start:start + self.LOOKUP_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT id, {', '.join(columns)} FROM {table} "
+                    f"WHERE {columns[0]} IN ({placeholders(self.db_type, len(chunk))})",
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    row = tuple(row)
+                    if row[1:] in wanted:
+                        ids[row[1:]] = row[0]
+        
+        if not keys:
+            return ids
+        if cached is not None:
+            # The cache holds the whole table, so a miss is a new row
+            ids.update((key, cached[key]) for key in keys if key in cached)
+        else:
+            lookup(keys)
+        
+        missing = sorted((key for key in keys if key not in ids), key=repr)
+        if missing and create:
+            cursor.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({placeholders(self.db_type, len(columns))})",
+                missing
+            )
+            lookup(set(missing))
+            if cached is not None:
+                cached.update((key, ids[key]) for key in missing if key in ids)
+        return ids
+    
+    def _lookup_ids(self, cursor, table: str) -> Dict[tuple, int]:
+        """Cached key -> ID map of a dimension table, current for ``cursor``'s connection."""
+        if self.db_type == 'sqlite':
+            cursor.execute("PRAGMA data_version")
+            self._lookups.check_version(cursor.fetchone()[0])
+        return self._lookups.ids(cursor, table)
+    
+    @on_writer
+    def preload_lookups(self) -> None:
+        """Load the publisher, series, subseries and author IDs in bulk.
+        
+        Called at the start of an import, so names already in the database
+        resolve without queries. MySQL has no cheap way to notice other
+        clients' changes, so its cache is reloaded at every import.
+        """
+        if self.db_type != 'sqlite':
+            self._lookups.invalidate()
+        cursor = self._cursor()
+        try:
+            for table in LOOKUP_TABLES:
+                self._lookup_ids(cursor, table)
+        except (sqlite3.Error, MySQLError) as e:
+            logger.warning(f"Could not preload lookup tables: {e}")
+            self._lookups.invalidate()
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _serializable_metadata(metadata_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the JSON-safe copy of the metadata stored with each comic."""
+        serializable_metadata = {}
+        for key, value in metadata_dict.items():
+            # Stored in their own columns and tables
+            if key in ('pages', 'cover_image'):
+                continue
+            # Skip binary data or other non-serializable values
+            if isinstance(value, (str, int, float, bool, type(None))):
+                serializable_metadata[key] = value
+            elif isinstance(value, (list, tuple, dict)):
+                # Recursively check nested structures
+                try:
+                    json.dumps(value)  # Test if value is JSON serializable
+                    serializable_metadata[key] = value
+                except (TypeError, OverflowError):
+                    serializable_metadata[key] = str(value)  # Convert to string if not serializable
+            else:
+                serializable_metadata[key] = str(value)  # Convert to string for other types
+        return serializable_metadata
+    
+    def get_pages(self, comic_id: int) -> List[Dict[str, Any]]:
+        """Get the page index of a comic in reading order.
+        
+        Args:
+            comic_id: ID of the comic
+            
+        Returns:
+            List of page dictionaries, empty if the comic has no index
+        """
+        try:
+            return self.execute_query(
+                "SELECT * FROM comic_pages WHERE comic_id = %s ORDER BY page_index",
+                (comic_id,),
+                fetch=True
+            ) or []
+        except Exception as e:
+            logger.error(f"Error getting pages for comic {comic_id}: {e}")
+            return []
+    
+    def get_page(self, comic_id: int, page_index: int) -> Optional[Dict[str, Any]]:
+        """Locate a single page of a comic without listing its archive.
+        
+        Args:
+            comic_id: ID of the comic
+            page_index: Zero-based page number in reading order
+            
+        Returns:
+            Page dictionary with member name, sizes, data offset and
+            dimensions, or None if not indexed
+        """
+        try:
+            rows = self.execute_query(
+                "SELECT * FROM comic_pages WHERE comic_id = %s AND page_index = %s",
+                (comic_id, page_index),
+                fetch=True
+            )
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Error getting page {page_index} of comic {comic_id}: {e}")
+            return None
+    
     def _add_comic_author(self, comic_id: int, author_id: int, role: str) -> bool:
         """Add an author to a comic with a specific role."""
         try:
-            # Use ? placeholders for SQLite compatibility
-            query = """
-                INSERT INTO comic_authors (comic_id, author_id, role)
-                VALUES (?, ?, ?)
-                ON CONFLICT DO NOTHING
-            """ if self.db_type == 'sqlite' else """
-                INSERT INTO comic_authors (comic_id, author_id, role)
-                VALUES (%s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """
-            self.execute_query(query, (comic_id, author_id, role))
+            self.execute_query(self._ADD_COMIC_AUTHOR,
+                               {'comic_id': comic_id, 'author_id': author_id, 'role': role})
             return True
         except Exception as e:
             logger.error(f"Error adding author to comic: {e}")
@@ -1008,26 +2345,82 @@ class ComicDatabase:
             List of series dictionaries with 'id', 'name', and 'publisher' keys
         """
         try:
-            query = """
-                SELECT s.id, s.name, p.name as publisher
-                FROM series s
-                LEFT JOIN publishers p ON s.publisher_id = p.id
-            """
-            params = []
-            
             if publisher:
-                query += " WHERE p.name = ?"
-                params.append(publisher)
-                
-            query += " ORDER BY s.name"
-            
-            return self.execute_query(query, params, fetch=True) or []
+                return self.execute_query(self._SERIES_OF_PUBLISHER, {'publisher': publisher},
+                                          fetch=True) or []
+            return self.execute_query(self._SERIES, fetch=True) or []
         except Exception as e:
             logger.error(f"Error getting series: {e}")
             return []
     
+    def get_library_stats(self, facets: Tuple[str, ...] = ('publisher', 'series', 'year',
+                                                           'format', 'genre')) -> Dict[str, Any]:
+        """Get the library totals from the statistics counters.
+        
+        Only the counters are read, never the comics; the cost grows with the
+        number of distinct values of the requested facets.
+        
+        Args:
+            facets: Facets to count the distinct values of
+            
+        Returns:
+            Dictionary with ``comics`` (total number of comics) and
+            ``distinct`` (number of values with at least one comic, by facet)
+        """
+        try:
+            rows = self.execute_query(f"""
+                SELECT facet,
+                       SUM(count) AS comics,
+                       SUM(CASE WHEN count > 0 AND value <> '' THEN 1 ELSE 0 END) AS n
+                FROM {FACETS_TABLE}
+                WHERE facet IN ({', '.join(['%s'] * (len(facets) + 1))})
+                GROUP BY facet
+            """, ('total',) + tuple(facets), fetch=True) or []
+        except Exception as e:
+            logger.error(f"Error getting library statistics: {e}")
+            return {'comics': 0, 'distinct': {}}
+        
+        stats = {'comics': 0, 'distinct': {}}
+        for row in rows:
+            if row['facet'] == 'total':
+                stats['comics'] = int(row['comics'] or 0)
+            else:
+                stats['distinct'][row['facet']] = int(row['n'] or 0)
+        return stats
+    
+    def get_facet_counts(self, facet: str) -> List[Dict[str, Any]]:
+        """Get the number of comics per value of a facet.
+        
+        Args:
+            facet: 'publisher', 'series', 'year', 'format' or a tag kind
+                such as 'genre' or 'character'
+            
+        Returns:
+            List of dictionaries with 'value' (ID for publishers, series and
+            tags, '' for comics without one), 'label' and 'count', by label
+        """
+        join, label = label_join(facet)
+        try:
+            return self.execute_query(f"""
+                SELECT f.value, {label} AS label, f.count
+                FROM {FACETS_TABLE} f {join}
+                WHERE f.facet = %s AND f.count > 0
+                ORDER BY label
+            """, (facet,), fetch=True) or []
+        except Exception as e:
+            logger.error(f"Error getting {facet} counts: {e}")
+            return []
+    
     def get_comic_count(self) -> int:
         """Get the total number of comics in the database."""
+        try:
+            # Kept current by the statistics triggers
+            result = self.execute_query(
+                f"SELECT count FROM {FACETS_TABLE} WHERE facet = 'total' AND value = ''", fetch=True)
+            if result:
+                return result[0]['count']
+        except Exception as e:
+            logger.debug(f"No comic statistics, counting comics: {e}")
         try:
             result = self.execute_query("SELECT COUNT(*) as count FROM comics", fetch=True)
             return result[0]['count'] if result else 0
@@ -1053,6 +2446,7 @@ class ComicDatabase:
             logger.error(f"Error getting publisher count: {e}")
             return 0
             
+    @on_writer
     def delete_comic(self, comic_id: int) -> bool:
         """Delete a comic and its related data from the database.
         
@@ -1062,33 +2456,122 @@ class ComicDatabase:
         Returns:
             bool: True if deletion was successful, False otherwise
         """
-        if not self.is_connected() and not self.connect():
-            logger.error("Cannot delete comic: No database connection")
-            return False
+        deleted = self.delete_comics([comic_id], collect_garbage=False)
+        if deleted:
+            logger.info(f"Successfully deleted comic with ID {comic_id}")
+        elif deleted == 0:
+            logger.warning(f"No comic found with ID {comic_id} to delete")
+        return bool(deleted)
+    
+    @on_writer
+    def delete_comics(self, comic_ids: Iterable[int], collect_garbage: bool = True) -> Optional[int]:
+        """Delete many comics and their related rows in one transaction.
+        
+        Each table is cleared with one DELETE per LOOKUP_CHUNK_SIZE IDs
+        rather than one round trip per comic. On SQLite the per-row delete
+        triggers are paused as well: the facet counters, search documents
+        and browse rows of each chunk are updated by grouped statements.
+        
+        Args:
+            comic_ids: IDs of the comics to delete
+            collect_garbage: Then remove the publishers, series, authors,
+                tags and covers no comic uses any more (see collect_garbage)
             
-        cursor = self.connection.cursor()
+        Returns:
+            Number of comics deleted, or None if the deletion failed and
+            was rolled back
+        """
+        if not self.is_connected() and not self.connect():
+            logger.error("Cannot delete comics: No database connection")
+            return None
+        
+        # Related rows first: one DELETE per table beats a cascade per comic,
+        # and MySQL cascades would bypass the statistics triggers
+        tables = ('comic_pages', 'comic_authors', 'comic_tags', 'comics')
+        # MySQL triggers cannot be paused and keep firing per row
+        pause = (FACETS_TRIGGERS, BROWSE_TRIGGERS, SEARCH_TRIGGERS) if self.db_type == 'sqlite' else ()
+        ids = sorted(set(comic_ids))
+        deleted = 0
+        cursor = self._cursor()
         try:
-            # First delete from comic_authors (due to foreign key constraints)
-            if self.db_type == 'sqlite':
-                cursor.execute("DELETE FROM comic_authors WHERE comic_id = ?", (comic_id,))
-                cursor.execute("DELETE FROM comics WHERE id = ?", (comic_id,))
-            else:  # MySQL
-                cursor.execute("DELETE FROM comic_authors WHERE comic_id = %s", (comic_id,))
-                cursor.execute("DELETE FROM comics WHERE id = %s", (comic_id,))
-                
+            with paused(cursor, *pause):
+                for start in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+                    chunk = ids[start:start + self.LOOKUP_CHUNK_SIZE]
+                    in_list = placeholders(self.db_type, len(chunk))
+                    if pause:
+                        # What the paused triggers would do, while the rows still exist
+                        maintenance = facet_remove_statements(self.db_type, in_list)
+                        maintenance.append(f"DELETE FROM {BROWSE_TABLE} WHERE comic_id IN ({in_list})")
+                        if self._search_index_in(cursor):
+                            maintenance.append(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({in_list})")
+                        for statement in maintenance:
+                            cursor.execute(statement, chunk)
+                    for table in tables:
+                        key = 'id' if table == 'comics' else 'comic_id'
+                        cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({in_list})", chunk)
+                        if table == 'comics':
+                            deleted += cursor.rowcount
+            if collect_garbage:
+                self._collect_garbage(cursor)
             self.connection.commit()
-            deleted = cursor.rowcount > 0
-            if deleted:
-                logger.info(f"Successfully deleted comic with ID {comic_id}")
-            else:
-                logger.warning(f"No comic found with ID {comic_id} to delete")
-            return deleted
-            
-        except Exception as e:
-            logger.error(f"Error deleting comic {comic_id}: {e}")
-            if self.connection:
-                self.connection.rollback()
-            return False
+        except (sqlite3.Error, MySQLError) as e:
+            logger.error(f"Error deleting {len(ids)} comics: {e}")
+            self.connection.rollback()
+            self._lookups.invalidate()
+            return None
         finally:
-            if cursor:
-                cursor.close()
+            cursor.close()
+        
+        if len(ids) > 1:
+            logger.info(f"Deleted {deleted} comics")
+        return deleted
+    
+    # What collect_garbage deletes, in order: a row is garbage once nothing
+    # references it, and removing subseries and series can orphan more rows
+    _GARBAGE = (
+        ('subseries', "NOT EXISTS (SELECT 1 FROM comics c WHERE c.subseries_id = subseries.id)"),
+        ('series', "NOT EXISTS (SELECT 1 FROM comics c WHERE c.series_id = series.id) "
+                   "AND NOT EXISTS (SELECT 1 FROM subseries ss WHERE ss.series_id = series.id)"),
+        ('publishers', "NOT EXISTS (SELECT 1 FROM series s WHERE s.publisher_id = publishers.id)"),
+        ('authors', "NOT EXISTS (SELECT 1 FROM comic_authors ca WHERE ca.author_id = authors.id)"),
+        ('tags', "NOT EXISTS (SELECT 1 FROM comic_tags ct WHERE ct.tag_id = tags.id)"),
+        (COVERS_TABLE, f"NOT EXISTS (SELECT 1 FROM comics c WHERE c.cover_hash = {COVERS_TABLE}.hash)"),
+        # Counters of values that no longer have comics
+        (FACETS_TABLE, "count = 0"),
+    )
+    
+    @on_writer
+    def collect_garbage(self) -> Dict[str, int]:
+        """Delete the rows no comic references any more.
+        
+        Removes publishers without series, series and subseries without
+        comics, authors and tags without links, covers no comic shows and
+        statistics counters at zero, one set-based DELETE per table in a
+        single transaction. Each check is an index lookup per candidate row.
+        
+        Returns:
+            Number of rows deleted per table, or an empty dictionary on error
+        """
+        cursor = self._cursor()
+        try:
+            removed = self._collect_garbage(cursor)
+            self.connection.commit()
+            return removed
+        except (sqlite3.Error, MySQLError) as e:
+            logger.error(f"Error collecting unreferenced rows: {e}")
+            self.connection.rollback()
+            return {}
+        finally:
+            cursor.close()
+    
+    def _collect_garbage(self, cursor) -> Dict[str, int]:
+        removed = {}
+        for table, condition in self._GARBAGE:
+            cursor.execute(f"DELETE FROM {table} WHERE {condition}")
+            removed[table] = cursor.rowcount
+        # Deleted dimension rows may still be cached
+        self._lookups.invalidate()
+        if any(removed.values()):
+            logger.info("Removed unreferenced rows: " +
+                        ', '.join(f"{count} {table}" for table, count in removed.items() if count))
+        return removed
@@ -0,0 +1,178 @@
+"""
+Concurrency primitives for the SQLite backend.
+
+SQLite allows many readers but only one writer at a time. Instead of letting
+every thread write through whatever connection it happens to hold, all
+mutations are funnelled through a :class:`WriterThread` that owns the single
+writable connection and executes queued jobs in order, handing results back
+through futures. Reads are served by a :class:`ReaderPool` of read-only
+connections, which in WAL mode never wait for the writer.
+"""
+import contextlib
+import logging
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class WriterThread:
+    """
+    A thread that owns a database connection and runs write jobs one by one.
+
+    Example:
+        writer = WriterThread(connection)
+        future = writer.submit(insert_rows, rows)
+        ...
+        writer.close()
+    """
+
+    def __init__(self, connection: sqlite3.Connection, name: str = 'ComicDB-writer'):
+        """
+        Args:
+            connection: Writable connection, opened with check_same_thread=False
+            name: Thread name, shown in logs and debuggers
+        """
+        self.connection = connection
+        self._queue: 'queue.Queue[Optional[Tuple[Callable, tuple, dict, Future]]]' = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def is_current(self) -> bool:
+        """Check if the caller is running on the writer thread."""
+        return threading.current_thread() is self._thread
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs waiting to run."""
+        return self._queue.qsize()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """
+        Queue a job for the writer thread.
+
+        Returns:
+            Future resolved with the job's return value or exception
+
+        Raises:
+            RuntimeError: If the writer has been closed
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Database writer is closed")
+            self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run a job on the writer thread and wait for its result.
+
+        Calls made from the writer thread itself run inline, so jobs can use
+        other writing methods without deadlocking.
+        """
+        if self.is_current():
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            fn, args, kwargs, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                if self.connection.in_transaction:
+                    # Jobs commit their own work; never let a half-done
+                    # transaction leak into the next job
+                    logger.warning(f"Rolling back transaction left open by {getattr(fn, '__name__', fn)}")
+                    self.connection.rollback()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Finish the queued jobs, stop the thread and close the connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+
+        if not self.is_current():
+            self._thread.join(timeout)
+        try:
+            self.connection.commit()
+            self.connection.close()
+        except sqlite3.Error as e:
+            logger.error(f"Error closing writer connection: {e}")
+
+
+class ReaderPool:
+    """
+    A bounded pool of read-only connections.
+
+    Connections are opened lazily, up to ``size``; further callers wait until
+    one is returned.
+    """
+
+    def __init__(self, open_connection: Callable[[], sqlite3.Connection], size: int = 4):
+        """
+        Args:
+            open_connection: Factory for new read-only connections
+            size: Maximum number of connections
+        """
+        self._open_connection = open_connection
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle: 'queue.LifoQueue[Tuple[sqlite3.Connection, int]]' = queue.LifoQueue()
+        self._generation = 0
+        self._closed = False
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of the ``with`` block."""
+        if self._closed:
+            raise RuntimeError("Database reader pool is closed")
+
+        self._slots.acquire()
+        connection = None
+        try:
+            try:
+                connection, generation = self._idle.get_nowait()
+            except queue.Empty:
+                generation = self._generation
+                connection = self._open_connection()
+            yield connection
+        finally:
+            if connection is not None:
+                if self._closed or generation != self._generation:
+                    connection.close()
+                else:
+                    self._idle.put((connection, generation))
+            self._slots.release()
+
+    def reset(self) -> None:
+        """Replace all connections, e.g. after the connection settings changed."""
+        self._generation += 1
+        self._close_idle()
+
+    def close(self) -> None:
+        """Close idle connections; borrowed ones are closed when returned."""
+        self._closed = True
+        self._close_idle()
+
+    def _close_idle(self) -> None:
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            connection.close()
@@ -0,0 +1,127 @@
+"""
+Sortable keys for issue numbers.
+
+Issue numbers are free text: "1", "001", "1.5", "½", "1/2", "1A", "-1",
+"Annual 1", "TPB". Sorting them as text puts "10" before "2", and casting
+them to integers loses fractions and suffixes. :func:`issue_sort_key` turns
+an issue number into a fixed-layout string that sorts in reading order, so
+it can be stored in ``comics.issue_sort_key`` and served from the
+``(series_id, issue_sort_key)`` index instead of being computed per query.
+
+A key is made of:
+
+* a class: negative numbers, numbers, numbered specials ("Annual 1",
+  grouped by their word), then anything without a number;
+* the integer part, zero-padded, and the fractional part in ten-thousandths;
+* the suffix ("A" in "1A", "MU" in "1.MU"), lowercased, after the bare issue.
+
+Issues without a number get the empty key and come first.
+"""
+import re
+import unicodedata
+from typing import Any, Optional, Tuple
+
+# Longest key; the column is sized for it
+ISSUE_KEY_LENGTH = 64
+
+_INTEGER_DIGITS = 9
+_FRACTION_DIGITS = 4
+_WORD_WIDTH = 16
+_MAX_INTEGER = 10 ** _INTEGER_DIGITS - 1
+
+# Classes, in sort order
+_NEGATIVE, _NUMBER, _NUMBERED_SPECIAL, _TEXT = '0', '1', '2', '3'
+
+_NUMBER_RE = re.compile(
+    r'^(?P<sign>-)?(?P<integer>\d+)?'
+    r'(?:(?P<fraction>\.\d+)|/(?P<denominator>\d+)|\s*(?P<vulgar>[^\W\d_]?))?'
+    r'(?P<suffix>.*)$'
+)
+_SPECIAL_RE = re.compile(r'^(?P<word>[^\W\d_][^\d]*?)[\s#.-]*(?P<number>-?\d.*)$')
+
+
+def _vulgar_fraction(char: str) -> Optional[float]:
+    """Value of a fraction character like '½', None for anything else."""
+    if len(char) == 1 and unicodedata.category(char) == 'No':
+        value = unicodedata.numeric(char, None)
+        if value is not None and 0 < value < 1:
+            return value
+    return None
+
+
+def _parse_number(text: str) -> Optional[Tuple[bool, int, int, str]]:
+    """Split a numeric issue into (negative, integer, fraction, suffix), None if not numeric."""
+    text = text.strip()
+    value = _vulgar_fraction(text[:1])
+    if value is not None:
+        # "½" alone
+        return False, 0, round(value * 10 ** _FRACTION_DIGITS), text[1:]
+
+    match = _NUMBER_RE.match(text)
+    if not match or match.group('integer') is None:
+        return None
+    integer = min(int(match.group('integer')), _MAX_INTEGER)
+    fraction = 0
+    suffix = match.group('suffix')
+    if match.group('fraction'):
+        fraction = int(match.group('fraction')[1:_FRACTION_DIGITS + 1].ljust(_FRACTION_DIGITS, '0'))
+    elif match.group('denominator'):
+        denominator = int(match.group('denominator'))
+        if integer < denominator and denominator:
+            # "1/2" is a half issue
+            fraction = round(integer / denominator * 10 ** _FRACTION_DIGITS)
+            integer = 0
+        else:
+            suffix = f"/{match.group('denominator')}{suffix}"
+    elif match.group('vulgar'):
+        value = _vulgar_fraction(match.group('vulgar'))
+        if value is not None:
+            # "1½"
+            fraction = round(value * 10 ** _FRACTION_DIGITS)
+        else:
+            suffix = match.group('vulgar') + suffix
+    return bool(match.group('sign')), integer, fraction, suffix
+
+
+def _suffix_key(suffix: str) -> str:
+    return re.sub(r'[\W_]+', '', suffix.casefold())
+
+
+def issue_sort_key(issue_number: Any) -> str:
+    """
+    Sortable key of an issue number.
+
+    Examples:
+        >>> issue_sort_key('001') == issue_sort_key('1')
+        True
+        >>> sorted(['10', '2', '1.5', '½', '1A', 'Annual 1', '-1'], key=issue_sort_key)
+        ['-1', '½', '1A', '1.5', '2', '10', 'Annual 1']
+    """
+    if issue_number is None:
+        return ''
+    text = str(issue_number).strip().lstrip('#').strip()
+    if not text:
+        return ''
+
+    number = _parse_number(text)
+    if number is not None:
+        negative, integer, fraction, suffix = number
+        if negative:
+            # Larger magnitudes first: -2 before -1
+            integer, fraction = (_MAX_INTEGER - integer,
+                                 10 ** _FRACTION_DIGITS - 1 - fraction)
+        key = (f"{_NEGATIVE if negative else _NUMBER}"
+               f"{integer:0{_INTEGER_DIGITS}d}{fraction:0{_FRACTION_DIGITS}d}{_suffix_key(suffix)}")
+        return key[:ISSUE_KEY_LENGTH]
+
+    special = _SPECIAL_RE.match(text)
+    if special:
+        number = _parse_number(special.group('number'))
+        if number is not None and not number[0]:
+            _, integer, fraction, suffix = number
+            word = _suffix_key(special.group('word'))[:_WORD_WIDTH].ljust(_WORD_WIDTH)
+            key = (f"{_NUMBERED_SPECIAL}{word}"
+                   f"{integer:0{_INTEGER_DIGITS}d}{fraction:0{_FRACTION_DIGITS}d}{_suffix_key(suffix)}")
+            return key[:ISSUE_KEY_LENGTH]
+
+    return f"{_TEXT}{text.casefold()}"[:ISSUE_KEY_LENGTH]
@@ -70,6 +70,10 @@ LANGUAGES = {
         'title': 'Title',
         'issue': 'Issue',
         'file_path': 'File Path',
+        'read_comic': 'Read',
+        'page_of': 'Page {page} of {total}',
+        'opening_comic': 'Opening comic...',
+        'error_opening_comic': 'Could not open comic: {error}',
         'open_file_location': 'Open File Location',
         'delete_from_database': 'Delete from Database',
         'database_info': 'Database Info',
@@ -86,6 +90,7 @@ LANGUAGES = {
         'confirm_stop_scan': 'Are you sure you want to stop the current scan?',
         'confirm_delete': 'Confirm Deletion',
         'confirm_delete_comic': 'Are you sure you want to delete \'{title}\' from the database?',
+        'confirm_delete_comics': 'Are you sure you want to delete the {count} selected comics?',
         'save_backup_as': 'Save Backup As',
         'select_csv_file': 'Select CSV File',
         'save_export_as': 'Save Export As',
@@ -102,6 +107,7 @@ LANGUAGES = {
         'error_opening_file': 'Could not open file: {file}\nError: {error}',
         'error_opening_location': 'Could not open file location: {error}',
         'comic_deleted': 'Comic deleted: {title}',
+        'comics_deleted': '{count} comics deleted.',
         'error_deleting_comic': 'Error deleting comic: {error}',
         'tables_created': 'Database tables created successfully.',
         'error_creating_tables': 'Error creating database tables.',
@@ -109,7 +115,7 @@ LANGUAGES = {
         'error_clearing_database': 'Error clearing database.',
         'backup_created': 'Backup created successfully at:\n{path}',
         'error_creating_backup': 'Error creating database backup.',
-        'import_successful': 'Import completed successfully.',
+        'import_successful': 'Import completed: {imported} comics imported, {rejected} rows rejected.',
         'import_failed': 'Import failed. Check logs for details.',
         'import_error': 'Error during import: {error}',
         'export_successful': 'Export completed successfully to:\n{path}',
@@ -195,6 +201,10 @@ LANGUAGES = {
         'title': 'Titolo',
         'issue': 'Numero',
         'file_path': 'Percorso File',
+        'read_comic': 'Leggi',
+        'page_of': 'Pagina {page} di {total}',
+        'opening_comic': 'Apertura del fumetto...',
+        'error_opening_comic': 'Impossibile aprire il fumetto: {error}',
         'open_file_location': 'Apri Posizione File',
         'delete_from_database': 'Elimina dal Database',
         'database_info': 'Informazioni Database',
@@ -211,6 +221,7 @@ LANGUAGES = {
         'confirm_stop_scan': 'Sei sicuro di voler interrompere la scansione in corso?',
         'confirm_delete': 'Conferma Eliminazione',
         'confirm_delete_comic': 'Sei sicuro di voler eliminare \'{title}\' dal database?',
+        'confirm_delete_comics': 'Sei sicuro di voler eliminare i {count} fumetti selezionati?',
         'save_backup_as': 'Salva Backup Come',
         'select_csv_file': 'Seleziona File CSV',
         'save_export_as': 'Salva Esportazione Come',
@@ -228,6 +239,7 @@ LANGUAGES = {
         'error_opening_file': 'Impossibile aprire il file: {file}\nErrore: {error}',
         'error_opening_location': 'Impossibile aprire la posizione del file: {error}',
         'comic_deleted': 'Fumetto eliminato: {title}',
+        'comics_deleted': '{count} fumetti eliminati con successo.',
         'error_deleting_comic': 'Errore durante l\'eliminazione del fumetto: {error}',
         'tables_created': 'Tabelle del database create con successo.',
         'error_creating_tables': 'Errore durante la creazione delle tabelle del database.',
@@ -235,7 +247,7 @@ LANGUAGES = {
         'error_clearing_database': 'Errore durante lo svuotamento del database.',
         'backup_created': 'Backup creato con successo in:\n{path}',
         'error_creating_backup': 'Errore durante la creazione del backup del database.',
-        'import_successful': 'Importazione completata con successo.',
+        'import_successful': 'Importazione completata: {imported} fumetti importati, {rejected} righe scartate.',
         'import_failed': 'Importazione fallita. Controllare i log per i dettagli.',
         'import_error': 'Errore durante l\'importazione: {error}',
         'export_successful': 'Esportazione completata con successo in:\n{path}',
@@ -0,0 +1,89 @@
+"""
+In-memory ID caches for the dimension tables.
+
+Imports resolve the same few hundred publishers, series, authors and tags over and
+over. :class:`LookupCache` keeps each table's natural key -> ID map in memory,
+loaded with one query per table, so known names resolve without touching the
+database. New rows are written through to the cache after they are inserted.
+
+The cache belongs to the connection that writes (the SQLite writer thread),
+and is only as current as that connection's view:
+
+* anything that deletes or renames dimension rows, or rolls back a transaction
+  that inserted some, must call :meth:`LookupCache.invalidate`;
+* commits made by other connections are noticed through SQLite's
+  ``PRAGMA data_version`` (see :meth:`LookupCache.check_version`).
+"""
+import logging
+import re
+import threading
+from typing import Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cached tables and the columns of their natural key
+LOOKUP_TABLES: Dict[str, Tuple[str, ...]] = {
+    'publishers': ('name',),
+    'series': ('name', 'publisher_id'),
+    'subseries': ('name', 'series_id'),
+    'authors': ('name',),
+    'tags': ('name', 'kind'),
+}
+
+# Statements that can remove or re-key cached rows, directly or by cascade
+_INVALIDATING_RE = re.compile(
+    r'\b(?:DELETE\s+FROM|UPDATE|DROP\s+TABLE(?:\s+IF\s+EXISTS)?|TRUNCATE(?:\s+TABLE)?)\s+'
+    r'(?:publishers|series|subseries|authors|tags)\b',
+    re.IGNORECASE
+)
+
+
+def invalidates_lookups(query: str) -> bool:
+    """Check if a statement may make cached IDs stale."""
+    return bool(_INVALIDATING_RE.search(query))
+
+
+class LookupCache:
+    """Natural key -> ID maps of the dimension tables, loaded on first use."""
+
+    def __init__(self):
+        self._ids: Dict[str, Dict[tuple, int]] = {}
+        self._data_version = None
+        self._lock = threading.Lock()
+
+    def ids(self, cursor, table: str) -> Dict[tuple, int]:
+        """
+        Return the cached map of a table, loading the whole table if needed.
+
+        The returned dictionary is the cache itself: add the IDs of rows
+        inserted through ``cursor`` to it.
+        """
+        with self._lock:
+            ids = self._ids.get(table)
+            if ids is None:
+                columns = LOOKUP_TABLES[table]
+                cursor.execute(f"SELECT id, {', '.join(columns)} FROM {table}")
+                ids = {tuple(row[1:]): row[0] for row in map(tuple, cursor.fetchall())}
+                self._ids[table] = ids
+                logger.debug(f"Loaded {len(ids)} {table} into the lookup cache")
+            return ids
+
+    def check_version(self, data_version) -> None:
+        """
+        Drop the cache if another connection committed since it was loaded.
+
+        Args:
+            data_version: Current ``PRAGMA data_version`` of the writing
+                connection; it changes whenever another connection commits
+        """
+        with self._lock:
+            if data_version != self._data_version:
+                if self._ids:
+                    logger.debug("Database changed by another connection, clearing lookup cache")
+                self._ids.clear()
+                self._data_version = data_version
+
+    def invalidate(self) -> None:
+        """Forget all cached IDs; they are reloaded on next use."""
+        with self._lock:
+            self._ids.clear()
@@ -0,0 +1,449 @@
+"""
+Versioned schema migrations.
+
+``create_tables`` creates the original schema; everything added after it is
+an ordered, numbered migration recorded in the ``schema_version`` table, so an
+existing library is upgraded in place the next time it is opened.
+
+Each migration lists its steps per backend. A step is either a SQL statement
+or a callable taking a cursor, for data changes that need Python. To add a
+migration, append it to ``MIGRATIONS`` with the next version number; never
+edit one that has been released.
+"""
+import json
+import logging
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Union
+
+from struttura import browse, covers, issues, search, stats, tags
+from struttura.statements import DIALECT_TOKENS, placeholders
+
+logger = logging.getLogger(__name__)
+
+Step = Union[str, Callable[..., None]]
+
+# Comics whose covers are moved per statement by migration 3
+_COVER_CHUNK_SIZE = 200
+# Comics whose metadata is read per statement by migration 4
+_TAG_CHUNK_SIZE = 500
+# Issue sort keys written per statement by migration 6
+_ISSUE_CHUNK_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A numbered schema change with its steps for each backend."""
+    version: int
+    description: str
+    sqlite: Sequence[Step] = field(default_factory=tuple)
+    mysql: Sequence[Step] = field(default_factory=tuple)
+
+    def steps(self, db_type: str) -> Sequence[Step]:
+        return self.sqlite if db_type == 'sqlite' else self.mysql
+
+
+def _has_fts5(cursor) -> bool:
+    """Check whether this SQLite build has FTS5, logging why not."""
+    try:
+        cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5 (x)")
+        cursor.execute("DROP TABLE temp.fts5_probe")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite has no FTS5 support, search will use LIKE: {e}")
+        return False
+    return True
+
+
+def _create_search_index(cursor) -> None:
+    """Create the FTS5 search index, if this SQLite build has FTS5."""
+    if not _has_fts5(cursor):
+        # Still recorded as applied; ensure_search_index creates the index
+        # once the database is opened with a build that has FTS5
+        return
+    for statement in search.create_statements():
+        cursor.execute(statement)
+
+
+def _rebuild_search_index(cursor) -> None:
+    """Recreate an existing search index with the current columns and triggers."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                   (search.FTS_TABLE,))
+    if not cursor.fetchone():
+        # Created by ensure_search_index once SQLite has FTS5
+        return
+    for statement in search.drop_statements() + search.create_statements():
+        cursor.execute(statement)
+
+
+def _guard_delete_triggers(cursor) -> None:
+    """Recreate the delete triggers of comics with the guard that lets bulk deletes pause them."""
+    statements = stats.pausable_trigger_statements() + browse.pausable_trigger_statements()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                   (search.FTS_TABLE,))
+    if cursor.fetchone():
+        statements += search.pausable_trigger_statements()
+    for statement in statements:
+        cursor.execute(statement)
+
+
+def ensure_search_index(connection) -> bool:
+    """
+    Create the search index of a migrated SQLite database that lacks it.
+
+    Migration 2 is recorded even when SQLite has no FTS5, so the rest of the
+    schema can be upgraded; the index is then created here, on the first
+    start with a build that has FTS5.
+
+    Returns:
+        True if the index was created
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                       (search.FTS_TABLE,))
+        if cursor.fetchone() or not _has_fts5(cursor):
+            return False
+        logger.info("Creating the full-text search index")
+        try:
+            cursor.execute("BEGIN")
+            for statement in search.create_statements():
+                cursor.execute(statement)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        return True
+    finally:
+        cursor.close()
+
+
+def _table_columns(cursor, table: str) -> List[str]:
+    cursor.execute(f"SELECT * FROM {table} WHERE 1 = 0")
+    cursor.fetchall()
+    return [column[0] for column in cursor.description]
+
+
+def _move_covers_to_store(cursor, db_type: str) -> None:
+    """Move the inline cover BLOBs of ``comics`` into the cover store."""
+    cursor.execute(covers.create_statement(db_type))
+
+    columns = _table_columns(cursor, 'comics')
+    if 'cover_hash' not in columns:
+        cursor.execute(f"ALTER TABLE comics ADD COLUMN cover_hash "
+                       f"{'TEXT' if db_type == 'sqlite' else 'CHAR(64)'}")
+    if 'cover_image' not in columns:
+        return
+
+    cursor.execute("SELECT id FROM comics WHERE cover_image IS NOT NULL")
+    comic_ids = [row[0] for row in cursor.fetchall()]
+    # A chunk at a time, so a large library's covers are never all in memory
+    for start in range(0, len(comic_ids), _COVER_CHUNK_SIZE):
+        chunk = comic_ids[start:start + _COVER_CHUNK_SIZE]
+        cursor.execute(
+            f"SELECT id, cover_image, cover_image_type FROM comics "
+            f"WHERE id IN ({placeholders(db_type, len(chunk))})",
+            chunk
+        )
+        stored, links = {}, []
+        for comic_id, data, mime_type in cursor.fetchall():
+            data = bytes(data)
+            key = covers.cover_hash(data)
+            stored.setdefault(key, (key, mime_type, len(data), data))
+            links.append((key, comic_id))
+        cursor.executemany(covers.insert_statement(db_type), list(stored.values()))
+        cursor.executemany(
+            f"UPDATE comics SET cover_hash = {placeholders(db_type)} WHERE id = {placeholders(db_type)}", links)
+
+    if db_type != 'sqlite':
+        cursor.execute("ALTER TABLE comics DROP COLUMN cover_image, DROP COLUMN cover_image_type")
+    elif sqlite3.sqlite_version_info >= (3, 35, 0):
+        cursor.execute("ALTER TABLE comics DROP COLUMN cover_image")
+        cursor.execute("ALTER TABLE comics DROP COLUMN cover_image_type")
+    else:
+        # No DROP COLUMN before SQLite 3.35; empty columns cost next to nothing
+        cursor.execute("UPDATE comics SET cover_image = NULL, cover_image_type = NULL")
+    logger.info(f"Moved {len(comic_ids)} covers to the cover store")
+
+
+def _backfill_tags(cursor, db_type: str) -> None:
+    """Fill ``comic_tags`` from the metadata JSON of the existing comics."""
+    insert_ignore = DIALECT_TOKENS[db_type]['insert_ignore']
+
+    cursor.execute("SELECT id FROM comics WHERE metadata IS NOT NULL")
+    comic_ids = [row[0] for row in cursor.fetchall()]
+    tag_ids = {}
+    linked = 0
+    for start in range(0, len(comic_ids), _TAG_CHUNK_SIZE):
+        chunk = comic_ids[start:start + _TAG_CHUNK_SIZE]
+        cursor.execute(
+            f"SELECT id, metadata FROM comics WHERE id IN ({placeholders(db_type, len(chunk))})",
+            chunk
+        )
+        comic_tags = []
+        for comic_id, metadata in cursor.fetchall():
+            try:
+                parsed = json.loads(metadata) if isinstance(metadata, (str, bytes)) else metadata
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                comic_tags.extend((comic_id, tag) for tag in tags.metadata_tags(parsed))
+        if not comic_tags:
+            continue
+
+        new_tags = sorted({tag for _, tag in comic_tags} - tag_ids.keys())
+        if new_tags:
+            cursor.executemany(
+                f"{insert_ignore} INTO tags (name, kind) VALUES ({placeholders(db_type, 2)})",
+                new_tags
+            )
+            names = sorted({name for name, _ in new_tags})
+            for offset in range(0, len(names), _TAG_CHUNK_SIZE):
+                batch = names[offset:offset + _TAG_CHUNK_SIZE]
+                cursor.execute(
+                    f"SELECT id, name, kind FROM tags WHERE name IN ({placeholders(db_type, len(batch))})",
+                    batch
+                )
+                tag_ids.update(((name, kind), tag_id) for tag_id, name, kind in cursor.fetchall())
+        cursor.executemany(
+            f"{insert_ignore} INTO comic_tags (comic_id, tag_id) VALUES ({placeholders(db_type, 2)})",
+            [(comic_id, tag_ids[tag]) for comic_id, tag in comic_tags]
+        )
+        linked += len(comic_tags)
+    logger.info(f"Linked {linked} tags from existing metadata")
+
+
+def _backfill_issue_sort_keys(cursor, db_type: str) -> None:
+    """Add ``comics.issue_sort_key`` and compute it for the existing comics."""
+    if 'issue_sort_key' not in _table_columns(cursor, 'comics'):
+        column_type = 'TEXT' if db_type == 'sqlite' else f'VARCHAR({issues.ISSUE_KEY_LENGTH})'
+        cursor.execute(f"ALTER TABLE comics ADD COLUMN issue_sort_key {column_type} NOT NULL DEFAULT ''")
+
+    cursor.execute("SELECT id, issue_number FROM comics WHERE issue_number IS NOT NULL")
+    keys = [(issues.issue_sort_key(issue_number), comic_id)
+            for comic_id, issue_number in cursor.fetchall()]
+    keys = [(key, comic_id) for key, comic_id in keys if key]
+    for start in range(0, len(keys), _ISSUE_CHUNK_SIZE):
+        cursor.executemany(
+            f"UPDATE comics SET issue_sort_key = {placeholders(db_type)} WHERE id = {placeholders(db_type)}",
+            keys[start:start + _ISSUE_CHUNK_SIZE]
+        )
+    logger.info(f"Computed the issue sort key of {len(keys)} comics")
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1, "Secondary indexes for browsing, filtering and export",
+        sqlite=(
+            "CREATE INDEX IF NOT EXISTS idx_comics_series ON comics (series_id, issue_number)",
+            "CREATE INDEX IF NOT EXISTS idx_comics_subseries ON comics (subseries_id)",
+            "CREATE INDEX IF NOT EXISTS idx_comics_year ON comics (year)",
+            "CREATE INDEX IF NOT EXISTS idx_comics_title ON comics (title)",
+            "CREATE INDEX IF NOT EXISTS idx_series_publisher ON series (publisher_id, name)",
+            "CREATE INDEX IF NOT EXISTS idx_comic_authors_author ON comic_authors (author_id)",
+            "ANALYZE",
+        ),
+        # InnoDB already indexes the foreign key columns on their own
+        mysql=(
+            "CREATE INDEX idx_comics_series ON comics (series_id, issue_number)",
+            "CREATE INDEX idx_comics_year ON comics (year)",
+            "CREATE INDEX idx_comics_title ON comics (title)",
+            "CREATE INDEX idx_series_publisher ON series (publisher_id, name)",
+            "ANALYZE TABLE comics, series, comic_authors",
+        ),
+    ),
+    Migration(
+        2, "Full-text search index",
+        sqlite=(_create_search_index,),
+        # MySQL keeps searching with LIKE
+        mysql=(),
+    ),
+    Migration(
+        3, "Content-addressed cover store",
+        sqlite=(
+            partial(_move_covers_to_store, db_type='sqlite'),
+            "CREATE INDEX IF NOT EXISTS idx_comics_cover ON comics (cover_hash)",
+        ),
+        mysql=(
+            partial(_move_covers_to_store, db_type='mysql'),
+            "CREATE INDEX idx_comics_cover ON comics (cover_hash)",
+        ),
+    ),
+    Migration(
+        4, "Characters, teams, locations, story arcs and genres as tags",
+        sqlite=(
+            """CREATE TABLE IF NOT EXISTS tags (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                UNIQUE (name, kind)
+            )""",
+            """CREATE TABLE IF NOT EXISTS comic_tags (
+                comic_id INTEGER NOT NULL,
+                tag_id INTEGER NOT NULL,
+                PRIMARY KEY (comic_id, tag_id),
+                FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE,
+                FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_tags_kind ON tags (kind, name)",
+            "CREATE INDEX IF NOT EXISTS idx_comic_tags_tag ON comic_tags (tag_id, comic_id)",
+            partial(_backfill_tags, db_type='sqlite'),
+            "ANALYZE",
+        ),
+        # The foreign key index on comic_tags.tag_id also holds comic_id
+        mysql=(
+            """CREATE TABLE IF NOT EXISTS tags (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                name VARCHAR(255) NOT NULL,
+                kind VARCHAR(20) NOT NULL,
+                UNIQUE KEY unique_tag (name, kind),
+                KEY idx_tags_kind (kind, name)
+            )""",
+            """CREATE TABLE IF NOT EXISTS comic_tags (
+                comic_id INT NOT NULL,
+                tag_id INT NOT NULL,
+                PRIMARY KEY (comic_id, tag_id),
+                FOREIGN KEY (comic_id) REFERENCES comics(id) ON DELETE CASCADE,
+                FOREIGN KEY (tag_id) REFERENCES tags(id) ON DELETE CASCADE
+            )""",
+            partial(_backfill_tags, db_type='mysql'),
+            "ANALYZE TABLE tags, comic_tags",
+        ),
+    ),
+    Migration(
+        5, "Library statistics and facet counts",
+        sqlite=tuple(stats.create_statements('sqlite')),
+        mysql=tuple(stats.create_statements('mysql')),
+    ),
+    Migration(
+        6, "Sortable issue numbers",
+        # The new index replaces idx_comics_series for the series_id lookups too
+        sqlite=(
+            partial(_backfill_issue_sort_keys, db_type='sqlite'),
+            "CREATE INDEX IF NOT EXISTS idx_comics_issue ON comics (series_id, issue_sort_key)",
+            "DROP INDEX IF EXISTS idx_comics_series",
+            "ANALYZE",
+        ),
+        mysql=(
+            partial(_backfill_issue_sort_keys, db_type='mysql'),
+            "CREATE INDEX idx_comics_issue ON comics (series_id, issue_sort_key)",
+            "DROP INDEX idx_comics_series ON comics",
+            "ANALYZE TABLE comics",
+        ),
+    ),
+    Migration(
+        7, "Browse projection",
+        sqlite=tuple(browse.create_statements('sqlite')),
+        mysql=tuple(browse.create_statements('mysql')),
+    ),
+    Migration(
+        8, "Search file names, one search refresh per comic in bulk writes",
+        sqlite=(_rebuild_search_index,),
+        mysql=(),
+    ),
+    Migration(
+        9, "Index for the year listing",
+        # The year listing's order; the rowid closes the key
+        sqlite=(
+            "CREATE INDEX IF NOT EXISTS idx_comics_year_title ON comics (COALESCE(year, 0), title)",
+            "ANALYZE",
+        ),
+        # Expression indexes need MySQL 8.0.13 and MariaDB has none; the listing sorts there
+        mysql=(),
+    ),
+    Migration(
+        10, "Set-based bulk deletes",
+        sqlite=(_guard_delete_triggers,),
+        # MySQL triggers cannot be paused; bulk deletes fire them per row
+        mysql=(),
+    ),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def _create_version_table(cursor, db_type: str) -> None:
+    if db_type == 'sqlite':
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                description TEXT NOT NULL,
+                applied_at TIMESTAMP NOT NULL
+            )""")
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INT PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at DATETIME NOT NULL
+            )""")
+
+
+def current_version(cursor, db_type: str) -> int:
+    """Return the highest applied migration, 0 for a database without any."""
+    _create_version_table(cursor, db_type)
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    row = cursor.fetchone()
+    return (row[0] if row else None) or 0
+
+
+def migrate(connection, db_type: str, target: Optional[int] = None) -> int:
+    """
+    Apply the pending migrations in order.
+
+    Each migration runs in its own transaction together with its
+    ``schema_version`` row, so a failure leaves the database at the last
+    complete version. (MySQL commits DDL implicitly, so there a failed
+    migration may be partly applied and must be finished by hand.)
+
+    Args:
+        connection: Writable DB-API connection
+        db_type: 'sqlite' or 'mysql'
+        target: Version to migrate to, defaults to the latest
+
+    Returns:
+        The schema version after migrating
+
+    Raises:
+        Exception: Whatever the failing step raised, after rolling back
+    """
+    target = LATEST_VERSION if target is None else target
+    cursor = connection.cursor()
+    try:
+        version = current_version(cursor, db_type)
+        connection.commit()
+        started_at = version
+
+        for migration in MIGRATIONS:
+            if migration.version <= version or migration.version > target:
+                continue
+
+            logger.info(f"Applying migration {migration.version}: {migration.description}")
+            try:
+                if db_type == 'sqlite':
+                    # sqlite3 would otherwise run DDL in autocommit mode
+                    cursor.execute("BEGIN")
+                for step in migration.steps(db_type):
+                    if callable(step):
+                        step(cursor)
+                    else:
+                        cursor.execute(step)
+                cursor.execute(
+                    f"INSERT INTO schema_version (version, description, applied_at) "
+                    f"VALUES ({placeholders(db_type, 3)})",
+                    (migration.version, migration.description,
+                     datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                connection.commit()
+            except Exception as e:
+                connection.rollback()
+                logger.error(f"Migration {migration.version} failed: {e}")
+                raise
+            version = migration.version
+
+        if db_type == 'sqlite' and started_at >= 2:
+            ensure_search_index(connection)
+        return version
+    finally:
+        cursor.close()
@@ -0,0 +1,86 @@
+"""
+Memory-capped LRU cache for decoded comic pages.
+
+Decoded pages are large (a 2000x3000 RGB page is about 18 MB), so the cache
+is bounded by the memory its entries occupy rather than by their number.
+"""
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from PIL import Image
+
+
+def image_nbytes(image: Image.Image) -> int:
+    """Estimate the memory held by a decoded image."""
+    width, height = image.size
+    return width * height * len(image.getbands())
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache bounded by the total size of its entries.
+
+    Example:
+        cache = PageCache(max_bytes=64 * 1024 * 1024)
+        cache.put((0, (800, 1200)), image, image_nbytes(image))
+        image = cache.get((0, (800, 1200)))
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: Memory budget; least recently used entries are evicted
+                once it is exceeded
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a cached value and mark it as recently used, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any, nbytes: int) -> None:
+        """
+        Add a value, evicting the least recently used entries as needed.
+
+        Values larger than the whole budget are not cached.
+        """
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+
+            self._entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
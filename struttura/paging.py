@@ -0,0 +1,93 @@
+"""
+Keyset pagination for comic listings.
+
+A page is read with ``ORDER BY <sort key>, c.id`` and the next one starts
+after the last row's sort values, so reading page N costs the same as page 1
+(unlike OFFSET, which reads and discards every earlier row). The sort keys
+are orders an index can serve, so a page is a range scan that stops after
+page size rows rather than a sort of every matching comic. The position is
+handed to callers as an opaque cursor string.
+"""
+import base64
+import binascii
+import json
+from typing import Any, List, Sequence, Tuple
+
+# Sort key expressions per sort name; the comic ID is appended to make every key unique.
+# {int} is the integer cast of the backend.
+SORT_KEYS = {
+    # Read from the comic_browse projection (b), clustered on this order; same-named
+    # series of different publishers stay apart
+    'series': ("b.series_name", "b.publisher_id", "b.series_id", "b.issue_sort_key"),
+    'title': ("c.title",),
+    # Served by idx_comics_year_title
+    'year': ("COALESCE(c.year, 0)", "c.title"),
+    # Only with a full-text search; the select exposes the bm25 score as rank
+    'relevance': ("rank",),
+}
+DEFAULT_SORT = 'series'
+
+# Sorts read through the comic_browse projection, joined as b
+BROWSE_SORTS = ('series',)
+
+
+def sort_expressions(sort: str, db_type: str) -> List[str]:
+    """
+    Return the ORDER BY expressions of a sort, ending with the comic ID.
+
+    Raises:
+        ValueError: If the sort is unknown
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unknown sort {sort!r}, expected one of {', '.join(SORT_KEYS)}")
+    cast = 'INTEGER' if db_type == 'sqlite' else 'SIGNED'
+    comic_id = 'b.comic_id' if sort in BROWSE_SORTS else 'c.id'
+    return [expression.format(int=cast) for expression in SORT_KEYS[sort]] + [comic_id]
+
+
+def keyset_condition(columns: Sequence[str], position: Sequence[Any], params: List[Any]) -> str:
+    """
+    WHERE condition selecting the rows after a position, appending its params.
+
+    A leading key that is an expression is also compared on its own: SQLite
+    seeks an index on that comparison, which it does not do for a row value
+    holding an expression.
+
+    Args:
+        columns: Sort key expressions, as in the ORDER BY
+        position: Sort key values of the last row read
+        params: Query parameters to extend
+    """
+    condition = f"({', '.join(columns)}) > ({', '.join(['%s'] * len(columns))})"
+    if '(' in columns[0]:
+        params.append(position[0])
+        condition = f"{columns[0]} >= %s AND {condition}"
+    params.extend(position)
+    return condition
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """Encode the position after a row, given its sort key values."""
+    payload = json.dumps([sort, list(values)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Any, ...]:
+    """
+    Decode a cursor returned by ``encode_cursor``.
+
+    Raises:
+        ValueError: If the cursor is malformed or belongs to another sort
+    """
+    try:
+        cursor_sort, values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Invalid page cursor: {e}") from e
+    if cursor_sort != sort:
+        raise ValueError(f"Page cursor is for sort {cursor_sort!r}, not {sort!r}")
+    return tuple(values)
+
+
+def row_cursor(sort: str, row: dict, key_count: int) -> str:
+    """Cursor positioned after ``row``, which carries the sort keys as sk0, sk1, ..."""
+    return encode_cursor(sort, [row[f'sk{i}'] for i in range(key_count)])
@@ -0,0 +1,262 @@
+"""
+Statement timing and slow-query log.
+
+Cursors handed out by ``ComicDatabase`` are wrapped in a :class:`TimedCursor`,
+which times each statement from ``execute`` until the next statement or
+``close``, so the time spent fetching a SELECT's rows counts as well. A
+:class:`QueryLog` aggregates the timings per statement: the SQL text with its
+whitespace collapsed and ``IN`` lists folded, so the same query with a
+different number of values counts once.
+
+Statements slower than the threshold are logged as warnings with their
+parameters (strings and binary values redacted to their length), the number
+of rows and the query plan: ``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN`` on
+MySQL, run on the same connection with the same parameters. A missing index
+shows up there as a ``SCAN`` or a ``type=ALL`` row.
+"""
+import logging
+import re
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statements at least this slow are logged, by default
+DEFAULT_SLOW_QUERY_MS = 250.0
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_PLACEHOLDER_LIST_RE = re.compile(r'\(\s*(\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)')
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Statement text used to aggregate timings: one line, IN lists folded."""
+    return _PLACEHOLDER_LIST_RE.sub(r'(\1, ...)', _WHITESPACE_RE.sub(' ', sql).strip())
+
+
+def redact(value: Any) -> Any:
+    """Parameters safe to log: numbers as they are, text and binary values as their length."""
+    if isinstance(value, dict):
+        return {key: redact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(item) for item in value]
+    if isinstance(value, str):
+        return f"<str:{len(value)}>"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<bytes:{len(value)}>"
+    return value
+
+
+@dataclass
+class StatementStats:
+    """Aggregated timings of one statement."""
+    sql: str
+    calls: int = 0
+    seconds: float = 0.0
+    max_seconds: float = 0.0
+    rows: int = 0
+    slow: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'sql': self.sql,
+            'calls': self.calls,
+            'total_ms': self.seconds * 1000,
+            'mean_ms': self.seconds * 1000 / self.calls if self.calls else 0.0,
+            'max_ms': self.max_seconds * 1000,
+            'rows': self.rows,
+            'slow': self.slow,
+        }
+
+
+class QueryLog:
+    """Per-statement timings of a database, shared by all its connections."""
+
+    def __init__(self, db_type: str, slow_query_ms: Optional[float] = DEFAULT_SLOW_QUERY_MS):
+        """
+        Args:
+            db_type: 'sqlite' or 'mysql', for the EXPLAIN syntax
+            slow_query_ms: Log statements taking at least this long; None
+                or 0 only aggregates
+        """
+        self.db_type = db_type
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def cursor(self, cursor, connection) -> 'TimedCursor':
+        """Wrap a cursor of ``connection`` so its statements are timed."""
+        return TimedCursor(cursor, connection, self)
+
+    def record(self, connection, sql: str, params: Any, many: bool,
+               seconds: float, rows: int) -> None:
+        """Add a statement's timing, logging it if it was slow."""
+        key = normalize_sql(sql)
+        slow = bool(self.slow_query_ms) and seconds * 1000 >= self.slow_query_ms
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats(key)
+            stats.calls += 1
+            stats.seconds += seconds
+            stats.max_seconds = max(stats.max_seconds, seconds)
+            stats.rows += rows
+            stats.slow += slow
+        if not slow:
+            return
+
+        if many:
+            params = list(params or ())
+            shown = f"{len(params)} rows, first {redact(params[0]) if params else None}"
+            params = params[0] if params else None
+        else:
+            shown = redact(params)
+        plan = self.explain(connection, sql, params)
+        logger.warning(f"Slow query: {seconds * 1000:.1f} ms, {rows} rows: {key}\n"
+                       f"  params: {shown}\n  plan: {plan}")
+
+    def explain(self, connection, sql: str, params: Any = None) -> str:
+        """Query plan of a statement, one step per line, or why there is none."""
+        words = sql.lstrip(' \t\r\n(').split(None, 1)
+        if not words or words[0].upper() not in _EXPLAINABLE:
+            return "(not explainable)"
+        prefix = 'EXPLAIN QUERY PLAN ' if self.db_type == 'sqlite' else 'EXPLAIN '
+        cursor = None
+        try:
+            cursor = connection.cursor()
+            if params:
+                cursor.execute(prefix + sql, params)
+            else:
+                cursor.execute(prefix + sql)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, tuple(row))) for row in cursor.fetchall()]
+        except Exception as e:
+            return f"(no plan: {e})"
+        finally:
+            if cursor is not None:
+                cursor.close()
+        if self.db_type == 'sqlite':
+            return '\n    '.join(str(row['detail']) for row in rows)
+        return '\n    '.join(
+            ', '.join(f"{column}={value}" for column, value in row.items() if value is not None)
+            for row in rows
+        )
+
+    def stats(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Aggregated statements, by total time spent, slowest first."""
+        with self._lock:
+            stats = sorted(self._stats.values(), key=lambda s: s.seconds, reverse=True)
+            return [s.as_dict() for s in stats[:limit]]
+
+    def reset(self) -> None:
+        """Forget the aggregated timings."""
+        with self._lock:
+            self._stats.clear()
+
+    def log_summary(self, limit: int = 10) -> None:
+        """Log the statements that took the most time in total."""
+        top = self.stats(limit)
+        if not top:
+            return
+        lines = '\n'.join(
+            f"  {s['total_ms']:10.1f} ms total, {s['calls']:6d} calls, {s['max_ms']:8.1f} ms max, "
+            f"{s['slow']} slow: {s['sql'][:200]}"
+            for s in top
+        )
+        logger.info(f"Statements by total time:\n{lines}")
+
+
+class TimedCursor:
+    """
+    A DB-API cursor whose statements are timed and recorded in a QueryLog.
+
+    Everything else is passed through to the wrapped cursor.
+    """
+
+    __slots__ = ('_cursor', '_connection', '_log', '_pending')
+
+    def __init__(self, cursor, connection, log: QueryLog):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_connection', connection)
+        object.__setattr__(self, '_log', log)
+        # [sql, params, many, seconds, rows fetched] of the running statement
+        object.__setattr__(self, '_pending', None)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # e.g. sqlite3's cursor.row_factory
+        setattr(self._cursor, name, value)
+
+    def _run(self, method, sql: str, params: Any, many: bool, args: tuple, kwargs: dict):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            result = method(sql, *args, **kwargs)
+        finally:
+            object.__setattr__(self, '_pending', [sql, params, many, time.perf_counter() - start, 0])
+        return self if result is self._cursor else result
+
+    def execute(self, sql: str, *args, **kwargs):
+        params = args[0] if args else kwargs.get('params')
+        return self._run(self._cursor.execute, sql, params, False, args, kwargs)
+
+    def executemany(self, sql: str, rows, *args, **kwargs):
+        # Materialized once: executemany consumes it and the log may show the first row
+        rows = list(rows)
+        return self._run(self._cursor.executemany, sql, rows, True, (rows,) + args, kwargs)
+
+    def _fetched(self, start: float, rows: int) -> None:
+        pending = self._pending
+        if pending is not None:
+            pending[3] += time.perf_counter() - start
+            pending[4] += rows
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def _finish(self, close: bool = False) -> None:
+        """Record the running statement, if any, closing the cursor first if asked."""
+        pending = self._pending
+        object.__setattr__(self, '_pending', None)
+        if pending is not None:
+            sql, params, many, seconds, fetched = pending
+            try:
+                rows = fetched if self._cursor.description else max(self._cursor.rowcount or 0, 0)
+            except Exception:
+                rows = fetched
+        if close:
+            # Before any EXPLAIN: an unread MySQL result would block the connection
+            self._cursor.close()
+        if pending is not None:
+            self._log.record(self._connection, sql, params, many, seconds, rows)
+
+    def close(self) -> None:
+        self._finish(close=True)
@@ -0,0 +1,48 @@
+"""
+Row shapes for query results.
+
+Cursors return plain tuples; :func:`row_converter` turns them into the shape
+a caller asked for, using the column names of the cursor's description:
+
+* ``'tuple'``: the tuples as they are, the cheapest shape;
+* ``'namedtuple'``: tuples with attribute access, one class per column list;
+* ``'dict'``: a dictionary per row, like ``execute_query(fetch=True)``.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+ROW_TYPES = ('tuple', 'namedtuple', 'dict')
+
+
+def column_names(description) -> Tuple[str, ...]:
+    """Column names of a DB-API cursor description."""
+    return tuple(column[0] for column in description or ())
+
+
+@lru_cache(maxsize=256)
+def row_class(columns: Tuple[str, ...]) -> type:
+    """Named tuple class of a column list; invalid or duplicate names become _0, _1..."""
+    return namedtuple('Row', columns, rename=True)
+
+
+def dict_factory(cursor, row: Sequence[Any]) -> Dict[str, Any]:
+    """``sqlite3`` row factory building dictionaries directly."""
+    return dict(zip(column_names(cursor.description), row))
+
+
+def row_converter(description, row_type: str) -> Callable[[Sequence[Any]], Any]:
+    """
+    Function turning a row tuple into ``row_type``.
+
+    Raises:
+        ValueError: If the row type is unknown
+    """
+    if row_type == 'tuple':
+        return tuple
+    columns = column_names(description)
+    if row_type == 'namedtuple':
+        return row_class(columns)._make
+    if row_type == 'dict':
+        return lambda row: dict(zip(columns, row))
+    raise ValueError(f"Unknown row type '{row_type}', expected one of {', '.join(ROW_TYPES)}")
@@ -0,0 +1,138 @@
+"""
+Full-text search over the comics table (SQLite FTS5).
+
+``comics_fts`` holds one document per comic, keyed by the comic's id, with
+the text of the comic and of its series, publisher and authors, and the name
+of its file. Triggers keep it in sync, so callers never write to it directly.
+
+The triggers on ``comic_authors`` rebuild a comic's document for every link
+written. Bulk writes pause them (see triggers.py) and rebuild each comic's
+document once with :func:`refresh_statements`; bulk deletes pause the delete
+triggers too and remove the documents by ``rowid IN (...)``.
+"""
+import re
+from typing import List, Optional
+
+from struttura import triggers
+
+FTS_TABLE = 'comics_fts'
+
+# Indexed columns and their bm25 weights; matches in titles and series rank first
+FTS_COLUMNS = ('title', 'series', 'publisher', 'summary', 'authors',
+               'characters', 'teams', 'story_arc', 'file_name')
+FTS_WEIGHTS = (10.0, 6.0, 3.0, 1.0, 4.0, 2.0, 2.0, 3.0, 1.0)
+
+# Names of the sync triggers, for rebuilding the index
+TRIGGERS = ('comics_fts_insert', 'comics_fts_update', 'comics_fts_delete',
+            'comic_authors_fts_insert', 'comic_authors_fts_delete', 'series_fts_update',
+            'publishers_fts_update', 'authors_fts_update')
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _json_field(path: str) -> str:
+    # Rows imported from CSV may have no (or non-JSON) metadata
+    return f"CASE WHEN json_valid(c.metadata) THEN json_extract(c.metadata, '{path}') END"
+
+
+def _file_name() -> str:
+    # Everything after the last separator; rtrim strips the name, leaving the directory
+    path = "replace(c.file_path, '\\', '/')"
+    return f"substr({path}, length(rtrim({path}, replace({path}, '/', ''))) + 1)"
+
+
+def _documents(where: str) -> str:
+    """SELECT producing the FTS documents of the comics matching ``where``."""
+    return f"""
+        SELECT c.id, c.title, s.name, COALESCE(p.name, c.publisher), c.summary,
+               (SELECT group_concat(a.name, ' ') FROM comic_authors ca
+                JOIN authors a ON a.id = ca.author_id WHERE ca.comic_id = c.id),
+               {_json_field('$.characters')}, {_json_field('$.teams')},
+               {_json_field('$.story_arc')}, {_file_name()}
+        FROM comics c
+        LEFT JOIN series s ON s.id = c.series_id
+        LEFT JOIN publishers p ON p.id = s.publisher_id
+        WHERE {where}"""
+
+
+def refresh_statements(where: str) -> List[str]:
+    """Statements rebuilding the documents of the comics matching ``where``."""
+    return [
+        f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT c.id FROM comics c WHERE {where})",
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {_documents(where)}",
+    ]
+
+
+def _refresh(where: str) -> str:
+    """Trigger body rebuilding the documents of the comics matching ``where``."""
+    return ''.join(f"{statement};" for statement in refresh_statements(where))
+
+
+def _delete_trigger() -> str:
+    return f"""CREATE TRIGGER IF NOT EXISTS comics_fts_delete AFTER DELETE ON comics
+            {triggers.unless_paused(triggers.SEARCH)}
+            BEGIN DELETE FROM {FTS_TABLE} WHERE rowid = OLD.id; END"""
+
+
+def pausable_trigger_statements() -> List[str]:
+    """DDL recreating ``comics_fts_delete`` with its pause guard."""
+    return [triggers.create_statement(), "DROP TRIGGER IF EXISTS comics_fts_delete", _delete_trigger()]
+
+
+def create_statements() -> List[str]:
+    """DDL for the index, its sync triggers and the initial backfill."""
+    statements = [
+        triggers.create_statement(),
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5 (
+                {', '.join(FTS_COLUMNS)},
+                prefix = '2 3',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )""",
+        f"""CREATE TRIGGER IF NOT EXISTS comics_fts_insert AFTER INSERT ON comics
+            BEGIN {_refresh('c.id = NEW.id')} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS comics_fts_update
+            AFTER UPDATE OF title, series_id, publisher, summary, metadata, file_path ON comics
+            BEGIN {_refresh('c.id = NEW.id')} END""",
+        _delete_trigger(),
+        f"""CREATE TRIGGER IF NOT EXISTS comic_authors_fts_insert AFTER INSERT ON comic_authors
+            {triggers.unless_paused(triggers.SEARCH)}
+            BEGIN {_refresh('c.id = NEW.comic_id')} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS comic_authors_fts_delete AFTER DELETE ON comic_authors
+            {triggers.unless_paused(triggers.SEARCH)}
+            BEGIN {_refresh('c.id = OLD.comic_id')} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS series_fts_update AFTER UPDATE OF name, publisher_id ON series
+            BEGIN {_refresh('c.series_id = NEW.id')} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS publishers_fts_update AFTER UPDATE OF name ON publishers
+            BEGIN {_refresh('c.series_id IN (SELECT id FROM series WHERE publisher_id = NEW.id)')} END""",
+        f"""CREATE TRIGGER IF NOT EXISTS authors_fts_update AFTER UPDATE OF name ON authors
+            BEGIN {_refresh('c.id IN (SELECT comic_id FROM comic_authors WHERE author_id = NEW.id)')} END""",
+        f"DELETE FROM {FTS_TABLE}",
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {_documents('1 = 1')}",
+    ]
+    return statements
+
+
+def drop_statements() -> List[str]:
+    """DDL removing the index and its sync triggers."""
+    return [f"DROP TRIGGER IF EXISTS {name}" for name in TRIGGERS] + [f"DROP TABLE IF EXISTS {FTS_TABLE}"]
+
+
+def fts_query(text: str) -> Optional[str]:
+    """
+    Turn what the user typed into an FTS5 query.
+
+    Every word must match, as a prefix, in any column: "bat year" finds
+    "Batman: Year One". FTS5 operators typed by the user are treated as text.
+
+    Returns:
+        The MATCH expression, or None if the text has no searchable words
+    """
+    tokens = _TOKEN_RE.findall(text or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def rank_expression() -> str:
+    """bm25 ranking with the column weights; lower is more relevant."""
+    return f"bm25({FTS_TABLE}, {', '.join(str(w) for w in FTS_WEIGHTS)})"
@@ -0,0 +1,94 @@
+"""
+SQL statements written once and rendered per dialect.
+
+A :class:`Statement` holds SQL with ``:name`` parameters and a few dialect
+tokens (``{insert_ignore}``, ``{int}``). It is rendered for SQLite or MySQL
+the first time it is used with that backend and the result is cached, so each
+statement is always sent as the same text, ready for the driver's prepared
+statement cache, and nothing is rewritten per call.
+
+Parameters are passed as a mapping: SQLite binds ``:name`` natively and
+MySQL Connector binds ``%(name)s``.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping
+
+# Replacements of the dialect tokens
+DIALECT_TOKENS: Dict[str, Dict[str, str]] = {
+    'sqlite': {'insert_ignore': 'INSERT OR IGNORE', 'int': 'INTEGER'},
+    'mysql': {'insert_ignore': 'INSERT IGNORE', 'int': 'SIGNED'},
+}
+
+# Positional parameter marker of each backend's driver
+PLACEHOLDERS: Dict[str, str] = {'sqlite': '?', 'mysql': '%s'}
+
+_NAMED_PARAM_RE = re.compile(r'(?<![:\w]):([A-Za-z_]\w*)')
+
+
+@lru_cache(maxsize=None)
+def render(sql: str, db_type: str) -> str:
+    """
+    Render statement text for a backend.
+
+    Raises:
+        KeyError: If the backend or a dialect token is unknown
+    """
+    text = sql.format(**DIALECT_TOKENS[db_type])
+    if db_type == 'sqlite':
+        return text
+    # MySQL Connector formats with %, so literal percent signs are doubled
+    return _NAMED_PARAM_RE.sub(r'%(\1)s', text.replace('%', '%%'))
+
+
+@lru_cache(maxsize=None)
+def placeholders(db_type: str, count: int = 1) -> str:
+    """
+    ``count`` comma-separated positional placeholders for a backend.
+
+    Used for the ``IN`` lists and ``VALUES`` rows that are built per call, e.g.
+    ``f"WHERE id IN ({placeholders(db_type, len(chunk))})"``.
+
+    Raises:
+        KeyError: If the backend is unknown
+    """
+    return ', '.join([PLACEHOLDERS[db_type]] * count)
+
+
+@lru_cache(maxsize=1024)
+def sqlite_placeholders(query: str) -> str:
+    """Turn the ``%s`` placeholders of a positional query into SQLite's ``?``."""
+    return query.replace('%s', '?')
+
+
+class Statement:
+    """
+    A SQL statement with named parameters.
+
+    Example:
+        ADD_TAG = Statement("{insert_ignore} INTO comic_tags (comic_id, tag_id) "
+                            "VALUES (:comic_id, :tag_id)")
+        cursor.execute(ADD_TAG.render(db_type), {'comic_id': 1, 'tag_id': 2})
+    """
+
+    __slots__ = ('sql',)
+
+    def __init__(self, sql: str):
+        self.sql = sql
+
+    def render(self, db_type: str) -> str:
+        """SQL text for ``db_type``, rendered once and cached."""
+        return render(self.sql, db_type)
+
+    def execute(self, cursor, db_type: str, params: Mapping[str, Any] = None):
+        """Execute the statement on ``cursor`` with named parameters."""
+        return cursor.execute(self.render(db_type), dict(params or {}))
+
+    def executemany(self, cursor, db_type: str, rows: Iterable[Mapping[str, Any]]):
+        """Execute the statement once per mapping of ``rows``."""
+        rows: List[Mapping[str, Any]] = list(rows)
+        if rows:
+            cursor.executemany(self.render(db_type), rows)
+
+    def __repr__(self) -> str:
+        return f"Statement({self.sql!r})"
@@ -0,0 +1,195 @@
+"""
+Library statistics and facet counts, maintained by triggers.
+
+``comic_facets`` holds one counter per (facet, value): the number of comics
+per publisher, series, year and file format, per tag (genres, characters,
+...), and the total under ``('total', '')``. Triggers on ``comics``,
+``series`` and ``comic_tags`` update the counters in the same transaction as
+the change, so reading a count is a primary key lookup and the numbers are
+always consistent with the data.
+
+Values are IDs for publishers, series and tags, and the empty string when a
+comic has none. Counters that drop to zero are kept; readers skip them.
+
+On MySQL, foreign key cascades do not fire triggers: rows a cascade removes
+or unlinks (the comic_tags of a deleted comic, the comics of a deleted series)
+must be changed explicitly first, as ``delete_comic`` does for comic_tags.
+
+On SQLite the delete triggers can be paused (see triggers.py): bulk deletes
+subtract the comics with :func:`remove_statements` instead, one grouped
+statement per facet.
+"""
+from typing import List, Optional, Tuple
+
+from struttura import triggers
+
+FACETS_TABLE = 'comic_facets'
+
+# Triggers a bulk delete pauses, with group triggers.FACETS (SQLite)
+PAUSABLE = ('comics_facets_delete', 'comic_tags_facets_delete')
+
+# Facets computed from a comics row; {row} is NEW or OLD
+_COMIC_FACETS = {
+    'total': "''",
+    'year': "COALESCE({row}.year, '')",
+    'series': "COALESCE({row}.series_id, '')",
+    'publisher': "COALESCE((SELECT publisher_id FROM series WHERE id = {row}.series_id), '')",
+}
+
+
+def _format_value(row: str, db_type: str) -> str:
+    if db_type == 'sqlite':
+        return f"COALESCE(LOWER(LTRIM({row}.file_extension, '.')), '')"
+    return f"COALESCE(LOWER(TRIM(LEADING '.' FROM {row}.file_extension)), '')"
+
+
+def _comic_facets(db_type: str):
+    facets = dict(_COMIC_FACETS)
+    facets['format'] = _format_value('{row}', db_type)
+    return facets
+
+
+def _upsert(db_type: str, source: str) -> str:
+    """Statement adding the (facet, value, delta) rows of ``source`` to the counters."""
+    if db_type == 'sqlite':
+        return (f"INSERT INTO {FACETS_TABLE} (facet, value, count) {source} "
+                f"ON CONFLICT (facet, value) DO UPDATE SET count = count + excluded.count;")
+    return (f"INSERT INTO {FACETS_TABLE} (facet, value, count) {source} "
+            f"ON DUPLICATE KEY UPDATE count = count + VALUES(count);")
+
+
+def _bump(db_type: str, facet: str, value: str, delta: str) -> str:
+    """Statement adding ``delta`` to one counter, creating it if needed."""
+    return _upsert(db_type, f"VALUES ({facet}, {value}, {delta})")
+
+
+def _comic_bumps(db_type: str, row: str, delta: str, total: bool = True) -> str:
+    return ' '.join(
+        _bump(db_type, f"'{facet}'", expression.format(row=row), delta)
+        for facet, expression in _comic_facets(db_type).items()
+        if total or facet != 'total'
+    )
+
+
+def _tag_bump(db_type: str, row: str, delta: str) -> str:
+    # Nothing to count once the tag itself is gone (see tags_facets_delete)
+    return _upsert(db_type, f"SELECT kind, id, {delta} FROM tags WHERE id = {row}.tag_id")
+
+
+def _series_bumps(db_type: str, old: str, new: str, row: str = 'NEW') -> str:
+    """Move a series' comics from publisher ``old`` to publisher ``new``."""
+    comics = f"(SELECT COUNT(*) FROM comics WHERE series_id = {row}.id)"
+    return (_bump(db_type, "'publisher'", f"COALESCE({old}, '')", f"-{comics}") + ' ' +
+            _bump(db_type, "'publisher'", f"COALESCE({new}, '')", comics))
+
+
+def _triggers(db_type: str) -> List[tuple]:
+    """(name, timing and event, body) of the maintenance triggers."""
+    # MySQL triggers have no WHEN clause
+    guard = f" {triggers.unless_paused(triggers.FACETS)}" if db_type == 'sqlite' else ''
+    return [
+        ('comics_facets_insert', 'AFTER INSERT ON comics', _comic_bumps(db_type, 'NEW', '1')),
+        ('comics_facets_delete', f'AFTER DELETE ON comics{guard}', _comic_bumps(db_type, 'OLD', '-1')),
+        ('comics_facets_update',
+         'AFTER UPDATE OF year, series_id, file_extension ON comics' if db_type == 'sqlite'
+         else 'AFTER UPDATE ON comics',
+         _comic_bumps(db_type, 'OLD', '-1', total=False) + ' ' +
+         _comic_bumps(db_type, 'NEW', '1', total=False)),
+        ('series_facets_update',
+         'AFTER UPDATE OF publisher_id ON series' if db_type == 'sqlite' else 'AFTER UPDATE ON series',
+         _series_bumps(db_type, 'OLD.publisher_id', 'NEW.publisher_id')),
+        # Before the cascade unlinks the comics, when their publisher can no
+        # longer be looked up through the series
+        ('series_facets_delete', 'BEFORE DELETE ON series',
+         _series_bumps(db_type, 'OLD.publisher_id', 'NULL', row='OLD')),
+        ('comic_tags_facets_insert', 'AFTER INSERT ON comic_tags', _tag_bump(db_type, 'NEW', '1')),
+        ('comic_tags_facets_delete', f'AFTER DELETE ON comic_tags{guard}',
+         _tag_bump(db_type, 'OLD', '-1')),
+        ('tags_facets_delete', 'AFTER DELETE ON tags',
+         f"DELETE FROM {FACETS_TABLE} WHERE facet = OLD.kind AND value = OLD.id;"),
+    ]
+
+
+def _counts(db_type: str, count: str, in_list: Optional[str] = None) -> List[str]:
+    """SELECTs of the (facet, value, count) rows of all comics, or of ``id IN (in_list)``."""
+    comics = f" WHERE c.id IN ({in_list})" if in_list else ''
+    links = f" WHERE ct.comic_id IN ({in_list})" if in_list else ''
+    column_facets = {
+        facet: expression.format(row='c')
+        for facet, expression in _comic_facets(db_type).items()
+        if facet not in ('total', 'publisher')
+    }
+    return [
+        f"SELECT 'total', '', {count} FROM comics c{comics}",
+        *(f"SELECT '{facet}', {expression}, {count} FROM comics c{comics} GROUP BY {expression}"
+          for facet, expression in column_facets.items()),
+        f"SELECT 'publisher', COALESCE(s.publisher_id, ''), {count} FROM comics c "
+        f"LEFT JOIN series s ON s.id = c.series_id{comics} GROUP BY COALESCE(s.publisher_id, '')",
+        f"SELECT t.kind, t.id, {count} FROM comic_tags ct "
+        f"JOIN tags t ON t.id = ct.tag_id{links} GROUP BY t.kind, t.id",
+    ]
+
+
+def _backfill(db_type: str) -> List[str]:
+    insert = f"INSERT INTO {FACETS_TABLE} (facet, value, count)"
+    return [f"DELETE FROM {FACETS_TABLE}"] + [f"{insert} {query}" for query in _counts(db_type, 'COUNT(*)')]
+
+
+def remove_statements(db_type: str, in_list: str) -> List[str]:
+    """
+    Statements subtracting the comics ``id IN (in_list)`` from the counters.
+
+    For bulk deletes: run them before the comics are deleted, with the
+    FACETS triggers paused. Each statement takes the IDs of the list once.
+    """
+    return [_upsert(db_type, query) for query in _counts(db_type, '-COUNT(*)', in_list)]
+
+
+def pausable_trigger_statements() -> List[str]:
+    """DDL recreating the SQLite triggers of PAUSABLE with their pause guard."""
+    statements = [triggers.create_statement()]
+    for name, event, body in _triggers('sqlite'):
+        if name in PAUSABLE:
+            statements.append(f"DROP TRIGGER IF EXISTS {name}")
+            statements.append(f"CREATE TRIGGER {name} {event} BEGIN {body} END")
+    return statements
+
+
+def create_statements(db_type: str) -> List[str]:
+    """DDL for the counters, their triggers and the initial counts."""
+    if db_type == 'sqlite':
+        statements = [f"""
+            CREATE TABLE IF NOT EXISTS {FACETS_TABLE} (
+                facet TEXT NOT NULL,
+                value NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (facet, value)
+            ) WITHOUT ROWID""", triggers.create_statement()]
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN {body} END"
+            for name, event, body in _triggers(db_type)
+        ]
+    else:
+        statements = [f"""
+            CREATE TABLE IF NOT EXISTS {FACETS_TABLE} (
+                facet VARCHAR(20) NOT NULL,
+                value VARCHAR(255) NOT NULL,
+                count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (facet, value)
+            )"""]
+        for name, event, body in _triggers(db_type):
+            statements.append(f"DROP TRIGGER IF EXISTS {name}")
+            statements.append(f"CREATE TRIGGER {name} {event} FOR EACH ROW BEGIN {body} END")
+    return statements + _backfill(db_type)
+
+
+def label_join(facet: str) -> Tuple[str, str]:
+    """JOIN and label expression turning a facet's values into names."""
+    if facet == 'publisher':
+        return "LEFT JOIN publishers d ON d.id = f.value", "d.name"
+    if facet == 'series':
+        return "LEFT JOIN series d ON d.id = f.value", "d.name"
+    if facet in ('year', 'format', 'total'):
+        return "", "f.value"
+    # Tag kinds
+    return "LEFT JOIN tags d ON d.id = f.value", "d.name"
@@ -0,0 +1,47 @@
+"""
+Characters, teams, locations, story arcs and genres as normalized tags.
+
+ComicInfo stores each of these as a comma-separated list. At import they are
+split into ``tags`` rows (one per kind and name) linked to comics through
+``comic_tags``, so "all comics featuring X" is an index lookup instead of a
+scan of every comic's metadata JSON.
+"""
+from typing import Any, Dict, List, Tuple
+
+# Tag kind for each metadata field
+TAG_FIELDS: Dict[str, str] = {
+    'characters': 'character',
+    'teams': 'team',
+    'locations': 'location',
+    'story_arc': 'story_arc',
+    'genre': 'genre',
+}
+TAG_KINDS = tuple(TAG_FIELDS.values())
+
+
+def split_names(value: Any) -> List[str]:
+    """Split a ComicInfo list (comma-separated string or sequence) into names."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        items = value.split(',')
+    elif isinstance(value, (list, tuple, set)):
+        items = [part for item in value for part in str(item).split(',')]
+    else:
+        items = [str(value)]
+
+    names = []
+    for item in items:
+        name = ' '.join(item.split())
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def metadata_tags(metadata: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Return the (name, kind) tags of a comic's metadata, without duplicates."""
+    return [
+        (name, kind)
+        for field, kind in TAG_FIELDS.items()
+        for name in split_names(metadata.get(field))
+    ]
@@ -0,0 +1,53 @@
+"""
+Pausing trigger maintenance during bulk writes (SQLite).
+
+The search index, facet counts and browse projection are kept current by
+row-level triggers, which is right for one comic at a time but repeats the
+same work for every row of a bulk write. Triggers guarded with
+:func:`unless_paused` can be paused by group for the length of such a write;
+the caller then does the maintenance itself with a few set-based statements.
+
+A pause is a row of ``trigger_pauses`` written in the writer's open
+transaction, so readers never see it and a rollback removes it with the rest
+of the write.
+"""
+from contextlib import contextmanager
+from typing import Iterator
+
+PAUSE_TABLE = 'trigger_pauses'
+
+# Trigger groups
+SEARCH = 'search'
+FACETS = 'facets'
+BROWSE = 'browse'
+
+
+def create_statement() -> str:
+    """DDL for the pause table."""
+    return f"CREATE TABLE IF NOT EXISTS {PAUSE_TABLE} (name TEXT PRIMARY KEY) WITHOUT ROWID"
+
+
+def unless_paused(group: str) -> str:
+    """WHEN clause skipping a trigger while ``group`` is paused."""
+    return f"WHEN NOT EXISTS (SELECT 1 FROM {PAUSE_TABLE} WHERE name = '{group}')"
+
+
+@contextmanager
+def paused(cursor, *groups: str) -> Iterator[None]:
+    """
+    Pause trigger groups for the statements run inside the block.
+
+    Args:
+        cursor: Cursor of the writer's open transaction
+        groups: Trigger groups to pause; none runs the block as it is
+    """
+    if not groups:
+        yield
+        return
+    cursor.executemany(f"INSERT OR IGNORE INTO {PAUSE_TABLE} (name) VALUES (?)",
+                       [(group,) for group in groups])
+    try:
+        yield
+    finally:
+        cursor.executemany(f"DELETE FROM {PAUSE_TABLE} WHERE name = ?",
+                           [(group,) for group in groups])
@@ -0,0 +1,228 @@
+"""
+Minimal parser for the ZIP end-of-central-directory and central directory.
+
+The standard library only exposes this through ``zipfile.ZipFile``, which
+insists on reading from a file object. Parsing the records ourselves lets the
+prefetcher fetch just the byte ranges it needs and lets the CBZ reader work
+directly on a memory map.
+"""
+import struct
+from dataclasses import dataclass
+from typing import Callable, List
+
+# Record signatures
+EOCD_SIGNATURE = b'PK\x05\x06'
+ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+ZIP64_EOCD_SIGNATURE = b'PK\x06\x06'
+CENTRAL_DIR_SIGNATURE = b'PK\x01\x02'
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+
+# Fixed record sizes
+EOCD_SIZE = 22
+ZIP64_LOCATOR_SIZE = 20
+ZIP64_EOCD_SIZE = 56
+CENTRAL_DIR_SIZE = 46
+LOCAL_HEADER_SIZE = 30
+
+# The EOCD may be followed by a comment of up to 64 KiB
+MAX_EOCD_SEARCH = EOCD_SIZE + 0xFFFF
+
+# Compression methods
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+_ZIP64_EXTRA_ID = 0x0001
+_FLAG_ENCRYPTED = 0x1
+_FLAG_UTF8 = 0x800
+
+ReadAt = Callable[[int, int], bytes]
+
+
+class ZipDirectoryError(ValueError):
+    """Raised when the archive structure cannot be parsed."""
+
+
+@dataclass
+class CentralDirectoryLocation:
+    """Position of the central directory inside the archive."""
+    offset: int
+    size: int
+    entries: int
+
+
+@dataclass
+class ZipEntry:
+    """A single central directory record."""
+    name: str
+    compress_type: int
+    flag_bits: int
+    crc: int
+    compressed_size: int
+    file_size: int
+    header_offset: int
+
+    @property
+    def is_dir(self) -> bool:
+        return self.name.endswith('/')
+
+    @property
+    def is_encrypted(self) -> bool:
+        return bool(self.flag_bits & _FLAG_ENCRYPTED)
+
+    @property
+    def is_stored(self) -> bool:
+        return self.compress_type == ZIP_STORED
+
+
+def locate_central_directory(read_at: ReadAt, file_size: int) -> CentralDirectoryLocation:
+    """
+    Find the central directory from the end of the archive.
+
+    Args:
+        read_at: Callable returning ``size`` bytes starting at ``offset``
+        file_size: Total size of the archive in bytes
+
+    Returns:
+        Location of the central directory
+
+    Raises:
+        ZipDirectoryError: If no valid end-of-central-directory record exists
+    """
+    if file_size < EOCD_SIZE:
+        raise ZipDirectoryError("File too small to be a ZIP archive")
+
+    tail_size = min(file_size, MAX_EOCD_SEARCH)
+    tail_offset = file_size - tail_size
+    tail = bytes(read_at(tail_offset, tail_size))
+
+    pos = tail.rfind(EOCD_SIGNATURE)
+    if pos < 0 or pos + EOCD_SIZE > len(tail):
+        raise ZipDirectoryError("End of central directory record not found")
+
+    (_, _, _, _, entries, cd_size, cd_offset, _) = struct.unpack(
+        '<4sHHHHIIH', tail[pos:pos + EOCD_SIZE]
+    )
+
+    if entries == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        eocd_offset = tail_offset + pos
+        return _locate_zip64_directory(read_at, eocd_offset)
+
+    if cd_offset + cd_size > file_size:
+        raise ZipDirectoryError("Central directory lies outside the file")
+
+    return CentralDirectoryLocation(cd_offset, cd_size, entries)
+
+
+def _locate_zip64_directory(read_at: ReadAt, eocd_offset: int) -> CentralDirectoryLocation:
+    """Resolve the ZIP64 end-of-central-directory record."""
+    locator_offset = eocd_offset - ZIP64_LOCATOR_SIZE
+    if locator_offset < 0:
+        raise ZipDirectoryError("ZIP64 locator missing")
+
+    locator = bytes(read_at(locator_offset, ZIP64_LOCATOR_SIZE))
+    signature, _, zip64_offset, _ = struct.unpack('<4sIQI', locator)
+    if signature != ZIP64_LOCATOR_SIGNATURE:
+        raise ZipDirectoryError("ZIP64 locator missing")
+
+    record = bytes(read_at(zip64_offset, ZIP64_EOCD_SIZE))
+    if record[:4] != ZIP64_EOCD_SIGNATURE:
+        raise ZipDirectoryError("ZIP64 end of central directory record not found")
+
+    entries, cd_size, cd_offset = struct.unpack('<QQQ', record[32:56])
+    return CentralDirectoryLocation(cd_offset, cd_size, entries)
+
+
+def parse_central_directory(data: bytes, entries: int) -> List[ZipEntry]:
+    """
+    Parse the records of a central directory.
+
+    Args:
+        data: The raw central directory bytes
+        entries: Number of records announced by the EOCD
+
+    Returns:
+        List of entries in directory order
+    """
+    result = []
+    pos = 0
+    view = memoryview(data)
+
+    for _ in range(entries):
+        if pos + CENTRAL_DIR_SIZE > len(view):
+            raise ZipDirectoryError("Truncated central directory")
+        header = view[pos:pos + CENTRAL_DIR_SIZE]
+        if header[:4] != CENTRAL_DIR_SIGNATURE:
+            raise ZipDirectoryError("Bad central directory record signature")
+
+        (flag_bits, compress_type, _, _, crc, compressed_size, file_size,
+         name_len, extra_len, comment_len, _, _, _, header_offset) = struct.unpack(
+            '<8xHHHHIIIHHHHHII', header
+        )
+
+        name_start = pos + CENTRAL_DIR_SIZE
+        raw_name = bytes(view[name_start:name_start + name_len])
+        extra = view[name_start + name_len:name_start + name_len + extra_len]
+
+        if (file_size == 0xFFFFFFFF or compressed_size == 0xFFFFFFFF
+                or header_offset == 0xFFFFFFFF):
+            file_size, compressed_size, header_offset = _apply_zip64_extra(
+                extra, file_size, compressed_size, header_offset
+            )
+
+        encoding = 'utf-8' if flag_bits & _FLAG_UTF8 else 'cp437'
+        result.append(ZipEntry(
+            name=raw_name.decode(encoding, errors='replace'),
+            compress_type=compress_type,
+            flag_bits=flag_bits,
+            crc=crc,
+            compressed_size=compressed_size,
+            file_size=file_size,
+            header_offset=header_offset,
+        ))
+
+        pos = name_start + name_len + extra_len + comment_len
+
+    return result
+
+
+def _apply_zip64_extra(extra: memoryview, file_size: int, compressed_size: int,
+                       header_offset: int):
+    """Replace saturated 32-bit fields with their ZIP64 extra field values."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, field_len = struct.unpack('<HH', extra[pos:pos + 4])
+        if field_id == _ZIP64_EXTRA_ID:
+            values = extra[pos + 4:pos + 4 + field_len]
+            offset = 0
+            if file_size == 0xFFFFFFFF:
+                file_size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                offset += 8
+            if compressed_size == 0xFFFFFFFF:
+                compressed_size = struct.unpack('<Q', values[offset:offset + 8])[0]
+                offset += 8
+            if header_offset == 0xFFFFFFFF:
+                header_offset = struct.unpack('<Q', values[offset:offset + 8])[0]
+            break
+        pos += 4 + field_len
+    return file_size, compressed_size, header_offset
+
+
+def read_entries(read_at: ReadAt, file_size: int) -> List[ZipEntry]:
+    """Locate and parse the central directory of an archive."""
+    location = locate_central_directory(read_at, file_size)
+    data = read_at(location.offset, location.size)
+    return parse_central_directory(data, location.entries)
+
+
+def local_data_offset(read_at: ReadAt, entry: ZipEntry) -> int:
+    """
+    Return the offset of a member's data, just past its local header.
+
+    The local header's name and extra field lengths can differ from the
+    central directory, so they have to be read from the local header itself.
+    """
+    header = bytes(read_at(entry.header_offset, LOCAL_HEADER_SIZE))
+    if len(header) < LOCAL_HEADER_SIZE or header[:4] != LOCAL_HEADER_SIGNATURE:
+        raise ZipDirectoryError(f"Bad local header for {entry.name}")
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    return entry.header_offset + LOCAL_HEADER_SIZE + name_len + extra_len
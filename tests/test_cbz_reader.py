@@ -0,0 +1,55 @@
+import zipfile
+
+import pytest
+
+from struttura.cbz_reader import CBZReader, MemoryViewIO
+from struttura.zip_directory import ZipDirectoryError
+
+
+@pytest.fixture
+def cbz_path(tmp_path):
+    path = tmp_path / 'comic.cbz'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('ComicInfo.xml', '<ComicInfo/>', compress_type=zipfile.ZIP_DEFLATED)
+        zf.writestr('p10.jpg', b'ten' * 100)
+        zf.writestr('p2.jpg', b'two' * 100, compress_type=zipfile.ZIP_DEFLATED)
+    return str(path)
+
+
+def test_stored_members_are_memoryviews(cbz_path):
+    with CBZReader(cbz_path) as reader:
+        data = reader.read('p10.jpg')
+        assert isinstance(data, memoryview)
+        assert data.tobytes() == b'ten' * 100
+        del data
+
+
+def test_compressed_members_fall_back_to_streaming(cbz_path):
+    with CBZReader(cbz_path) as reader:
+        assert reader.read('p2.jpg') == b'two' * 100
+        with reader.open('p2.jpg') as member:
+            assert member.read(3) == b'two'
+
+
+def test_pages_and_in_memory_source(cbz_path):
+    with open(cbz_path, 'rb') as f:
+        contents = f.read()
+    with CBZReader(contents) as reader:
+        assert reader.pages() == ['p2.jpg', 'p10.jpg']
+        with reader.open('p10.jpg') as member:
+            assert member.read() == b'ten' * 100
+
+
+def test_memoryview_io_seek_and_read():
+    stream = MemoryViewIO(b'0123456789')
+    stream.seek(-3, 2)
+    assert stream.read() == b'789'
+    stream.seek(2)
+    assert stream.read(2) == b'23'
+
+
+def test_rejects_non_zip(tmp_path):
+    path = tmp_path / 'bad.cbz'
+    path.write_bytes(b'not a zip archive at all')
+    with pytest.raises(ZipDirectoryError):
+        CBZReader(str(path))
@@ -0,0 +1,73 @@
+import io
+import time
+import zipfile
+
+import pytest
+from PIL import Image
+
+from struttura import cbz_reader
+from struttura.cbz_reader import CBZReader
+from struttura.comic_reader import ComicPageSource, PageLoader
+from struttura.page_cache import PageCache
+
+
+def make_cbz(path, count=5, size=(400, 600)):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('__MACOSX/._p1.jpg', b'resource fork')
+        for i in range(count, 0, -1):
+            buffer = io.BytesIO()
+            Image.new('RGB', size, (i * 40, 0, 0)).save(buffer, 'JPEG')
+            zf.writestr(f'p{i}.jpg', buffer.getvalue())
+    return str(path)
+
+
+def test_page_cache_evicts_least_recently_used():
+    cache = PageCache(max_bytes=100)
+    cache.put('a', 1, 40)
+    cache.put('b', 2, 40)
+    assert cache.get('a') == 1
+    cache.put('c', 3, 40)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.nbytes == 80
+    cache.put('huge', 4, 500)
+    assert 'huge' not in cache
+
+
+def test_loader_fits_pages_and_prefetches_neighbours(tmp_path):
+    with ComicPageSource(make_cbz(tmp_path / 'comic.cbz')) as source:
+        assert source.pages == ['p1.jpg', 'p2.jpg', 'p3.jpg', 'p4.jpg', 'p5.jpg']
+        loader = PageLoader(source, cache_mb=16, prefetch_ahead=2, prefetch_behind=1)
+        try:
+            page = loader.get(1, (100, 100))
+            assert page.size == (67, 100)
+
+            loader.prefetch(1, (100, 100))
+            deadline = time.time() + 5
+            while not all((i, (100, 100)) in loader.cache for i in (0, 2, 3)):
+                assert time.time() < deadline
+                time.sleep(0.01)
+            assert (4, (100, 100)) not in loader.cache
+        finally:
+            loader.close()
+
+
+def test_source_reads_pages_from_the_stored_index(tmp_path, monkeypatch):
+    path = make_cbz(tmp_path / 'comic.cbz', count=3)
+    with CBZReader(path) as reader:
+        index = [{'member_name': name, 'data_offset': reader.data_offset(name),
+                  'file_size': reader.getinfo(name).file_size} for name in reader.pages()]
+        expected = [bytes(reader.read(page['member_name'])) for page in index]
+
+    # Neither the listing is sorted nor a local header read
+    monkeypatch.setattr(cbz_reader, 'sort_pages', lambda names: pytest.fail('archive sorted'))
+    monkeypatch.setattr(cbz_reader, 'local_data_offset', lambda *args: pytest.fail('header read'))
+    with ComicPageSource(path, index) as source:
+        assert source.pages == ['p1.jpg', 'p2.jpg', 'p3.jpg']
+        assert [bytes(source.read(i)) for i in range(3)] == expected
+    monkeypatch.undo()
+
+    # An index that no longer matches the archive is ignored
+    stale = index + [{'member_name': 'p4.jpg', 'data_offset': 1, 'file_size': 1}]
+    with ComicPageSource(path, stale) as source:
+        assert source.pages == ['p1.jpg', 'p2.jpg', 'p3.jpg']
@@ -0,0 +1,47 @@
+import io
+import zipfile
+
+from PIL import Image
+
+from struttura.archive_utils import cover_candidates
+from struttura.comic_scanner import ComicScanner
+
+
+def jpeg(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 60), color).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def test_cover_candidates_honour_front_cover():
+    names = ['p3.jpg', 'p1.jpg', '__MACOSX/._p1.jpg', 'p2.jpg', '.DS_Store']
+    assert cover_candidates(names) == ['p1.jpg', 'p2.jpg', 'p3.jpg']
+    assert cover_candidates(names, front_cover=2) == ['p3.jpg', 'p1.jpg', 'p2.jpg']
+    assert cover_candidates(names, front_cover=7) == ['p1.jpg', 'p2.jpg', 'p3.jpg']
+
+
+def test_zip_cover_falls_back_past_corrupt_page(tmp_path):
+    path = str(tmp_path / 'comic.cbz')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('__MACOSX/._p1.jpg', b'resource fork')
+        zf.writestr('p1.jpg', b'not an image')
+        zf.writestr('p2.jpg', jpeg((0, 0, 255)))
+
+    data, mime = ComicScanner()._extract_zip_cover(path)
+    assert mime == 'image/jpeg'
+    assert Image.open(io.BytesIO(data)).getpixel((20, 30))[2] > 200
+
+
+def test_front_cover_from_comic_info(tmp_path):
+    path = str(tmp_path / 'comic.cbz')
+    comic_info = ('<ComicInfo><Pages><Page Image="0"/>'
+                  '<Page Image="1" Type="FrontCover"/></Pages></ComicInfo>')
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('ComicInfo.xml', comic_info)
+        zf.writestr('p1.jpg', jpeg((255, 0, 0)))
+        zf.writestr('p2.jpg', jpeg((0, 255, 0)))
+
+    metadata = ComicScanner().extract_metadata(path)
+    assert metadata['front_cover_page'] == 1
+    cover = Image.open(io.BytesIO(metadata['cover_image']))
+    assert cover.getpixel((20, 30))[1] > 200
@@ -0,0 +1,801 @@
+import csv
+import gzip
+import io
+import logging
+import sqlite3
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+from struttura.backup import backup_filename
+from struttura.database import ComicDatabase
+from struttura.statements import Statement
+
+
+def make_cbz(path, pages=('p10.jpg', 'p2.jpg', 'p1.jpg'), comic_info=None, size=(60, 90)):
+    with zipfile.ZipFile(path, 'w') as zf:
+        if comic_info:
+            zf.writestr('ComicInfo.xml', comic_info)
+        for name in pages:
+            buffer = io.BytesIO()
+            Image.new('RGB', size, (200, 10, 10)).save(buffer, 'JPEG')
+            zf.writestr(name, buffer.getvalue())
+    return str(path)
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = ComicDatabase(str(tmp_path / 'comics.sqlite'))
+    assert database.create_tables()
+    yield database
+    database.close()
+
+
+def test_page_index_is_persisted_in_reading_order(db, tmp_path):
+    path = make_cbz(tmp_path / 'Series 001 (2020).cbz')
+    comic_id = db.add_comic_from_file(path)
+
+    pages = db.get_pages(comic_id)
+    assert [p['member_name'] for p in pages] == ['p1.jpg', 'p2.jpg', 'p10.jpg']
+    assert (pages[0]['width'], pages[0]['height']) == (60, 90)
+    assert pages[0]['data_offset'] is not None
+
+    assert db.get_comic(comic_id)['file_path'] == path
+
+    page = db.get_page(comic_id, 2)
+    assert page['member_name'] == 'p10.jpg'
+
+    row = db.execute_query("SELECT page_count FROM comics WHERE id = %s", (comic_id,), fetch=True)
+    assert row[0]['page_count'] == 3
+
+
+def test_bulk_import_resolves_lookups_once_per_batch(db, tmp_path):
+    comic_info = ('<ComicInfo><Series>Saga</Series><Publisher>Image</Publisher>'
+                  '<Writer>Brian K. Vaughan</Writer></ComicInfo>')
+    records = [
+        db.extract_comic_record(make_cbz(tmp_path / f'Saga {i:03d}.cbz', comic_info=comic_info))
+        for i in range(1, 6)
+    ]
+    # A path that is already stored, unchanged, is skipped
+    records.append(dict(records[0]))
+
+    ids = db.add_comics_bulk(records, batch_size=4)
+    assert len(ids) == 5
+
+    assert db.get_publisher_count() == 1
+    assert db.get_series_count() == 1
+    links = db.execute_query("SELECT COUNT(*) AS n FROM comic_authors", fetch=True)
+    assert links[0]['n'] == 5
+    pages = db.execute_query("SELECT COUNT(*) AS n FROM comic_pages", fetch=True)
+    assert pages[0]['n'] == 15
+
+
+def test_connection_profiles_apply_pragmas(db, tmp_path):
+    def pragma(connection, name):
+        return connection.execute(f"PRAGMA {name}").fetchone()[0]
+
+    assert db.profile == 'interactive'
+    assert pragma(db.connection, 'journal_mode') == 'wal'
+    assert pragma(db.connection, 'busy_timeout') == 5000
+
+    db.set_profile('bulk-import')
+    assert pragma(db.connection, 'cache_size') == -262144
+    # Scans stay crash-safe: WAL with NORMAL, never OFF
+    assert pragma(db.connection, 'synchronous') == 1
+    # Pooled reader connections follow the switch
+    assert db.execute_query("PRAGMA cache_size", fetch=True)[0]['cache_size'] == -262144
+
+    replica = ComicDatabase(db.database, profile='read-only-replica')
+    try:
+        assert replica.get_comic_count() == 0
+        with pytest.raises(Exception):
+            replica.execute_query("INSERT INTO publishers (name) VALUES (%s)", ('X',))
+    finally:
+        replica.close()
+
+
+def test_reads_do_not_wait_for_the_writer(db):
+    started = threading.Event()
+
+    def slow_write():
+        db.connection.execute("INSERT INTO publishers (name) VALUES ('Slow')")
+        started.set()
+        time.sleep(0.5)
+        db.connection.commit()
+        return db.connection.execute("SELECT COUNT(*) FROM publishers").fetchone()[0]
+
+    future = db.submit_write(slow_write)
+    assert started.wait(5)
+
+    start = time.perf_counter()
+    assert db.get_publisher_count() == 0
+    # The liveness check uses a reader too, not the writer's open transaction
+    assert db.is_connected()
+    assert time.perf_counter() - start < 0.25
+
+    assert future.result() == 1
+    assert db.get_publisher_count() == 1
+
+
+def test_only_read_only_statements_run_on_readers(db):
+    for query in ("SELECT 1", "WITH t AS (SELECT 'delete' AS word) SELECT replace(word, 'd', 'D') FROM t",
+                  "PRAGMA cache_size", "PRAGMA main.table_info(comics)", "EXPLAIN QUERY PLAN SELECT 1"):
+        assert ComicDatabase._is_read_query(query), query
+    for query in ("WITH old AS (SELECT id FROM publishers) DELETE FROM publishers WHERE id IN old",
+                  "PRAGMA optimize", "PRAGMA wal_checkpoint(PASSIVE)", "PRAGMA incremental_vacuum",
+                  "PRAGMA cache_size = 100", "PRAGMA cache_size(100)"):
+        assert not ComicDatabase._is_read_query(query), query
+
+    db.execute_query("INSERT INTO publishers (name) VALUES ('Old')")
+    db.execute_query("WITH old AS (SELECT id FROM publishers WHERE name = 'Old') "
+                     "DELETE FROM publishers WHERE id IN old")
+    db.execute_query("PRAGMA wal_checkpoint(PASSIVE)")
+    db.execute_query("PRAGMA optimize")
+    assert db.get_publisher_count() == 0
+
+
+def test_existing_database_is_migrated_in_place(db, tmp_path):
+    from struttura import migrations
+
+    # Turn the fixture into a library created before migrations existed
+    for index in ('idx_comics_issue', 'idx_comic_authors_author'):
+        db.execute_query(f"DROP INDEX {index}")
+    db.execute_query("DROP TABLE schema_version")
+    db.add_comic_from_file(make_cbz(tmp_path / 'Old 001.cbz'))
+    assert db.get_schema_version() == 0
+
+    assert db.create_tables()
+    assert db.get_schema_version() == migrations.LATEST_VERSION
+    indexes = db.execute_query(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'", fetch=True)
+    assert {'idx_comics_issue', 'idx_comic_authors_author'} <= {r['name'] for r in indexes}
+    assert db.get_comic_count() == 1
+    # Running again is a no-op
+    assert db.migrate() == migrations.LATEST_VERSION
+
+
+def test_full_text_search_uses_prefixes_and_ranks_titles_first(db, tmp_path):
+    def record(name, **fields):
+        path = make_cbz(tmp_path / f'{name}.cbz')
+        return dict(db.extract_comic_record(path), **fields)
+
+    db.add_comics_bulk([
+        record('a', title='Batman: Year One', series='Batman', authors=['Frank Miller']),
+        record('b', title='Daredevil: Born Again', series='Daredevil', authors=['Frank Miller'],
+               summary='A story with a batman cameo'),
+        record('c', title='Saga', series='Saga', characters=['Alana', 'Marko']),
+    ])
+
+    assert [c['title'] for c in db.get_comics(search='bat')] == \
+        ['Batman: Year One', 'Daredevil: Born Again']
+    assert [c['title'] for c in db.get_comics(search='mill year')] == ['Batman: Year One']
+    assert [c['title'] for c in db.get_comics(search='marko')] == ['Saga']
+    # FTS5 syntax typed by the user is searched as text
+    assert db.get_comics(search='"saga" OR') == []
+
+    saga = db.get_comics(search='saga')[0]
+    db.delete_comic(saga['id'])
+    assert db.get_comics(search='marko') == []
+
+
+def test_search_matches_file_names_and_rebuilds_author_links_once(db, tmp_path):
+    def record(name, **fields):
+        return dict(db.extract_comic_record(make_cbz(tmp_path / name)), **fields)
+
+    saga = record('Moonlight_Sonata_01.cbz', title='Saga', series='Saga', authors=['Brian K. Vaughan', 'Fiona Staples'])
+    db.add_comics_bulk([saga])
+    assert [c['title'] for c in db.get_comics(search='moonlight')] == ['Saga']
+    assert [c['title'] for c in db.get_comics(search='staples vaughan')] == ['Saga']
+
+    # Author links written in bulk leave no pause behind and refresh the document
+    db.add_comics_bulk([dict(saga, authors=['Fiona Staples', 'Steve Wands'])])
+    assert db.execute_query("SELECT COUNT(*) AS n FROM trigger_pauses", fetch=True)[0]['n'] == 0
+    assert db.get_comics(search='vaughan') == []
+    assert [c['title'] for c in db.get_comics(search='wands')] == ['Saga']
+
+    comic_id = db.get_comics(search='saga')[0]['id']
+    db.execute_query("UPDATE comics SET file_path = %s WHERE id = %s",
+                     (str(tmp_path / 'Saga_001.cbz'), comic_id))
+    assert db.get_comics(search='moonlight') == []
+    # Per-link triggers still keep single writes current
+    db.execute_query("DELETE FROM comic_authors WHERE comic_id = %s", (comic_id,))
+    assert db.get_comics(search='wands') == []
+
+
+def test_search_index_is_created_when_migrated_without_fts5(db, tmp_path):
+    # A library migrated by a SQLite build without FTS5 has version 2 but no index
+    triggers = db.execute_query(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%fts%'", fetch=True)
+    for trigger in triggers:
+        db.execute_query(f"DROP TRIGGER {trigger['name']}")
+    db.execute_query("DROP TABLE comics_fts")
+    db.add_comic_from_file(make_cbz(tmp_path / 'Saga 001.cbz'))
+
+    assert db.create_tables()
+    assert db._has_search_index()
+    assert [c['title'] for c in db.get_comics(search='saga')] == ['Saga']
+
+
+def test_covers_are_stored_once_and_loaded_on_demand(db, tmp_path):
+    first = db.add_comic_from_file(make_cbz(tmp_path / 'Saga 001.cbz'))
+    second = db.add_comic_from_file(make_cbz(tmp_path / 'Saga 001 (rescan).cbz'))
+
+    comics = db.get_comics()
+    assert 'cover_image' not in comics[0]
+    assert comics[0]['cover_hash'] == comics[1]['cover_hash']
+    assert db.execute_query("SELECT COUNT(*) AS n FROM covers", fetch=True)[0]['n'] == 1
+
+    cover = db.get_cover(second)
+    assert cover['mime_type'] == 'image/jpeg'
+    assert Image.open(io.BytesIO(cover['data'])).size[1] > 0
+    assert db.get_cover(first)['hash'] == cover['hash']
+
+
+def test_inline_covers_are_moved_to_the_cover_store(tmp_path, monkeypatch):
+    from struttura import database as database_module, migrations
+
+    # A library at schema version 2 still keeps covers in the comics row
+    monkeypatch.setattr(database_module, 'migrate',
+                        lambda connection, db_type: migrations.migrate(connection, db_type, target=2))
+    old = ComicDatabase(str(tmp_path / 'old.sqlite'))
+    try:
+        assert old.create_tables()
+        for i in range(3):
+            old.execute_query(
+                "INSERT INTO comics (title, file_path, cover_image, cover_image_type) "
+                "VALUES (%s, %s, %s, %s)", (f'Old {i}', f'/old/{i}.cbz', b'cover', 'image/jpeg'))
+        monkeypatch.undo()
+
+        assert old.migrate() == migrations.LATEST_VERSION
+        columns = {r['name'] for r in old.execute_query("PRAGMA table_info(comics)", fetch=True)}
+        assert 'cover_image' not in columns
+        assert old.execute_query("SELECT COUNT(*) AS n FROM covers", fetch=True)[0]['n'] == 1
+        comic_id = old.get_comics(search='Old')[0]['id']
+        assert old.get_cover(comic_id)['data'] == b'cover'
+    finally:
+        old.close()
+
+
+def test_comics_are_paged_with_a_keyset_cursor(db):
+    records = [
+        {'title': f'Issue {i}', 'series': 'Saga' if i % 2 else 'Monstress',
+         'issue_number': str(i), 'file_path': f'/library/{i:03d}.cbz', 'file_size': 1,
+         'file_modified': 1.0, 'file_created': 1.0}
+        for i in range(1, 26)
+    ]
+    db.add_comics_bulk(records)
+
+    listed, cursor = [], None
+    while True:
+        page = db.get_comics_page(sort='series', page_size=10, cursor=cursor)
+        listed += page['comics']
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert len(listed) == 25
+    assert [c['series'] for c in listed[:12]] == ['Monstress'] * 12
+    # Issues sort numerically, not as text
+    assert [c['issue_number'] for c in listed[:3]] == ['2', '4', '6']
+    assert 'sk0' not in listed[0]
+
+    page = db.get_comics_page(series='Saga', sort='title', page_size=5)
+    assert len(page['comics']) == 5 and page['next_cursor']
+    with pytest.raises(ValueError):
+        db.get_comics_page(sort='year', cursor=page['next_cursor'])
+
+    assert db.estimate_comic_count() == {'count': 25, 'exact': True}
+    assert db.estimate_comic_count(series='Saga', cap=5) == {'count': 5, 'exact': False}
+
+
+def test_pages_are_read_in_index_order_without_sorting(db, caplog):
+    db.add_comics_bulk([
+        {'title': f'Issue {i:02d}', 'series': None if i % 5 == 0 else f'Series {i % 3}',
+         'publisher': 'Image' if i % 2 else None, 'year': None if i % 4 == 0 else 2000 + i % 3,
+         'issue_number': str(i), 'file_path': f'/library/{i:03d}.cbz', 'file_size': 1,
+         'file_modified': 1.0, 'file_created': 1.0}
+        for i in range(1, 31)
+    ])
+
+    def read_all(**filters):
+        listed, cursor = [], None
+        with caplog.at_level(logging.WARNING, logger='struttura.querylog'):
+            while True:
+                page = db.get_comics_page(page_size=7, cursor=cursor, **filters)
+                listed += [c['title'] for c in page['comics']]
+                cursor = page['next_cursor']
+                if cursor is None:
+                    return listed
+
+    db.slow_query_ms = 1e-6
+    for sort, filters in (('series', {}), ('series', {'series': 'Series 1'}),
+                          ('series', {'publisher': 'Image'}), ('year', {}), ('title', {})):
+        caplog.clear()
+        comics = db.get_comics(**filters)
+        if sort == 'year':
+            comics.sort(key=lambda c: (c['year'] or 0, c['title']))
+        elif sort == 'title':
+            comics.sort(key=lambda c: c['title'])
+        assert read_all(sort=sort, **filters) == [c['title'] for c in comics]
+        plans = [r.getMessage() for r in caplog.records if 'LIMIT ?' in r.getMessage()]
+        assert plans and not any('TEMP B-TREE' in plan for plan in plans), plans
+    db.slow_query_ms = None
+
+
+def test_issues_are_listed_in_reading_order_from_a_stored_key(db):
+    issues = ['10', 'Annual 1', '2', '1.5', '½', '1A', '001', '-1', None]
+    db.add_comics_bulk([
+        {'title': f'Saga {issue}', 'series': 'Saga', 'issue_number': issue,
+         'file_path': f'/library/saga/{i:03d}.cbz', 'file_size': 1,
+         'file_modified': 1.0, 'file_created': 1.0}
+        for i, issue in enumerate(issues)
+    ])
+    expected = [None, '-1', '½', '001', '1A', '1.5', '2', '10', 'Annual 1']
+    assert [c['issue_number'] for c in db.get_comics(series='Saga')] == expected
+    page = db.get_comics_page(series='Saga', sort='series', page_size=5)
+    page = db.get_comics_page(series='Saga', sort='series', page_size=5, cursor=page['next_cursor'])
+    assert [c['issue_number'] for c in page['comics']] == expected[5:]
+
+    # Existing comics get their key from the migration
+    db.execute_query("UPDATE comics SET issue_sort_key = ''")
+    db.execute_query("DELETE FROM schema_version WHERE version >= 6")
+    db.migrate()
+    assert [c['issue_number'] for c in db.get_comics(series='Saga')] == expected
+    plan = db.execute_query(
+        "EXPLAIN QUERY PLAN SELECT id FROM comics WHERE series_id = 1 ORDER BY issue_sort_key, id",
+        fetch=True)
+    assert 'idx_comics_issue' in plan[0]['detail'] and len(plan) == 1
+
+
+def test_browse_projection_is_kept_current_and_paged_without_joins(db):
+    def record(i, **fields):
+        return dict({'title': f'Issue {i}', 'series': 'Saga' if i % 2 else 'Monstress',
+                     'publisher': 'Image', 'issue_number': str(i), 'year': 2010 + i,
+                     'file_path': f'/library/{i:03d}.cbz', 'file_size': 1,
+                     'file_modified': 1.0, 'file_created': 1.0}, **fields)
+
+    def browse(**filters):
+        listed, cursor = [], None
+        while True:
+            page = db.get_browse_page(page_size=4, cursor=cursor, **filters)
+            listed += page['comics']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return listed
+
+    ids = db.add_comics_bulk([record(i) for i in range(1, 12)] + [record(12, series=None)])
+    listed = browse()
+    assert [c['id'] for c in listed] == [c['id'] for c in db.get_comics_page(page_size=20)['comics']]
+    assert listed[0] == {'id': ids[-1], 'title': 'Issue 12', 'series': None, 'issue_number': '12',
+                         'publisher': None, 'year': 2022}
+    assert [c['issue_number'] for c in browse(series='Saga')] == ['1', '3', '5', '7', '9', '11']
+
+    # Rescans, renames and deletes reach the projection in the same transaction
+    db.add_comics_bulk([record(3, title='Issue three', issue_number='2.5')])
+    db.execute_query("UPDATE publishers SET name = 'Image Comics'")
+    db.execute_query("UPDATE series SET name = 'Saga (2012)' WHERE name = 'Saga'")
+    db.delete_comics(ids[:1])
+    saga = browse(publisher='Image Comics', series='Saga (2012)')
+    assert [(c['title'], c['issue_number']) for c in saga[:2]] == [('Issue three', '2.5'), ('Issue 5', '5')]
+    assert len(browse()) == 11
+    assert db.estimate_comic_count(publisher='Image Comics') == {'count': 10, 'exact': True}
+
+    plan = db.execute_query(
+        "EXPLAIN QUERY PLAN SELECT * FROM comic_browse WHERE series_name = 'Saga (2012)' "
+        "ORDER BY series_name, publisher_id, series_id, issue_sort_key, comic_id", fetch=True)
+    assert len(plan) == 1 and 'comic_browse' in plan[0]['detail']
+
+
+def test_lookup_cache_resolves_names_without_queries_and_stays_coherent(db, caplog):
+    def records(start, publisher='Image'):
+        return [
+            {'title': f'Saga {i}', 'series': 'Saga', 'publisher': publisher,
+             'authors': ['Brian K. Vaughan'], 'file_path': f'/library/saga/{i:03d}.cbz',
+             'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0}
+            for i in range(start, start + 3)
+        ]
+
+    def series_names():
+        rows = db.execute_query("""
+            SELECT s.name AS series, p.name AS publisher FROM comics c
+            JOIN series s ON s.id = c.series_id JOIN publishers p ON p.id = s.publisher_id
+        """, fetch=True)
+        return {(r['series'], r['publisher']) for r in rows}
+
+    db.add_comics_bulk(records(1))
+
+    statements = []
+    db.submit_write(db.connection.set_trace_callback, statements.append).result()
+    db.add_comics_bulk(records(4))
+    db.submit_write(db.connection.set_trace_callback, None).result()
+    assert not [s for s in statements if 'FROM publishers' in s or 'FROM authors' in s]
+
+    # Deleted through this database, then by another connection
+    db.execute_query("DELETE FROM comics")
+    db.execute_query("DELETE FROM series")
+    db.add_comics_bulk(records(7))
+    assert series_names() == {('Saga', 'Image')}
+
+    other = sqlite3.connect(db.database)
+    other.executescript("DELETE FROM comic_authors; DELETE FROM comics; DELETE FROM series; "
+                        "DELETE FROM publishers; DELETE FROM authors;")
+    other.close()
+    assert db.add_comics_bulk(records(10))
+    assert series_names() == {('Saga', 'Image')}
+    assert db.execute_query("SELECT COUNT(*) AS n FROM authors", fetch=True)[0]['n'] == 1
+    # Stale IDs would have failed the batches on their foreign keys
+    assert 'retrying one at a time' not in caplog.text
+
+
+def test_tags_are_normalized_and_queried_through_indexes(db, tmp_path):
+    def record(name, **fields):
+        return dict(file_path=f'/library/{name}.cbz', title=name, file_size=1,
+                    file_modified=1.0, file_created=1.0, **fields)
+
+    db.add_comics_bulk([
+        record('Hush 1', characters='Batman, Catwoman', teams=['Justice League'], genre='Superhero'),
+        record('Hush 2', characters='Batman,  Killer Croc', story_arc='Hush', genre='Superhero'),
+        record('Saga 1', characters=['Alana', 'Marko'], locations='Wreath', genre='Sci-Fi'),
+    ])
+
+    titles = lambda comics: sorted(c['title'] for c in comics)
+    assert titles(db.get_comics(tags={'character': 'Batman'})) == ['Hush 1', 'Hush 2']
+    assert titles(db.get_comics(tags={'character': ['Batman', 'Catwoman']})) == ['Hush 1']
+    assert titles(db.get_comics_page(tags={'genre': 'Sci-Fi'})['comics']) == ['Saga 1']
+    assert db.estimate_comic_count(tags={'story_arc': 'Hush'}) == {'count': 1, 'exact': True}
+    assert [t['name'] for t in db.get_tags('character')] == \
+        ['Alana', 'Batman', 'Catwoman', 'Killer Croc', 'Marko']
+    hush = db.get_comics(tags={'story_arc': 'Hush'})[0]
+    assert db.get_comic_tags(hush['id']) == {
+        'character': ['Batman', 'Killer Croc'], 'genre': ['Superhero'], 'story_arc': ['Hush']}
+    with pytest.raises(ValueError):
+        db.get_comics(tags={'villain': 'Joker'})
+
+    plan = db.execute_query("""
+        EXPLAIN QUERY PLAN SELECT ct.comic_id FROM comic_tags ct JOIN tags t ON t.id = ct.tag_id
+        WHERE t.name = 'Batman' AND t.kind = 'character'""", fetch=True)
+    assert not any(row['detail'].startswith('SCAN') for row in plan)
+
+
+def test_tags_are_backfilled_from_metadata(tmp_path, monkeypatch):
+    from struttura import database as database_module, migrations
+
+    monkeypatch.setattr(database_module, 'migrate',
+                        lambda connection, db_type: migrations.migrate(connection, db_type, target=3))
+    old = ComicDatabase(str(tmp_path / 'old.sqlite'))
+    try:
+        assert old.create_tables()
+        old.execute_query(
+            "INSERT INTO comics (title, file_path, metadata) VALUES (%s, %s, %s)",
+            ('Old', '/old/1.cbz', '{"characters": "Batman, Robin", "genre": "Noir"}'))
+        old.execute_query(
+            "INSERT INTO comics (title, file_path, metadata) VALUES (%s, %s, %s)",
+            ('Broken', '/old/2.cbz', 'not json'))
+        monkeypatch.undo()
+
+        assert old.migrate() == migrations.LATEST_VERSION
+        assert [c['title'] for c in old.get_comics(tags={'character': 'Robin', 'genre': 'Noir'})] == ['Old']
+    finally:
+        old.close()
+
+
+def test_statistics_are_maintained_by_the_write_transactions(db):
+    def record(i, **fields):
+        return dict(dict(file_path=f'/library/{i:03d}.cbz', title=f'Comic {i}', file_size=1,
+                         file_modified=1.0, file_created=1.0), **fields)
+
+    def counts(facet):
+        return {row['label']: row['count'] for row in db.get_facet_counts(facet)}
+
+    def recounted():
+        # What the counters must match after any sequence of changes
+        rows = db.execute_query("""
+            SELECT COUNT(*) AS n, COUNT(DISTINCT c.series_id) AS series,
+                   COUNT(DISTINCT s.publisher_id) AS publishers
+            FROM comics c LEFT JOIN series s ON s.id = c.series_id""", fetch=True)[0]
+        stats = db.get_library_stats()
+        return (stats['comics'], stats['distinct'].get('series', 0),
+                stats['distinct'].get('publisher', 0)) == (rows['n'], rows['series'], rows['publishers'])
+
+    db.add_comics_bulk([
+        record(1, series='Saga', publisher='Image', year=2012, genre='Sci-Fi'),
+        record(2, series='Saga', publisher='Image', year=2013, genre='Sci-Fi, Fantasy'),
+        record(3, series='Batman', publisher='DC', year=2013),
+        record(4, title='Loose'),
+    ])
+    assert db.get_comic_count() == 4
+    assert counts('publisher') == {None: 1, 'DC': 1, 'Image': 2}
+    assert counts('year') == {'': 1, 2012: 1, 2013: 2}
+    assert counts('genre') == {'Fantasy': 1, 'Sci-Fi': 2}
+    assert counts('format') == {'cbz': 4}
+    assert recounted()
+
+    # Deletes, updates and foreign key actions all keep the counters exact
+    db.delete_comic(db.get_comics(tags={'genre': 'Fantasy'})[0]['id'])
+    db.execute_query("UPDATE comics SET year = 2020 WHERE title = 'Comic 3'")
+    db.execute_query("DELETE FROM publishers WHERE name = 'DC'")
+    db.execute_query("DELETE FROM series WHERE name = 'Saga'")
+    assert db.get_comic_count() == 3
+    assert counts('year') == {'': 1, 2012: 1, 2020: 1}
+    assert counts('publisher') == {None: 3}
+    assert counts('genre') == {'Sci-Fi': 1}
+    assert recounted()
+
+    assert db.clear_database()
+    assert db.get_comic_count() == 0
+
+
+def test_csv_export_streams_rows_in_chunks(db, tmp_path):
+    db.add_comics_bulk([
+        {'title': f'Saga {i}', 'series': 'Saga', 'publisher': 'Image', 'issue_number': str(i),
+         'authors': ['Fiona Staples', 'Brian K. Vaughan'], 'characters': 'Alana, Marko',
+         'file_path': f'/library/saga/{i:03d}.cbz', 'file_size': 1,
+         'file_modified': 1.0, 'file_created': 1.0}
+        for i in range(1, 8)
+    ])
+
+    path = tmp_path / 'comics.csv'
+    assert db.export_to_csv(str(path), chunk_size=3)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 7
+    assert list(rows[0]) == list(ComicDatabase.EXPORT_COLUMNS)
+    assert rows[0]['series'] == 'Saga' and rows[0]['publisher'] == 'Image'
+    assert rows[0]['authors'] == 'Brian K. Vaughan; Fiona Staples'
+
+    assert db.export_to_csv(str(path), extended=True)
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert rows[-1]['characters'] == 'Alana, Marko' and rows[-1]['genre'] == ''
+    assert not (tmp_path / 'comics.csv.part').exists()
+
+
+def test_iter_query_streams_rows_in_each_shape(db):
+    db.add_comics_bulk([
+        {'title': f'Saga {i}', 'series': 'Saga', 'file_path': f'/library/saga/{i:03d}.cbz',
+         'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0}
+        for i in range(1, 6)
+    ])
+    query = "SELECT id, title FROM comics WHERE title LIKE %s ORDER BY id"
+
+    rows = db.iter_query(query, ('Saga%',), row_type='tuple', chunk_size=2)
+    assert [title for _, title in rows] == [f'Saga {i}' for i in range(1, 6)]
+    first = next(db.iter_query(query, ('Saga%',), row_type='namedtuple'))
+    assert first.title == 'Saga 1' and first[1] == 'Saga 1'
+    assert next(db.iter_query(Statement("SELECT title FROM comics WHERE id = :id"),
+                              {'id': first.id})) == {'title': 'Saga 1'}
+
+    # An abandoned iteration gives its reader connection back
+    for _ in range(db.reader_connections + 1):
+        rows = db.iter_query(query, ('Saga%',), chunk_size=1)
+        next(rows)
+        rows.close()
+    assert db.execute_query(query, ('Saga 2',), fetch=True) == [{'id': 2, 'title': 'Saga 2'}]
+
+    with pytest.raises(ValueError):
+        next(db.iter_query("DELETE FROM comics"))
+    with pytest.raises(ValueError):
+        next(db.iter_query(query, ('Saga%',), row_type='row'))
+
+
+def test_csv_import_upserts_in_chunks_and_rejects_bad_rows(db, tmp_path):
+    db.add_comics_bulk([
+        {'title': 'Saga 1', 'series': 'Saga', 'publisher': 'Image', 'authors': ['Fiona Staples'],
+         'file_path': '/library/saga/001.cbz', 'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0}
+    ])
+    path = tmp_path / 'import.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['title', 'year', 'series', 'publisher', 'authors', 'characters', 'file_path'])
+        writer.writerow(['Saga One', '2012', 'Saga', 'Image', 'Brian K. Vaughan; Fiona Staples',
+                         'Alana, Marko', '/library/saga/001.cbz'])
+        for i in range(2, 6):
+            writer.writerow([f'Saga {i}', '2013', 'Saga', 'Image', '', '', f'/library/saga/{i:03d}.cbz'])
+        writer.writerow(['Bad year', 'soon', '', '', '', '', '/library/bad.cbz'])
+        for year in ('1e400', 'inf', '2012.7'):
+            writer.writerow(['Bad year', year, '', '', '', '', f'/library/bad-{year}.cbz'])
+        writer.writerow(['', '', '', '', '', '', '/library/untitled.cbz'])
+
+    report = db.import_from_csv(str(path), chunk_size=2)
+    assert (report['rows'], report['imported'], report['rejected']) == (10, 5, 5)
+    assert report['rows_per_second'] > 0
+
+    comics = db.get_comics(series='Saga')
+    assert len(comics) == 5 and db.get_comic_count() == 5
+    saga = next(c for c in comics if c['file_path'] == '/library/saga/001.cbz')
+    assert (saga['title'], saga['year']) == ('Saga One', 2012)
+    assert db.get_comic_tags(saga['id']) == {'character': ['Alana', 'Marko']}
+    authors = db.execute_query(
+        "SELECT a.name FROM comic_authors ca JOIN authors a ON a.id = ca.author_id "
+        "WHERE ca.comic_id = %s ORDER BY a.name", (saga['id'],), fetch=True)
+    assert [a['name'] for a in authors] == ['Brian K. Vaughan', 'Fiona Staples']
+
+    # An export imports back unchanged
+    exported = tmp_path / 'export.csv'
+    assert db.export_to_csv(str(exported), extended=True)
+    assert db.import_from_csv(str(exported))['imported'] == 5
+    assert db.get_comic_tags(saga['id']) == {'character': ['Alana', 'Marko']}
+    assert db.get_comic_count() == 5
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('name,path\nx,y\n')
+    assert db.import_from_csv(str(path)) is None
+
+
+def test_backups_are_consistent_compressed_and_rotated(db, tmp_path):
+    db.add_comics_bulk([
+        {'title': f'Comic {i}', 'series': 'Saga', 'file_path': f'/library/{i:03d}.cbz',
+         'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0,
+         'cover_image': bytes([i]) * 2048, 'cover_image_type': 'image/jpeg'}
+        for i in range(40)
+    ])
+
+    steps = []
+    plain = tmp_path / 'backups' / 'library.sqlite'
+    assert db.backup_database(str(plain), progress=lambda done, total: steps.append((done, total)))
+    assert steps and steps[-1][0] == steps[-1][1]
+    copy = sqlite3.connect(plain)
+    assert copy.execute("PRAGMA integrity_check").fetchone()[0] == 'ok'
+    assert copy.execute("SELECT COUNT(*) FROM comics").fetchone()[0] == 40
+    assert copy.execute("SELECT COUNT(*) FROM covers").fetchone()[0] == 40
+    copy.close()
+
+    # Rotation only touches the backups of the same series
+    names = [backup_filename('library', 'sqlite', when=datetime(2026, 1, day)) for day in (1, 2, 3)]
+    for name in names:
+        assert db.backup_database(str(tmp_path / 'backups' / name), include_covers=False, keep=2)
+    remaining = sorted(p.name for p in (tmp_path / 'backups').iterdir())
+    assert remaining == sorted(['library.sqlite'] + names[1:])
+
+    with gzip.open(tmp_path / 'backups' / names[-1]) as packed:
+        (tmp_path / 'restored.sqlite').write_bytes(packed.read())
+    restored = sqlite3.connect(tmp_path / 'restored.sqlite')
+    assert restored.execute("SELECT COUNT(*) FROM comics").fetchone()[0] == 40
+    assert restored.execute("SELECT COUNT(*) FROM covers").fetchone()[0] == 0
+    restored.close()
+
+
+def test_statements_are_rendered_once_per_dialect(db):
+    statement = Statement("{insert_ignore} INTO comic_tags (comic_id, tag_id) "
+                          "SELECT :comic_id, id FROM tags WHERE name LIKE 'Bat%' AND kind = :kind")
+    assert statement.render('sqlite') == ("INSERT OR IGNORE INTO comic_tags (comic_id, tag_id) "
+                                          "SELECT :comic_id, id FROM tags WHERE name LIKE 'Bat%' AND kind = :kind")
+    assert statement.render('mysql') == ("INSERT IGNORE INTO comic_tags (comic_id, tag_id) "
+                                         "SELECT %(comic_id)s, id FROM tags WHERE name LIKE 'Bat%%' "
+                                         "AND kind = %(kind)s")
+    assert statement.render('mysql') is statement.render('mysql')
+
+    comic_id = db.add_comics_bulk([
+        {'title': 'Saga 1', 'series': 'Saga', 'publisher': 'Image', 'file_path': '/library/saga.cbz',
+         'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0}
+    ])[0]
+    author_id = db._get_or_create_author('Fiona Staples')
+    # Committed on the writer, so the reader pool sees it straight away
+    assert db.execute_query("SELECT id FROM authors WHERE name = 'Fiona Staples'",
+                            fetch=True) == [{'id': author_id}]
+    assert db._add_comic_author(comic_id, author_id, 'Artist')
+    assert db._add_comic_author(comic_id, author_id, 'Artist')
+    assert db.execute_query("SELECT COUNT(*) AS n FROM comic_authors", fetch=True)[0]['n'] == 1
+    assert [s['name'] for s in db.get_series(publisher='Image')] == ['Saga']
+    assert db.get_series(publisher='DC') == []
+    assert db.delete_comic(comic_id)
+
+
+def test_rescans_only_write_what_changed(db, tmp_path):
+    def record(i, **fields):
+        return dict(dict(title=f'Saga {i}', series='Saga', publisher='Image', authors=['Brian K. Vaughan'],
+                         genre='Sci-Fi', file_path=f'/library/saga/{i:03d}.cbz', file_size=1,
+                         file_modified=1.0, file_created=1.0,
+                         pages=[{'page_index': 0, 'member_name': 'p1.jpg'}]), **fields)
+
+    def writes(action):
+        statements = []
+        db.submit_write(db.connection.set_trace_callback, statements.append).result()
+        try:
+            result = action()
+        finally:
+            db.submit_write(db.connection.set_trace_callback, None).result()
+        return result, [s for s in statements if s.lstrip().split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')]
+
+    ids = db.add_comics_bulk([record(i) for i in range(1, 6)])
+    assert len(ids) == 5
+
+    # Unchanged records are not written at all
+    rescanned, statements = writes(lambda: db.add_comics_bulk([record(i) for i in range(1, 6)]))
+    assert rescanned == [] and statements == []
+
+    # A changed record updates its row and only the links that differ
+    changed = record(2, title='Saga Two', authors=['Brian K. Vaughan', 'Fiona Staples'],
+                     file_modified=2.0, pages=[{'page_index': 0, 'member_name': 'cover.jpg'}])
+    rescanned, statements = writes(lambda: db.add_comics_bulk([record(1), changed]))
+    assert rescanned == [ids[1]]
+    assert not [s for s in statements if 'comic_tags' in s]
+    comic = db.get_comics(search='Two')[0]
+    assert comic['id'] == ids[1]
+    authors = db.execute_query("SELECT a.name FROM comic_authors ca JOIN authors a ON a.id = ca.author_id "
+                               "WHERE ca.comic_id = %s ORDER BY a.name", (ids[1],), fetch=True)
+    assert [a['name'] for a in authors] == ['Brian K. Vaughan', 'Fiona Staples']
+    pages = db.execute_query("SELECT member_name FROM comic_pages WHERE comic_id = %s", (ids[1],), fetch=True)
+    assert [p['member_name'] for p in pages] == ['cover.jpg']
+    assert db.get_comic_count() == 5 and db.get_facet_counts('genre')[0]['count'] == 5
+
+    # Re-adding a single file updates it instead of failing on the unique path
+    path = make_cbz(tmp_path / 'Monstress 001.cbz')
+    first = db.add_comic_from_file(path)
+    assert db.add_comic_from_file(path) == first
+
+
+def test_selections_are_deleted_in_one_transaction_and_orphans_collected(db):
+    db.add_comics_bulk([
+        dict(title=f'Comic {i}', series='Saga' if i < 8 else 'Paper Girls', publisher='Image',
+             subseries='Deluxe' if i == 9 else None, authors=[f'Author {i % 3}', f'Solo {i}'],
+             genre='Sci-Fi' if i < 8 else 'Mystery', file_path=f'/library/{i:03d}.cbz',
+             file_size=1, file_modified=1.0, file_created=1.0,
+             cover_image=bytes([i]) * 64, cover_image_type='image/jpeg')
+        for i in range(10)
+    ])
+    paper_girls = [c['id'] for c in db.get_comics(series='Paper Girls')]
+    saga = [c['id'] for c in db.get_comics(series='Saga')]
+
+    assert db.delete_comics(paper_girls + [999999]) == 2
+    assert db.get_comic_count() == 8
+    count = lambda table: db.execute_query(f"SELECT COUNT(*) AS n FROM {table}", fetch=True)[0]['n']
+    assert [s['name'] for s in db.get_series()] == ['Saga']
+    assert (count('subseries'), count('covers'), count('authors')) == (0, 8, 3 + 8)
+    assert [t['name'] for t in db.get_tags('genre')] == ['Sci-Fi']
+    assert [f['label'] for f in db.get_facet_counts('genre')] == ['Sci-Fi']
+
+    # What the paused triggers would have done was done per chunk
+    counts = lambda facet: {f['label']: f['count'] for f in db.get_facet_counts(facet)}
+    assert (counts('series'), counts('format'), counts('genre')) == \
+        ({'Saga': 8}, {'cbz': 8}, {'Sci-Fi': 8})
+    assert db.get_library_stats()['comics'] == 8
+    assert db.get_comics(search='paper') == [] and len(db.get_comics(search='saga')) == 8
+    assert len(db.get_browse_page(page_size=20)['comics']) == 8
+    assert count('trigger_pauses') == 0
+
+    # Without garbage collection, dimension rows stay until collected on demand
+    assert db.delete_comics(saga, collect_garbage=False) == 8
+    assert count('publishers') == 1 and count('covers') == 8
+    removed = db.collect_garbage()
+    assert (removed['publishers'], removed['series'], removed['covers']) == (1, 1, 8)
+    assert sum(db.collect_garbage().values()) == 0
+    assert db.delete_comic(saga[0]) is False
+
+    db.add_comics_bulk([dict(title='Monstress', series='Monstress', file_path='/library/m.cbz',
+                             file_size=1, file_modified=1.0, file_created=1.0)])
+    db.execute_query("DELETE FROM comics WHERE title = 'Monstress'")
+    assert counts('series') == {} and db.get_comics(search='monstress') == []
+    assert db.get_browse_page()['comics'] == []
+
+
+def test_slow_statements_are_logged_with_redacted_params_and_plan(db, caplog):
+    db.add_comics_bulk([
+        {'title': f'Saga {i}', 'notes': 'signed', 'file_path': f'/library/saga/{i:03d}.cbz',
+         'file_size': 1, 'file_modified': 1.0, 'file_created': 1.0}
+        for i in range(1, 4)
+    ])
+    db.reset_query_stats()
+    db.slow_query_ms = 1e-6
+    with caplog.at_level(logging.WARNING, logger='struttura.querylog'):
+        for _ in range(2):
+            assert len(db.execute_query("SELECT id FROM comics WHERE notes = %s",
+                                        ('signed',), fetch=True)) == 3
+    db.slow_query_ms = None
+    db.execute_query("SELECT id FROM comics WHERE id IN (%s, %s)", (1, 2), fetch=True)
+    db.execute_query("SELECT id FROM comics WHERE id IN (%s, %s, %s)", (1, 2, 3), fetch=True)
+
+    logged = [r.getMessage() for r in caplog.records if 'WHERE notes = ?' in r.getMessage()]
+    assert len(logged) == 2
+    # No index on notes: the plan shows the full scan, the value is not shown
+    assert '3 rows' in logged[0] and '<str:6>' in logged[0] and 'signed' not in logged[0]
+    assert 'SCAN comics' in logged[0]
+
+    stats = {s['sql']: s for s in db.get_query_stats(None)}
+    notes = stats['SELECT id FROM comics WHERE notes = ?']
+    assert (notes['calls'], notes['rows'], notes['slow']) == (2, 6, 2)
+    assert stats['SELECT id FROM comics WHERE id IN (?, ...)']['calls'] == 2
+
@@ -0,0 +1,64 @@
+import os
+import zipfile
+
+from struttura.archive_utils import natural_sort_key, sort_pages
+from struttura.prefetch import ArchivePrefetcher
+from struttura.zip_directory import read_entries
+
+
+def make_cbz(path, pages, padding=0):
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('ComicInfo.xml', '<ComicInfo><Title>Test</Title></ComicInfo>')
+        for name in pages:
+            zf.writestr(name, b'page ' + name.encode())
+        if padding:
+            zf.writestr('padding.bin', os.urandom(padding))
+    return str(path)
+
+
+def test_natural_sort_skips_hidden_and_system_files():
+    names = ['p10.jpg', 'p2.jpg', '.hidden.jpg', '__MACOSX/p1.jpg', 'Thumbs.db', 'p1.png']
+    assert sort_pages(names) == ['p1.png', 'p2.jpg', 'p10.jpg']
+    assert natural_sort_key('a2') < natural_sort_key('a10')
+
+
+def test_read_entries_matches_zipfile(tmp_path):
+    path = make_cbz(tmp_path / 'a.cbz', ['p1.jpg', 'p2.jpg'])
+    with open(path, 'rb') as f:
+        data = f.read()
+    entries = read_entries(lambda offset, size: data[offset:offset + size], len(data))
+    with zipfile.ZipFile(path) as zf:
+        assert [e.name for e in entries] == zf.namelist()
+        assert [e.file_size for e in entries] == [i.file_size for i in zf.infolist()]
+
+
+def test_prefetcher_reads_small_files_whole(tmp_path):
+    paths = [make_cbz(tmp_path / f'{i}.cbz', ['p1.jpg']) for i in range(3)]
+    with ArchivePrefetcher(paths, depth=2) as prefetcher:
+        seen = []
+        for path in prefetcher:
+            prefetched = prefetcher.get(path)
+            assert prefetched.whole == open(path, 'rb').read()
+            seen.append(path)
+    assert seen == [os.path.abspath(p) for p in paths]
+
+
+def test_prefetcher_serves_zip_from_ranges(tmp_path):
+    path = make_cbz(tmp_path / 'big.cbz', ['p2.jpg', 'p10.jpg'], padding=2 * 1024 * 1024)
+    with ArchivePrefetcher([path], whole_file_threshold_mb=1) as prefetcher:
+        for current in prefetcher:
+            prefetched = prefetcher.get(current)
+            assert prefetched.whole is None
+            assert prefetched.nbytes < os.path.getsize(path)
+            with prefetched.open() as source, zipfile.ZipFile(source) as zf:
+                assert zf.read('p2.jpg') == b'page p2.jpg'
+
+
+def test_prefetch_config_ignores_unknown_keys(monkeypatch):
+    from struttura import config
+    monkeypatch.setattr(config, 'load_config',
+                        lambda: {'prefetch': {'depth': 2, 'detph': 8, 'enabled': True}})
+    prefetch = config.get_prefetch_config()
+    assert 'detph' not in prefetch and prefetch['depth'] == 2
+    prefetch.pop('enabled')
+    ArchivePrefetcher([], **prefetch).close()